@@ -0,0 +1,393 @@
+"""
+Command line bulk ingestion of PDFs from the local filesystem
+
+``grading-pdf ingest`` parses a directory tree (or the files listed in a
+manifest) across a process pool, without going through the API, Redis or
+Celery. Each run appends to a state journal. A file whose size and mtime
+match its last successful parse is skipped; a file with a new mtime but
+unchanged content (by SHA-256) is skipped as well. An interrupted run picks
+up where it stopped.
+
+Markdown goes to an output tree mirroring the source (``--out``) or to a
+JSON Lines file with one record per parsed file (``--jsonl``). JSONL output
+is appended to across runs; when a file is parsed again, its last record
+wins.
+
+Usage:
+    grading-pdf ingest archive/ --out markdown/
+    grading-pdf ingest --manifest regrade.txt --jsonl regrade.jsonl --workers 8
+"""
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+
+from app.services.converter import warm_up
+from app.services.engines import ENGINES
+from app.services.pdf_parser import PDFParserService, PDFParsingError
+from app.services.worker_sizing import resolve_concurrency
+
+logger = logging.getLogger(__name__)
+
+STATE_FILENAME = ".grading-pdf-state.jsonl"
+
+# Each pool process parses with its own converter
+_parser: Optional[PDFParserService] = None
+
+
+def _init_process(engine: Optional[str] = None) -> None:
+    global _parser
+    logging.getLogger("pdfminer").setLevel(logging.ERROR)
+    warm_up()
+    _parser = PDFParserService(engine)
+
+
+def _parse(path: str) -> Dict[str, Any]:
+    """Parse one file in a pool process"""
+    with open(path, "rb") as f:
+        data = f.read()
+    result = {"sha256": hashlib.sha256(data).hexdigest(), "content": None, "error": None}
+    try:
+        result["content"] = _parser.parse_pdf_content(data)
+        result["status"] = "success"
+    except PDFParsingError as e:
+        result["status"] = "failed"
+        result["error"] = str(e)
+    return result
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_pdfs(root: Path) -> Iterator[Tuple[Path, Path]]:
+    """(absolute path, path relative to root) of every PDF under root, sorted"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(".pdf"):
+                path = Path(dirpath, name)
+                yield path.resolve(), path.relative_to(root)
+
+
+def read_manifest(manifest: Path) -> Iterator[Tuple[Path, Path]]:
+    """
+    (absolute path, output-relative path) of every file listed in a manifest
+
+    One path per line; blank lines and lines starting with # are ignored.
+    Relative paths are resolved against the manifest's directory.
+    """
+    base = manifest.parent.resolve()
+    with open(manifest) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            path = (base / line).resolve()
+            try:
+                relative = path.relative_to(base)
+            except ValueError:
+                relative = Path(*path.parts[1:])
+            yield path, relative
+
+
+class IngestState:
+    """
+    Append-only journal of the last outcome per source file
+
+    Every finished file is appended and flushed right away, so a killed run
+    loses at most the files that were being parsed. A truncated last line
+    is ignored on load; compact() rewrites the journal with one line per file.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if path.exists():
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self.entries[entry["path"]] = entry
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._journal = open(path, "a")
+
+    def get(self, path: Path) -> Optional[Dict[str, Any]]:
+        return self.entries.get(str(path))
+
+    def record(self, path: Path, **entry) -> None:
+        entry["path"] = str(path)
+        self.entries[entry["path"]] = entry
+        self._journal.write(json.dumps(entry) + "\n")
+        self._journal.flush()
+
+    def compact(self) -> None:
+        self._journal.close()
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w") as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry) + "\n")
+        os.replace(tmp, self.path)
+
+
+class MarkdownTreeWriter:
+    """Writes each document's markdown to <out>/<relative path>.md"""
+
+    def __init__(self, out: Path):
+        self.out = out
+
+    def target(self, relative: Path) -> Path:
+        return self.out / relative.with_suffix(".md")
+
+    def exists(self, relative: Path) -> bool:
+        return self.target(relative).exists()
+
+    def write(self, source: Path, relative: Path, result: Dict[str, Any]) -> None:
+        if result["status"] != "success":
+            return
+        target = self.target(relative)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".tmp")
+        tmp.write_text(result["content"], encoding="utf-8")
+        os.replace(tmp, target)
+
+    def close(self) -> None:
+        pass
+
+
+class JsonlWriter:
+    """Appends one JSON record per parsed document"""
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def exists(self, relative: Path) -> bool:
+        return True
+
+    def write(self, source: Path, relative: Path, result: Dict[str, Any]) -> None:
+        record = {"path": str(relative), "source": str(source), **result}
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class Progress:
+    """Prints a progress line to stderr at most every ``interval`` seconds"""
+
+    def __init__(self, total: int, interval: float, enabled: bool = True):
+        self.total = total
+        self.interval = interval
+        self.enabled = enabled
+        self.counts = {"parsed": 0, "skipped": 0, "failed": 0}
+        self.start = time.monotonic()
+        self._last = 0.0
+
+    def add(self, outcome: str) -> None:
+        self.counts[outcome] += 1
+        now = time.monotonic()
+        if now - self._last >= self.interval or self.done == self.total:
+            self._last = now
+            self.print()
+
+    @property
+    def done(self) -> int:
+        return sum(self.counts.values())
+
+    def print(self) -> None:
+        if not self.enabled:
+            return
+        elapsed = max(time.monotonic() - self.start, 1e-9)
+        print(
+            f"{self.done}/{self.total} files ({self.counts['parsed']} parsed, {self.counts['skipped']} skipped, "
+            f"{self.counts['failed']} failed), {self.counts['parsed'] / elapsed:.1f} files/s",
+            file=sys.stderr,
+            flush=True,
+        )
+
+
+def is_unchanged(entry: Optional[Dict[str, Any]], stat: os.stat_result, path: Path, retry_failed: bool) -> bool:
+    """Whether a file can be skipped: same size and mtime, or same size and content"""
+    if entry is None or entry["size"] != stat.st_size:
+        return False
+    if entry["status"] != "success" and retry_failed:
+        return False
+    return entry["mtime_ns"] == stat.st_mtime_ns or entry["sha256"] == file_sha256(path)
+
+
+def ingest(
+    files: List[Tuple[Path, Path]],
+    writer,
+    state: IngestState,
+    workers: int,
+    retry_failed: bool = False,
+    progress: Optional[Progress] = None,
+    engine: Optional[str] = None,
+) -> Dict[str, int]:
+    """
+    Parse every changed file across a pool of ``workers`` processes
+
+    ``engine`` forces one extraction engine instead of choosing per document.
+
+    Returns:
+        Counts of parsed, skipped and failed files
+    """
+    progress = progress or Progress(len(files), interval=float("inf"), enabled=False)
+    pending = []
+    for source, relative in files:
+        entry = state.get(source)
+        try:
+            stat = source.stat()
+        except OSError as e:
+            state.record(source, size=None, mtime_ns=None, sha256=None, status="failed", error=str(e))
+            progress.add("failed")
+            continue
+        if is_unchanged(entry, stat, source, retry_failed) and (entry["status"] != "success" or writer.exists(relative)):
+            if entry["mtime_ns"] != stat.st_mtime_ns:
+                fields = {key: value for key, value in entry.items() if key != "path"}
+                state.record(source, **dict(fields, mtime_ns=stat.st_mtime_ns))
+            progress.add("skipped")
+        else:
+            pending.append((source, relative, stat))
+
+    def finish(job: Tuple[Path, Path, os.stat_result], result: Dict[str, Any]) -> None:
+        source, relative, stat = job
+        writer.write(source, relative, result)
+        state.record(
+            source, size=stat.st_size, mtime_ns=stat.st_mtime_ns,
+            sha256=result["sha256"], status=result["status"], error=result["error"]
+        )
+        progress.add("parsed" if result["status"] == "success" else "failed")
+
+    queue = iter(pending)
+    # Files that were in flight when a pool crashed; any of them may have caused it
+    suspects: List[Tuple[Path, Path, os.stat_result]] = []
+    while True:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_process, initargs=(engine,)) as pool:
+            running: Dict[Future, Tuple[Path, Path, os.stat_result]] = {}
+            lost: List[Tuple[Path, Path, os.stat_result]] = []
+            while not lost:
+                if suspects:
+                    # Parse suspects one at a time, so the next crash can only be the file being parsed
+                    if not running:
+                        job = suspects.pop(0)
+                        running[pool.submit(_parse, str(job[0]))] = job
+                else:
+                    # Keep a bounded window of work in flight so huge runs don't queue every path up front
+                    while len(running) < workers * 2:
+                        job = next(queue, None)
+                        if job is None:
+                            break
+                        running[pool.submit(_parse, str(job[0]))] = job
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    job = running.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        lost.append(job)
+                        continue
+                    except OSError as e:
+                        result = {"sha256": None, "status": "failed", "content": None, "error": str(e)}
+                    finish(job, result)
+        if not lost:
+            break
+        # The pool is shut down, so what was still in flight has either finished or gone down with it
+        for future, job in running.items():
+            try:
+                finish(job, future.result())
+            except BrokenProcessPool:
+                lost.append(job)
+            except OSError as e:
+                finish(job, {"sha256": None, "status": "failed", "content": None, "error": str(e)})
+        if len(lost) == 1:
+            finish(lost[0], {"sha256": None, "status": "failed", "content": None, "error": "Parser process crashed"})
+            logger.warning(f"Parsing {lost[0][0]} crashed the parser process, restarting the pool")
+        else:
+            suspects = lost + suspects
+            logger.warning(f"A parser process crashed with {len(lost)} files in flight, retrying them one at a time")
+
+    return dict(progress.counts)
+
+
+def _ingest_command(args: argparse.Namespace) -> int:
+    if args.manifest:
+        files = list(read_manifest(Path(args.manifest)))
+    else:
+        root = Path(args.source)
+        if not root.is_dir():
+            raise SystemExit(f"Not a directory: {root}")
+        files = list(find_pdfs(root))
+
+    if args.out:
+        writer = MarkdownTreeWriter(Path(args.out))
+        state_path = Path(args.state) if args.state else Path(args.out) / STATE_FILENAME
+    else:
+        writer = JsonlWriter(Path(args.jsonl))
+        state_path = Path(args.state) if args.state else Path(args.jsonl + ".state")
+
+    state = IngestState(state_path)
+    progress = Progress(len(files), args.progress_interval, enabled=not args.quiet)
+    start = time.monotonic()
+    try:
+        counts = ingest(
+            files, writer, state, args.workers or resolve_concurrency(), args.retry_failed, progress, args.engine
+        )
+    finally:
+        writer.close()
+        state.compact()
+
+    print(json.dumps(dict(total=len(files), seconds=round(time.monotonic() - start, 3), **counts)))
+    return 1 if counts["failed"] else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="grading-pdf", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = commands.add_parser("ingest", help="Parse PDFs from a directory or manifest")
+    source = ingest_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("source", nargs="?", help="Directory searched recursively for *.pdf")
+    source.add_argument("--manifest", help="File listing one PDF path per line")
+    output = ingest_parser.add_mutually_exclusive_group(required=True)
+    output.add_argument("--out", help="Directory to write <name>.md files to, mirroring the source tree")
+    output.add_argument("--jsonl", help="JSON Lines file to append one record per document to")
+    ingest_parser.add_argument("--state", help="State journal (default: next to the output)")
+    ingest_parser.add_argument(
+        "--workers", type=int, default=0, help="Parser processes (default: from the CPU and memory limits)"
+    )
+    ingest_parser.add_argument(
+        "--engine", choices=sorted(ENGINES), help="Extraction engine for every file (default: chosen per document)"
+    )
+    ingest_parser.add_argument("--retry-failed", action="store_true", help="Parse files that failed last time again")
+    ingest_parser.add_argument("--progress-interval", type=float, default=5, help="Seconds between progress lines")
+    ingest_parser.add_argument("--quiet", action="store_true", help="No progress output")
+    ingest_parser.set_defaults(handler=_ingest_command)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
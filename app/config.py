@@ -3,8 +3,123 @@ import os
 class Settings:
     # Redis configuration
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
+    REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))  # asyncio pool size per API process
+    REDIS_POOL_TIMEOUT: float = float(os.getenv("REDIS_POOL_TIMEOUT", "5"))  # seconds to wait for a free pooled connection
     
     # File upload configuration
     MAX_FILE_SIZE: int = int(os.getenv("MAX_FILE_SIZE", "50")) * 1024 * 1024  # 50MB default
+    UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))  # 1MB default
+    UPLOAD_SPOOL_THRESHOLD: int = int(os.getenv("UPLOAD_SPOOL_THRESHOLD", str(1024 * 1024)))  # spill to disk above 1MB
+    MULTIPART_OVERHEAD: int = 64 * 1024  # allowance for multipart headers and form fields
+    MAX_BATCH_FILES: int = int(os.getenv("MAX_BATCH_FILES", "2000"))
+    MAX_PAGES: int = int(os.getenv("MAX_PAGES", "0"))  # pages per PDF, 0 for no limit
+    PREFLIGHT_ENABLED: bool = os.getenv("PREFLIGHT_ENABLED", "true").lower() == "true"
+    PREFLIGHT_TEXT_SAMPLE_PAGES: int = int(os.getenv("PREFLIGHT_TEXT_SAMPLE_PAGES", "3"))  # pages checked for fonts
+    MAX_BATCH_SIZE: int = int(os.getenv("MAX_BATCH_SIZE", "200")) * 1024 * 1024  # 200MB default per batch request
 
-settings = Settings() 
\ No newline at end of file
+    # Result cache configuration
+    CACHE_ENABLED: bool = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+    CACHE_TTL: int = int(os.getenv("CACHE_TTL", str(7 * 24 * 3600)))  # 7 days default
+    CACHE_MAX_BYTES: int = int(os.getenv("CACHE_MAX_BYTES", str(256 * 1024 * 1024)))  # 256MB default
+
+    # Index of parsed documents per user_id/file_id
+    DOCUMENT_INDEX_ENABLED: bool = os.getenv("DOCUMENT_INDEX_ENABLED", "true").lower() == "true"
+    DOCUMENT_TTL: int = int(os.getenv("DOCUMENT_TTL", str(90 * 24 * 3600)))  # seconds indexed results are kept
+    DOCUMENT_STORE_PATH: str = os.getenv("DOCUMENT_STORE_PATH", "/tmp/grading-pdf-documents")
+    PARSER_REVISION: str = os.getenv("PARSER_REVISION", "1")  # bump to re-parse documents after output changes
+    ENGINE_DEFAULT: str = os.getenv("ENGINE_DEFAULT", "markitdown")  # engine for documents the fast path can't take
+    # Opt-in: tables on pages the sample misses lose their markdown tables on the fast path
+    ENGINE_FAST: str = os.getenv("ENGINE_FAST", "")  # engine for text-layer documents without tables; empty disables
+    ENGINE_TABLE_SAMPLE_PAGES: int = int(os.getenv("ENGINE_TABLE_SAMPLE_PAGES", "3"))  # pages checked for tables; 0 skips the check
+
+    # Full-text search over parsed documents (SQLite FTS5 on a volume shared by the API and the indexing worker)
+    SEARCH_INDEX_ENABLED: bool = os.getenv("SEARCH_INDEX_ENABLED", "false").lower() == "true"
+    SEARCH_INDEX_PATH: str = os.getenv("SEARCH_INDEX_PATH", "/tmp/grading-pdf-search/search.db")
+    SEARCH_INDEX_TIMEOUT: float = float(os.getenv("SEARCH_INDEX_TIMEOUT", "30"))  # seconds to wait for the write lock
+    SEARCH_QUEUE: str = os.getenv("SEARCH_QUEUE", "pdf-search")  # consumed by a single indexing worker
+
+    # Near-duplicate detection (MinHash signatures in an LSH index per user_id)
+    SIMILARITY_INDEX_ENABLED: bool = os.getenv("SIMILARITY_INDEX_ENABLED", "false").lower() == "true"
+    SIMILARITY_SHINGLE_SIZE: int = int(os.getenv("SIMILARITY_SHINGLE_SIZE", "5"))  # words per shingle
+    SIMILARITY_SIGNATURE_SIZE: int = int(os.getenv("SIMILARITY_SIGNATURE_SIZE", "128"))  # 32-bit values per signature
+    SIMILARITY_BANDS: int = int(os.getenv("SIMILARITY_BANDS", "16"))  # LSH bands; must divide SIMILARITY_SIGNATURE_SIZE
+    SIMILARITY_THRESHOLD: float = float(os.getenv("SIMILARITY_THRESHOLD", "0.8"))  # estimated Jaccard similarity reported
+
+    # Upload blob store configuration ("redis" or "filesystem")
+    BLOB_STORE: str = os.getenv("BLOB_STORE", "redis")
+    BLOB_STORE_PATH: str = os.getenv("BLOB_STORE_PATH", "/tmp/grading-pdf-blobs")
+    BLOB_TTL: int = int(os.getenv("BLOB_TTL", str(24 * 3600)))  # 1 day default
+
+    # Page-level fan-out for large PDFs (0 disables splitting)
+    PAGE_SPLIT_THRESHOLD: int = int(os.getenv("PAGE_SPLIT_THRESHOLD", "0"))  # pages
+    PAGE_SPLIT_SIZE: int = int(os.getenv("PAGE_SPLIT_SIZE", "25"))  # pages per subtask
+
+    # Resumable whole-document parses (0 disables checkpointing)
+    CHECKPOINT_PAGES: int = int(os.getenv("CHECKPOINT_PAGES", "25"))  # pages per checkpointed range
+    CHECKPOINT_TTL: int = int(os.getenv("CHECKPOINT_TTL", str(24 * 3600)))  # seconds unfinished parses can resume
+
+    # Result storage
+    RESULT_TTL: int = int(os.getenv("RESULT_TTL", "86400"))  # seconds task results are kept
+    RESULT_COMPRESS_THRESHOLD: int = int(os.getenv("RESULT_COMPRESS_THRESHOLD", "1024"))  # bytes of markdown
+    RESULT_OFFLOAD_THRESHOLD: int = int(os.getenv("RESULT_OFFLOAD_THRESHOLD", str(64 * 1024)))  # compressed bytes
+    RESULT_COMPRESSION_LEVEL: int = int(os.getenv("RESULT_COMPRESSION_LEVEL", "6"))  # zlib level
+    RESULT_STORE_PATH: str = os.getenv("RESULT_STORE_PATH", "/tmp/grading-pdf-results")
+    RESPONSE_COMPRESS_MIN_SIZE: int = int(os.getenv("RESPONSE_COMPRESS_MIN_SIZE", "4096"))  # bytes of response body
+
+    # Push-based result delivery
+    EVENTS_KEEPALIVE: int = int(os.getenv("EVENTS_KEEPALIVE", "15"))  # seconds between keep-alives / state re-checks
+    EVENTS_MAX_DURATION: int = int(os.getenv("EVENTS_MAX_DURATION", "3600"))  # seconds an event stream stays open
+    WEBHOOK_TIMEOUT: int = int(os.getenv("WEBHOOK_TIMEOUT", "10"))
+    WEBHOOK_MAX_RETRIES: int = int(os.getenv("WEBHOOK_MAX_RETRIES", "5"))
+    # Comma-separated hosts webhooks may be sent to, even on private addresses; empty allows any public host
+    WEBHOOK_ALLOWED_HOSTS: list = [
+        host.strip().lower() for host in os.getenv("WEBHOOK_ALLOWED_HOSTS", "").split(",") if host.strip()
+    ]
+
+    # Incremental markdown streams
+    STREAM_TTL: int = int(os.getenv("STREAM_TTL", "3600"))  # seconds a finished stream stays readable
+    STREAM_CHUNK_PAGES: int = int(os.getenv("STREAM_CHUNK_PAGES", "1"))  # pages extracted per streamed chunk
+
+    # /parse/sync process pool
+    SYNC_PARSE_WORKERS: int = int(os.getenv("SYNC_PARSE_WORKERS", "2"))  # processes
+    SYNC_PARSE_QUEUE_SIZE: int = int(os.getenv("SYNC_PARSE_QUEUE_SIZE", "4"))  # requests waiting for a process
+    SYNC_PARSE_TIMEOUT: float = float(os.getenv("SYNC_PARSE_TIMEOUT", "30"))  # seconds
+
+    # Celery worker
+    WORKER_MAX_TASKS_PER_CHILD: int = int(os.getenv("WORKER_MAX_TASKS_PER_CHILD", "1000"))
+    WORKER_METRICS_PORT: int = int(os.getenv("WORKER_METRICS_PORT", "9100"))  # 0 disables the metrics server
+    WORKER_CONCURRENCY: str = os.getenv("WORKER_CONCURRENCY", "auto")  # "auto" sizes the pool from cgroup CPU/memory limits
+    WORKER_PROCESS_MEMORY: int = int(os.getenv("WORKER_PROCESS_MEMORY", str(256 * 1024 * 1024)))  # Memory budget per pool process
+    WORKER_MAX_MEMORY_PER_CHILD: int = int(os.getenv("WORKER_MAX_MEMORY_PER_CHILD", str(512 * 1024 * 1024)))  # RSS after which a pool process is replaced; 0 disables
+    WORKER_CHILD_MEMORY_LIMIT: int = int(os.getenv("WORKER_CHILD_MEMORY_LIMIT", "0"))  # Address space cap per pool process (MemoryError instead of an OOM kill); 0 disables
+    TASK_SOFT_TIME_LIMIT: int = int(os.getenv("TASK_SOFT_TIME_LIMIT", "300"))  # seconds until a parse is aborted
+    TASK_TIME_LIMIT: int = int(os.getenv("TASK_TIME_LIMIT", "360"))  # seconds until the pool process is killed
+
+    # Poison PDF quarantine
+    QUARANTINE_AFTER_STRIKES: int = int(os.getenv("QUARANTINE_AFTER_STRIKES", "2"))  # Crashes/timeouts before a PDF is quarantined
+    QUARANTINE_STRIKE_TTL: int = int(os.getenv("QUARANTINE_STRIKE_TTL", "86400"))  # Seconds strikes are remembered
+    QUARANTINE_TTL: int = int(os.getenv("QUARANTINE_TTL", str(7 * 86400)))  # Seconds a PDF stays quarantined
+    QUARANTINE_HEARTBEAT_TTL: int = int(os.getenv("QUARANTINE_HEARTBEAT_TTL", "60"))  # Seconds without a heartbeat before a parse counts as crashed
+
+    # Queue routing and fair share
+    SMALL_QUEUE: str = os.getenv("SMALL_QUEUE", "pdf-small")
+    LARGE_QUEUE: str = os.getenv("LARGE_QUEUE", "pdf-large")
+    LARGE_JOB_BYTES: int = int(os.getenv("LARGE_JOB_BYTES", str(5 * 1024 * 1024)))  # Uploads from this size go to LARGE_QUEUE
+    LARGE_JOB_PAGES: int = int(os.getenv("LARGE_JOB_PAGES", "50"))  # PDFs with this many pages go to LARGE_QUEUE
+    INFLIGHT_TTL: int = int(os.getenv("INFLIGHT_TTL", str(6 * 3600)))  # Seconds a job counts as in flight at most
+
+    # Admission control
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_REQUESTS_PER_SECOND: float = float(os.getenv("RATE_LIMIT_REQUESTS_PER_SECOND", "10"))  # per user
+    RATE_LIMIT_REQUESTS_BURST: int = int(os.getenv("RATE_LIMIT_REQUESTS_BURST", "50"))
+    RATE_LIMIT_BYTES_PER_SECOND: int = int(os.getenv("RATE_LIMIT_BYTES_PER_SECOND", str(20 * 1024 * 1024)))  # per user
+    RATE_LIMIT_BYTES_BURST: int = int(os.getenv("RATE_LIMIT_BYTES_BURST", str(200 * 1024 * 1024)))
+    MAX_INFLIGHT_PER_USER: int = int(os.getenv("MAX_INFLIGHT_PER_USER", "2000"))  # Unfinished tasks per user
+    BACKPRESSURE_QUEUE_DEPTH: int = int(os.getenv("BACKPRESSURE_QUEUE_DEPTH", "10000"))  # Queued tasks before uploads get 429
+    BACKPRESSURE_RETRY_AFTER: int = int(os.getenv("BACKPRESSURE_RETRY_AFTER", "30"))  # seconds
+
+    # Backlog signal for autoscaling
+    BACKLOG_DURATION_SAMPLES: int = int(os.getenv("BACKLOG_DURATION_SAMPLES", "200"))  # Recent task durations kept for the drain estimate
+    BACKLOG_WORKER_TTL: int = int(os.getenv("BACKLOG_WORKER_TTL", "30"))  # Seconds a worker heartbeat stays valid
+
+settings = Settings()
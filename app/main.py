@@ -1,10 +1,72 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from celery.result import GroupResult
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from collections import Counter
+import asyncio
+import json
 import logging
+import time
 
-from app.models import ParseResponse, ParseResult, TaskStatus
-from app.worker import celery_app, parse_pdf_task
+import redis.asyncio
+
+from app.models import (
+    BatchResponse,
+    BatchResult,
+    BatchSimilarity,
+    DocumentList,
+    DocumentRecord,
+    ParseResponse,
+    PDFInfo,
+    ParseResult,
+    SearchHit,
+    SearchResults,
+    SimilarDocument,
+    SimilarDocuments,
+    TaskStatus,
+    TaskStatusRequest,
+    TaskStatusResponse,
+)
+from app.worker import (
+    celery_app,
+    complete_from_cache,
+    document_index,
+    result_cache,
+    search_index,
+    similarity_index,
+    submit_parse_batch,
+    submit_parse_task,
+)
+from app.services import metrics
+from app.services.admission import AdmissionController, AdmissionRejectedError
+from app.services.backlog import get_backlog
+from app.services.engines import UnknownEngineError, get_engine
+from app.services.page_stream import stream_key
+from app.services.pdf_parser import PDFParsingError
+from app.services.preflight import InvalidPDFError, PDFMetadata, inspect_pdf
+from app.services.quarantine import PDFQuarantinedError, is_quarantined
+from app.services.result_delivery import (
+    RangeNotSatisfiableError,
+    choose_encoding,
+    compress,
+    etag,
+    etag_matches,
+    page_slice,
+    parse_byte_range,
+    parse_pages,
+)
+from app.services.search_index import InvalidSearchQueryError
+from app.services.sync_parser import (
+    SyncParserBusyError,
+    SyncParserPool,
+    SyncParserUnavailableError,
+    SyncParseTimeoutError,
+)
+from app.services.task_events import TERMINAL_STATUSES, event_channel, validate_callback_url
+from app.services.task_results import read_task_results, to_parse_result
+from app.services.upload import UploadTooLargeError, spool_upload
 from app.config import settings
 
 # Configure logging
@@ -18,6 +80,73 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Per-user rate limits and global backpressure for uploads
+admission = AdmissionController()
+
+# For /parse/sync; runs in its own processes so the event loop stays free
+sync_parser = SyncParserPool()
+app.router.add_event_handler("shutdown", sync_parser.shutdown)
+
+
+async def _admit(check, *args) -> None:
+    """Run an admission check, turning a rejection into 429 with Retry-After"""
+    try:
+        await run_in_threadpool(check, *args)
+    except AdmissionRejectedError as e:
+        logger.warning(f"Rejecting upload: {str(e)}")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
+async def _preflight(file) -> Optional[PDFMetadata]:
+    """Validate an upload before it is enqueued, turning a failure into 422"""
+    if not settings.PREFLIGHT_ENABLED:
+        return None
+    try:
+        return await run_in_threadpool(inspect_pdf, file)
+    except InvalidPDFError as e:
+        logger.info(f"Rejecting upload: {str(e)}")
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def _check_engine(engine: Optional[str], stream: bool = False) -> None:
+    """Reject an unknown engine, or one combined with streaming, with 400"""
+    if engine is None:
+        return
+    try:
+        get_engine(engine)
+    except UnknownEngineError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if stream:
+        raise HTTPException(status_code=400, detail="engine can't be combined with stream")
+
+
+async def _deliver(
+    request: Request,
+    body: bytes,
+    media_type: str = "application/json",
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Send a body with an ETag (unless headers bring one), answering a
+    matching If-None-Match with 304
+
+    Bodies of at least RESPONSE_COMPRESS_MIN_SIZE bytes are compressed if the
+    client accepts brotli or gzip; partial content is always sent as is.
+    """
+    encoding = None
+    if status_code == 200 and len(body) >= settings.RESPONSE_COMPRESS_MIN_SIZE:
+        encoding = choose_encoding(request.headers.get("accept-encoding"))
+    headers = {"ETag": etag(body, encoding), "Vary": "Accept-Encoding", **(headers or {})}
+    
+    if status_code == 200 and etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        body = await run_in_threadpool(compress, body, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(body, status_code=status_code, media_type=media_type, headers=headers)
+
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -28,86 +157,793 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """Reject uploads whose declared size is too large before reading the body"""
+    content_length = request.headers.get("content-length")
+    if request.method == "POST" and content_length and content_length.isdigit():
+        if request.url.path == "/parse/batch":
+            max_size = settings.MAX_BATCH_SIZE
+        else:
+            max_size = settings.MAX_FILE_SIZE + settings.MULTIPART_OVERHEAD
+        if int(content_length) > max_size:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": str(UploadTooLargeError(max_size))}
+            )
+    return await call_next(request)
+
+
 @app.post("/parse", response_model=ParseResponse)
 async def parse_pdf_async(
     file: UploadFile = File(...),
     user_id: str = "default",
-    file_id: Optional[str] = None
+    file_id: Optional[str] = None,
+    callback_url: Optional[str] = None,
+    stream: bool = False,
+    engine: Optional[str] = None
 ):
-    """Parse PDF file asynchronously"""
+    """
+    Parse PDF file asynchronously, optionally notifying callback_url once it finishes
+    
+    With stream=true the markdown can be read page by page from
+    /task/{task_id}/stream while the worker is still parsing. engine forces
+    an extraction engine (markitdown, pdfminer, pdfium) instead of the one
+    chosen from the document's traits; it can't be streamed. Returns 429
+    with Retry-After when the user is over their limits or the service is
+    backed up, and 422 for a PDF that fails pre-flight validation or was
+    quarantined for crashing the parser. The response carries the PDF's
+    pre-flight metadata.
+    """
     if file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
     
-    # Check file size
-    file_content = await file.read()
-    if len(file_content) > settings.MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=413, 
-            detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE // (1024*1024)}MB"
-        )
+    _check_engine(engine, stream)
+    
+    if callback_url:
+        try:
+            # Resolves the host, so off the event loop
+            await run_in_threadpool(validate_callback_url, callback_url)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    await _admit(admission.check_request, user_id)
+    
+    # Stream the upload into a spooled file, enforcing the size limit as we read
+    read_start = time.perf_counter()
+    try:
+        upload = await spool_upload(file)
+    except UploadTooLargeError as e:
+        metrics.UPLOAD_READ_SECONDS.labels(outcome="too_large").observe(time.perf_counter() - read_start)
+        raise HTTPException(status_code=413, detail=str(e))
+    metrics.UPLOAD_READ_SECONDS.labels(outcome="success").observe(time.perf_counter() - read_start)
+    
+    try:
+        await _admit(admission.check_bytes, user_id, upload.size)
+    except HTTPException:
+        metrics.UPLOAD_BYTES.labels(outcome="rejected").observe(upload.size)
+        upload.close()
+        raise
+    
+    if await run_in_threadpool(is_quarantined, upload.content_hash):
+        metrics.UPLOAD_BYTES.labels(outcome="quarantined").observe(upload.size)
+        upload.close()
+        raise HTTPException(status_code=422, detail=str(PDFQuarantinedError()))
+    
+    try:
+        metadata = await _preflight(upload.file)
+    except HTTPException:
+        metrics.UPLOAD_BYTES.labels(outcome="invalid").observe(upload.size)
+        upload.close()
+        raise
+    info = PDFInfo(**metadata.to_dict()) if metadata else None
     
+    outcome = "error"
     try:
+        # Serve identical PDFs from the result cache without enqueueing
+        cached_task_id = await run_in_threadpool(
+            complete_from_cache,
+            upload.content_hash,
+            user_id,
+            file_id,
+            callback_url,
+            engine,
+            metadata.page_count if metadata else None
+        )
+        if cached_task_id:
+            outcome = "cached"
+            return ParseResponse(
+                task_id=cached_task_id,
+                status=TaskStatus.SUCCESS,
+                message="PDF parsing result served from cache",
+                metadata=info
+            )
+        
         # Submit task to Celery
-        task = parse_pdf_task.delay(file_content, user_id, file_id)
+        with metrics.timed(metrics.ENQUEUE_SECONDS):
+            task = await run_in_threadpool(
+                submit_parse_task,
+                upload.file,
+                user_id,
+                file_id,
+                callback_url,
+                stream,
+                metadata,
+                upload.content_hash,
+                engine
+            )
+        outcome = "queued"
         
         return ParseResponse(
             task_id=task.id,
             status=TaskStatus.PENDING,
-            message="PDF parsing task submitted successfully"
+            message="PDF parsing task submitted successfully",
+            metadata=info
         )
         
     except Exception as e:
         logger.error(f"Failed to submit PDF parsing task: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to submit parsing task: {str(e)}")
+    finally:
+        metrics.UPLOAD_BYTES.labels(outcome=outcome).observe(upload.size)
+        upload.close()
 
 
-@app.get("/task/{task_id}", response_model=ParseResult)
-async def get_task_result(task_id: str):
-    """Get the result of a parsing task"""
+@app.post("/parse/sync", response_model=ParseResult)
+async def parse_pdf_sync(
+    file: UploadFile = File(...),
+    user_id: str = "default",
+    file_id: Optional[str] = None
+):
+    """
+    Parse PDF file synchronously (for smaller files or testing)
+    
+    Uploads go through the same admission, quarantine and pre-flight checks
+    as /parse. Returns 429 when the user is over their limits or the parser
+    pool is saturated, and 504 when parsing takes longer than
+    SYNC_PARSE_TIMEOUT.
+    """
+    if file.content_type != "application/pdf":
+        raise HTTPException(status_code=400, detail="Only PDF files are supported")
+    
+    await _admit(admission.check_request, user_id)
+    
+    try:
+        upload = await spool_upload(file)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    try:
+        await _admit(admission.check_bytes, user_id, upload.size)
+        if await run_in_threadpool(is_quarantined, upload.content_hash):
+            raise HTTPException(status_code=422, detail=str(PDFQuarantinedError()))
+        await _preflight(upload.file)
+        
+        # Parse immediately in the process pool
+        content = await sync_parser.parse(upload.read())
+        
+        return ParseResult(
+            task_id="sync",
+            status=TaskStatus.SUCCESS,
+            content=content,
+            user_id=user_id,
+            file_id=file_id,
+            error=None
+        )
+        
+    except HTTPException:
+        raise
+    
+    except SyncParserBusyError as e:
+        logger.warning(f"Rejecting sync parse: {str(e)}")
+        raise HTTPException(
+            status_code=429,
+            detail="Too many concurrent sync parses, retry later or use /parse",
+            headers={"Retry-After": "1"}
+        )
+    
+    except SyncParserUnavailableError as e:
+        logger.error(f"Sync parser unavailable: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    
+    except SyncParseTimeoutError as e:
+        logger.error(f"Sync parse timed out: {str(e)}")
+        raise HTTPException(status_code=504, detail=f"{str(e)}, use /parse for large files")
+    
+    except PDFParsingError as e:
+        logger.error(f"PDF parsing failed: {str(e)}")
+        return ParseResult(
+            task_id="sync",
+            status=TaskStatus.FAILED,
+            content=None,
+            user_id=user_id,
+            file_id=file_id,
+            error=str(e)
+        )
+        
+    except Exception as e:
+        logger.error(f"Unexpected error during PDF parsing: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Parsing failed: {str(e)}")
+    finally:
+        upload.close()
+
+
+@app.post(
+    "/parse/batch",
+    response_model=BatchResponse,
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": ["files"],
+                        "properties": {
+                            "files": {"type": "array", "items": {"type": "string", "format": "binary"}}
+                        }
+                    }
+                }
+            }
+        }
+    }
+)
+async def parse_pdf_batch(
+    request: Request,
+    user_id: str = "default",
+    callback_url: Optional[str] = None,
+    engine: Optional[str] = None
+):
+    """
+    Parse many PDF files in one request
+    
+    Every part named ``files`` is parsed; its filename is used as file_id,
+    so filenames must be present and unique. The form is parsed here rather
+    than through File() so the batch can exceed Starlette's default limit of
+    1000 files per request. A callback_url is notified once per file and
+    engine applies to every file. The request is admitted and its declared
+    Content-Length charged to the user's upload bandwidth before the body is
+    read; a request without Content-Length is refused with 411. A single
+    invalid or quarantined PDF rejects the batch with 422.
+    """
+    _check_engine(engine)
+    
+    if callback_url:
+        try:
+            await run_in_threadpool(validate_callback_url, callback_url)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    # reject_oversized_uploads has already refused bodies above MAX_BATCH_SIZE
+    content_length = request.headers.get("content-length")
+    if not content_length or not content_length.isdigit():
+        raise HTTPException(status_code=411, detail="Batch uploads require a Content-Length header")
+    await _admit(admission.check_request, user_id)
+    await _admit(admission.check_bytes, user_id, int(content_length))
+    
     try:
-        result = celery_app.AsyncResult(task_id)
+        form = await request.form(max_files=settings.MAX_BATCH_FILES, max_fields=settings.MAX_BATCH_FILES)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid multipart body: {str(e)}")
+    
+    uploads = []
+    try:
+        files = [part for part in form.getlist("files") if not isinstance(part, str)]
+        if not files:
+            raise HTTPException(status_code=400, detail="No files uploaded")
+        if any(part.content_type != "application/pdf" for part in files):
+            raise HTTPException(status_code=400, detail="Only PDF files are supported")
+        if any(not part.filename for part in files):
+            raise HTTPException(status_code=400, detail="Every file needs a filename")
+        duplicates = sorted(name for name, count in Counter(part.filename for part in files).items() if count > 1)
+        if duplicates:
+            raise HTTPException(status_code=400, detail=f"Duplicate filenames: {', '.join(duplicates)}")
+        
+        await _admit(admission.check_inflight, user_id, len(files))
+        for part in files:
+            try:
+                uploads.append((await spool_upload(part), part.filename))
+            except UploadTooLargeError as e:
+                raise HTTPException(status_code=413, detail=f"{part.filename}: {str(e)}")
+        metadata = []
+        for upload, file_id in uploads:
+            if await run_in_threadpool(is_quarantined, upload.content_hash):
+                raise HTTPException(status_code=422, detail=f"{file_id}: {str(PDFQuarantinedError())}")
+            try:
+                metadata.append(await _preflight(upload.file))
+            except HTTPException as e:
+                raise HTTPException(status_code=e.status_code, detail=f"{file_id}: {e.detail}")
         
-        if result.state == 'PENDING':
-            return ParseResult(
-                task_id=task_id,
-                status=TaskStatus.PENDING,
-                content=None,
-                user_id="",
-                file_id=None,
-                error=None
+        with metrics.timed(metrics.ENQUEUE_SECONDS):
+            batch = await run_in_threadpool(
+                submit_parse_batch,
+                [
+                    (upload.file, upload.content_hash, file_id, file_metadata)
+                    for (upload, file_id), file_metadata in zip(uploads, metadata)
+                ],
+                user_id,
+                callback_url,
+                engine
             )
-        elif result.state == 'SUCCESS':
-            task_result = result.result
-            return ParseResult(
-                task_id=task_id,
-                status=TaskStatus.SUCCESS,
-                content=task_result.get("content"),
-                user_id=task_result.get("user_id"),
-                file_id=task_result.get("file_id"),
-                error=task_result.get("error")
+        for upload, _ in uploads:
+            metrics.UPLOAD_BYTES.labels(outcome="batch").observe(upload.size)
+        
+        return BatchResponse(
+            batch_id=batch.id,
+            status=TaskStatus.PENDING,
+            task_ids=[result.id for result in batch.results],
+            message=f"{len(batch.results)} PDF parsing tasks submitted successfully"
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to submit PDF parsing batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to submit parsing batch: {str(e)}")
+    finally:
+        for upload, _ in uploads:
+            upload.close()
+        await form.close()
+
+
+@app.get("/batch/{batch_id}", response_model=BatchResult)
+async def get_batch_result(batch_id: str, request: Request, include_content: bool = True):
+    """Get aggregate progress and per-file results of a batch, with an ETag and compression like /task"""
+    try:
+        batch = await run_in_threadpool(GroupResult.restore, batch_id, app=celery_app)
+    except Exception as e:
+        logger.error(f"Failed to get batch {batch_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to get batch result: {str(e)}")
+    
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    try:
+        results = await _current_results([result.id for result in batch.results], include_content)
+    except Exception as e:
+        logger.error(f"Failed to get batch result for {batch_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to get batch result: {str(e)}")
+    
+    succeeded = sum(1 for r in results if r.status == TaskStatus.SUCCESS)
+    failed = sum(1 for r in results if r.status == TaskStatus.FAILED)
+    completed = succeeded + failed
+    
+    if completed == len(results):
+        status = TaskStatus.SUCCESS
+    elif completed or any(r.status == TaskStatus.PROCESSING for r in results):
+        status = TaskStatus.PROCESSING
+    else:
+        status = TaskStatus.PENDING
+    
+    batch_result = BatchResult(
+        batch_id=batch_id,
+        status=status,
+        total=len(results),
+        completed=completed,
+        succeeded=succeeded,
+        failed=failed,
+        results=results
+    )
+    return await _deliver(request, batch_result.model_dump_json().encode("utf-8"))
+
+
+def _check_similarity_enabled() -> None:
+    if not settings.SIMILARITY_INDEX_ENABLED:
+        raise HTTPException(status_code=404, detail="Near-duplicate detection is not enabled")
+
+
+def _similar_documents(
+    user_id: str, file_id: str, threshold: float, matches: List[Tuple[str, float]]
+) -> SimilarDocuments:
+    return SimilarDocuments(
+        user_id=user_id,
+        file_id=file_id,
+        threshold=threshold,
+        similar=[SimilarDocument(file_id=other, similarity=similarity) for other, similarity in matches]
+    )
+
+
+@app.get("/batch/{batch_id}/similar", response_model=BatchSimilarity)
+async def get_batch_similarity(batch_id: str, threshold: Optional[float] = Query(None, ge=0, le=1)):
+    """
+    Likely near-duplicates of a batch's documents among all documents of
+    their user_id, from the MinHash/LSH index
+    
+    Only documents with at least one near-duplicate are listed; indexed
+    counts the batch's documents that have a signature.
+    """
+    _check_similarity_enabled()
+    threshold = settings.SIMILARITY_THRESHOLD if threshold is None else threshold
+    try:
+        batch = await run_in_threadpool(GroupResult.restore, batch_id, app=celery_app)
+    except Exception as e:
+        logger.error(f"Failed to get batch {batch_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to get batch result: {str(e)}")
+    
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    try:
+        results = await _current_results([result.id for result in batch.results], include_content=False)
+        file_ids: Dict[str, List[str]] = {}
+        for result in results:
+            if result.status == TaskStatus.SUCCESS and result.file_id:
+                file_ids.setdefault(result.user_id, []).append(result.file_id)
+        documents = []
+        indexed = 0
+        for user_id, user_file_ids in file_ids.items():
+            matches = await run_in_threadpool(similarity_index.similar_many, user_id, user_file_ids, threshold)
+            indexed += len(matches)
+            documents.extend(
+                _similar_documents(user_id, file_id, threshold, similar)
+                for file_id, similar in matches.items() if similar
+            )
+    except Exception as e:
+        logger.error(f"Failed to find near-duplicates in batch {batch_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to find near-duplicates: {str(e)}")
+    
+    return BatchSimilarity(batch_id=batch_id, threshold=threshold, indexed=indexed, documents=documents)
+
+
+@app.get("/task/{task_id}", response_model=ParseResult)
+async def get_task_result(task_id: str, request: Request, pages: Optional[str] = None):
+    """
+    Get the result of a parsing task
+    
+    pages=N or pages=N-M (1-based, inclusive) returns only those pages'
+    markdown, cut at the page offsets the worker recorded; 422 if the
+    result has no page index. A ``Range: bytes=start-end`` header on a
+    finished task returns that slice of the markdown (of the selected
+    pages, if given) as text/markdown with 206. Responses carry an ETag and
+    answer If-None-Match with 304; large ones are compressed.
+    """
+    page_range = None
+    if pages is not None:
+        try:
+            page_range = parse_pages(pages)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        result = (await _current_results([task_id]))[0]
+        
+    except Exception as e:
+        logger.error(f"Failed to get task result for {task_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to get task result: {str(e)}")
+    
+    if result.status != TaskStatus.SUCCESS or result.content is None:
+        return await _deliver(request, result.model_dump_json().encode("utf-8"))
+    
+    data = result.content.encode("utf-8")
+    if page_range:
+        if result.page_offsets is None:
+            raise HTTPException(
+                status_code=422,
+                detail="Result has no page index: its markdown has no page breaks (e.g. pages rendered as tables)"
             )
-        elif result.state == 'FAILURE':
-            return ParseResult(
-                task_id=task_id,
-                status=TaskStatus.FAILED,
-                content=None,
-                user_id="",
-                file_id=None,
-                error=str(result.info)
+        try:
+            start, end = page_slice(result.page_offsets, *page_range)
+        except RangeNotSatisfiableError as e:
+            raise HTTPException(status_code=416, detail=str(e))
+        data = data[start:end]
+        result = result.model_copy(update={"content": data.decode("utf-8"), "pages": pages.strip()})
+    
+    range_header = request.headers.get("range")
+    if range_header:
+        try:
+            byte_range = parse_byte_range(range_header, len(data))
+        except RangeNotSatisfiableError as e:
+            raise HTTPException(
+                status_code=416, detail=str(e), headers={"Content-Range": f"bytes */{len(data)}"}
             )
-        else:
-            return ParseResult(
-                task_id=task_id,
-                status=TaskStatus.PROCESSING,
-                content=None,
-                user_id="",
-                file_id=None,
-                error=None
+        if byte_range:
+            start, end = byte_range
+            return await _deliver(
+                request,
+                data[start:end],
+                media_type="text/markdown; charset=utf-8",
+                status_code=206,
+                headers={
+                    "Content-Range": f"bytes {start}-{end - 1}/{len(data)}",
+                    "Accept-Ranges": "bytes",
+                    # Identifies the whole markdown the range was cut from
+                    "ETag": etag(data),
+                }
             )
+    
+    return await _deliver(request, result.model_dump_json().encode("utf-8"), headers={"Accept-Ranges": "bytes"})
+
+
+@app.post("/tasks/status", response_model=TaskStatusResponse)
+async def get_task_statuses(request: TaskStatusRequest):
+    """
+    Get the status of many tasks in one round trip to Redis
+    
+    Results are returned in the order of task_ids. Content is only included
+    with include_content=true.
+    """
+    if len(request.task_ids) > settings.MAX_BATCH_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {settings.MAX_BATCH_FILES} task ids per request")
+    
+    try:
+        return TaskStatusResponse(results=await _current_results(request.task_ids, request.include_content))
+    except Exception as e:
+        logger.error(f"Failed to get task statuses: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to get task statuses: {str(e)}")
+
+
+async def _current_results(task_ids: List[str], include_content: bool = True) -> List[ParseResult]:
+    return await read_task_results(celery_app, task_ids, include_content)
+
+
+def _async_redis() -> redis.asyncio.Redis:
+    """Per-connection client for long-lived streaming responses"""
+    # Blocking reads wait up to EVENTS_KEEPALIVE; the socket timeout has to outlast them
+    return redis.asyncio.Redis.from_url(settings.REDIS_URL, socket_timeout=settings.EVENTS_KEEPALIVE + 5)
+
+
+async def _markdown_stream(task_id: str) -> AsyncIterator[str]:
+    """
+    Yield a task's markdown chunks as the worker appends them
+    
+    Tasks that weren't submitted with stream=true (or were served from the
+    cache, or whose stream expired) have no stream; their full result is sent
+    in one piece once they finish.
+    """
+    client = _async_redis()
+    key = stream_key(task_id)
+    last_id = "0-0"
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.EVENTS_MAX_DURATION
+    
+    try:
+        while loop.time() < deadline:
+            if last_id == "0-0" and not await client.exists(key):
+                result = (await _current_results([task_id]))[0]
+                if result.status in TERMINAL_STATUSES:
+                    if result.content:
+                        yield result.content
+                    return
+            
+            response = await client.xread({key: last_id}, count=100, block=settings.EVENTS_KEEPALIVE * 1000)
+            if not response:
+                continue
+            
+            for entry_id, fields in response[0][1]:
+                last_id = entry_id
+                if b"done" in fields:
+                    return
+                yield fields[b"content"].decode("utf-8")
+    finally:
+        await client.aclose()
+
+
+@app.get("/task/{task_id}/stream")
+async def stream_task_markdown(task_id: str):
+    """
+    Stream a task's markdown with chunked transfer encoding
+    
+    Chunks are sent as pages are parsed; the response ends when the task
+    finishes. Check /task/{task_id} for the final status.
+    """
+    return StreamingResponse(
+        _markdown_stream(task_id),
+        media_type="text/markdown; charset=utf-8",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _format_event(result: ParseResult, include_content: bool) -> str:
+    payload = result.model_dump(mode="json")
+    if not include_content:
+        payload["content"] = None
+    return f"event: status\ndata: {json.dumps(payload)}\n\n"
+
+
+async def _task_event_stream(request: Request, task_ids: List[str], include_content: bool) -> AsyncIterator[str]:
+    """
+    Yield server-sent events until every task reaches a final status
+    
+    Events come from the worker over Redis pub/sub. Task states are also
+    re-read on every keep-alive tick, which covers tasks that finished before
+    we subscribed and any event lost in transit.
+    """
+    client = _async_redis()
+    pubsub = client.pubsub()
+    pending = set(task_ids)
+    last_sent: Dict[str, TaskStatus] = {}
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.EVENTS_MAX_DURATION
+    
+    def emit(result: ParseResult) -> Optional[str]:
+        if last_sent.get(result.task_id) == result.status:
+            return None
+        last_sent[result.task_id] = result.status
+        if result.status in TERMINAL_STATUSES:
+            pending.discard(result.task_id)
+        return _format_event(result, include_content)
+    
+    try:
+        await pubsub.subscribe(*[event_channel(task_id) for task_id in task_ids])
+        next_check = loop.time()
+        
+        while pending and loop.time() < deadline:
+            if loop.time() >= next_check:
+                for result in await _current_results(sorted(pending), include_content):
+                    event = emit(result)
+                    if event:
+                        yield event
+                next_check = loop.time() + settings.EVENTS_KEEPALIVE
+                if not pending:
+                    break
+            
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=settings.EVENTS_KEEPALIVE)
+            if message is None:
+                yield ": keep-alive\n\n"
+            else:
+                data = json.loads(message["data"])
+                task_id = data["task_id"]
+                if task_id in pending:
+                    if TaskStatus(data["status"]) in TERMINAL_STATUSES:
+                        result = (await _current_results([task_id], include_content))[0]
+                    else:
+                        result = to_parse_result(task_id, "STARTED", None)
+                    event = emit(result)
+                    if event:
+                        yield event
             
+            if await request.is_disconnected():
+                break
+    finally:
+        await pubsub.aclose()
+        await client.aclose()
+
+
+@app.get("/events")
+async def stream_task_events(
+    request: Request,
+    task_ids: List[str] = Query(...),
+    include_content: bool = False
+):
+    """
+    Stream status changes of one or more tasks as server-sent events
+    
+    Each event is a ParseResult; the stream ends once every task has
+    succeeded or failed. Content is only included with include_content=true.
+    """
+    if len(task_ids) > settings.MAX_BATCH_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {settings.MAX_BATCH_FILES} task ids per stream")
+    
+    return StreamingResponse(
+        _task_event_stream(request, task_ids, include_content),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/users/{user_id}/documents", response_model=DocumentList)
+async def list_documents(user_id: str, offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000)):
+    """
+    List a user's documents from the document index, most recently updated first
+    
+    Only uploads submitted with a file_id are indexed. The Celery result
+    backend isn't read; fetch content through /task/{task_id}.
+    """
+    try:
+        total, entries = await run_in_threadpool(document_index.list, user_id, offset, limit)
     except Exception as e:
-        logger.error(f"Failed to get task result for {task_id}: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to get task result: {str(e)}")
+        logger.error(f"Failed to list documents of {user_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to list documents: {str(e)}")
+    
+    return DocumentList(
+        user_id=user_id,
+        total=total,
+        offset=offset,
+        documents=[DocumentRecord.from_entry(entry) for entry in entries]
+    )
+
+
+@app.get("/users/{user_id}/documents/{file_id}/similar", response_model=SimilarDocuments)
+async def get_similar_documents(user_id: str, file_id: str, threshold: Optional[float] = Query(None, ge=0, le=1)):
+    """
+    Likely near-duplicates of a document among its user's documents, most
+    similar first
+    
+    Similarity is the Jaccard similarity of the documents' word shingles as
+    estimated from their MinHash signatures. Candidates come from the LSH
+    buckets the document falls in, not from a comparison with every document.
+    """
+    _check_similarity_enabled()
+    threshold = settings.SIMILARITY_THRESHOLD if threshold is None else threshold
+    try:
+        matches = await run_in_threadpool(similarity_index.similar, user_id, file_id, threshold)
+    except Exception as e:
+        logger.error(f"Failed to find near-duplicates of {user_id}/{file_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to find near-duplicates: {str(e)}")
+    
+    if matches is None:
+        raise HTTPException(status_code=404, detail="Document has no similarity signature")
+    return _similar_documents(user_id, file_id, threshold, matches)
+
+
+@app.get("/search", response_model=SearchResults)
+async def search_documents(
+    q: str = Query(..., min_length=1, max_length=1000),
+    user_id: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """
+    Search the markdown of parsed documents, best match first
+    
+    Every term and "quoted phrase" of q must occur. Hits carry a snippet
+    with the matches wrapped in <mark>, the user_id and file_id of the
+    document and the task_id of the indexed parse. That task's result holds
+    the full markdown only for RESULT_TTL, so a hit can point to an expired
+    result. Only uploads submitted with a file_id are indexed, and only
+    while SEARCH_INDEX_ENABLED is set.
+    """
+    if not settings.SEARCH_INDEX_ENABLED:
+        raise HTTPException(status_code=404, detail="Search is not enabled")
+    
+    start = time.perf_counter()
+    try:
+        total, hits = await run_in_threadpool(search_index.search, q, user_id, offset, limit)
+    except InvalidSearchQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to search documents: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to search documents: {str(e)}")
+    metrics.SEARCH_QUERY_SECONDS.observe(time.perf_counter() - start)
+    
+    return SearchResults(
+        query=q,
+        user_id=user_id,
+        total=total,
+        offset=offset,
+        hits=[SearchHit.from_hit(hit) for hit in hits]
+    )
+
+
+def _worker_queues() -> List[str]:
+    """Names of all queues the workers consume"""
+    return [queue.name for queue in celery_app.conf.task_queues]
+
+
+@app.get("/backlog")
+async def backlog(queue: Optional[str] = None):
+    """
+    Queued tasks, oldest task age and estimated drain time
+    
+    Meant as the scaling signal for the workers (e.g. KEDA's metrics-api
+    scaler); pass queue to scale a dedicated worker pool on its own queue.
+    The totals are exported as gauges on /metrics.
+    """
+    queues = [queue] if queue else _worker_queues()
+    try:
+        return await run_in_threadpool(get_backlog, queues)
+    except Exception as e:
+        logger.error(f"Failed to read backlog: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to read backlog: {str(e)}")
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus metrics of this API process, with the current backlog"""
+    try:
+        metrics.observe_backlog(await run_in_threadpool(get_backlog, _worker_queues()))
+    except Exception as e:
+        logger.warning(f"Failed to refresh backlog metrics: {str(e)}")
+    return Response(metrics.render_metrics(), media_type=metrics.CONTENT_TYPE_LATEST)
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Result cache hit/miss counters and occupancy"""
+    try:
+        return await run_in_threadpool(result_cache.stats)
+    except Exception as e:
+        logger.error(f"Failed to read cache stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to read cache stats: {str(e)}")
 
 
 @app.get("/health")
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
 from enum import Enum
 
 
@@ -15,10 +16,19 @@ class ParseRequest(BaseModel):
     file_id: Optional[str] = None
 
 
+class PDFInfo(BaseModel):
+    size: int
+    page_count: int
+    pdf_version: str
+    encrypted: bool
+    has_text_layer: bool
+
+
 class ParseResponse(BaseModel):
     task_id: str
     status: TaskStatus
     message: str
+    metadata: Optional[PDFInfo] = None
 
 
 class ParseResult(BaseModel):
@@ -27,4 +37,114 @@ class ParseResult(BaseModel):
     content: Optional[str] = None
     user_id: str
     file_id: Optional[str] = None
-    error: Optional[str] = None 
\ No newline at end of file
+    error: Optional[str] = None
+    page_offsets: Optional[List[int]] = None
+    pages: Optional[str] = None
+
+
+class BatchResponse(BaseModel):
+    batch_id: str
+    status: TaskStatus
+    task_ids: List[str]
+    message: str
+
+
+class BatchResult(BaseModel):
+    batch_id: str
+    status: TaskStatus
+    total: int
+    completed: int
+    succeeded: int
+    failed: int
+    results: List[ParseResult]
+
+
+class TaskStatusRequest(BaseModel):
+    task_ids: List[str]
+    include_content: bool = False
+
+
+class TaskStatusResponse(BaseModel):
+    results: List[ParseResult]
+
+
+class DocumentRecord(BaseModel):
+    file_id: str
+    content_hash: str
+    parser_version: str
+    engine: str
+    task_id: str
+    status: TaskStatus
+    result_stored: bool
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    parsed_at: Optional[datetime] = None
+
+    @classmethod
+    def from_entry(cls, entry: Dict[str, Any]) -> "DocumentRecord":
+        """Build from a document index entry (timestamps in epoch seconds)"""
+        def timestamp(value):
+            return datetime.fromtimestamp(value, tz=timezone.utc) if value is not None else None
+
+        return cls(
+            file_id=entry["file_id"],
+            content_hash=entry["content_hash"],
+            parser_version=entry["parser_version"],
+            engine=entry.get("engine", "auto"),
+            task_id=entry["task_id"],
+            status=TaskStatus(entry["status"]),
+            result_stored=bool(entry["result_key"]),
+            error=entry["error"],
+            created_at=timestamp(entry["created_at"]),
+            updated_at=timestamp(entry["updated_at"]),
+            parsed_at=timestamp(entry["parsed_at"]),
+        )
+
+
+class DocumentList(BaseModel):
+    user_id: str
+    total: int
+    offset: int
+    documents: List[DocumentRecord]
+
+
+class SearchHit(BaseModel):
+    user_id: str
+    file_id: str
+    task_id: str
+    score: float
+    snippet: str
+    indexed_at: datetime
+
+    @classmethod
+    def from_hit(cls, hit: Dict[str, Any]) -> "SearchHit":
+        """Build from a search index hit (indexed_at in epoch seconds)"""
+        return cls(**dict(hit, indexed_at=datetime.fromtimestamp(hit["indexed_at"], tz=timezone.utc)))
+
+
+class SearchResults(BaseModel):
+    query: str
+    user_id: Optional[str] = None
+    total: int
+    offset: int
+    hits: List[SearchHit]
+
+
+class SimilarDocument(BaseModel):
+    file_id: str
+    similarity: float
+
+
+class SimilarDocuments(BaseModel):
+    user_id: str
+    file_id: str
+    threshold: float
+    similar: List[SimilarDocument]
+
+
+class BatchSimilarity(BaseModel):
+    batch_id: str
+    threshold: float
+    indexed: int
+    documents: List[SimilarDocuments]
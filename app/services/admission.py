@@ -0,0 +1,163 @@
+"""
+Admission control for uploads: per-user rate limits and global backpressure
+
+Each user gets two Redis token buckets, one for requests and one for upload
+bytes, so a runaway client script is slowed down before its uploads reach
+the blob store or the broker. A user's in-flight jobs are capped as well,
+and every upload is refused while the parse queues are deeper than
+BACKPRESSURE_QUEUE_DEPTH. Rejections carry the number of seconds after which
+a retry can succeed, for the Retry-After header.
+"""
+from typing import Iterable
+import math
+import time
+
+from app.config import settings
+from app.services.backlog import queue_keys
+from app.services.redis_client import get_redis
+from app.services.scheduling import inflight
+
+REQUEST_BUCKET_PREFIX = "pdfratelimit:requests:"
+BYTES_BUCKET_PREFIX = "pdfratelimit:bytes:"
+
+# Refill the bucket for the time since its last use, then take ``cost``
+# tokens if there are enough. Returns the seconds to wait as a string (Lua
+# numbers would be truncated to integers), "0" when the tokens were taken.
+# A cost above the burst size passes on a full bucket but is charged in
+# full: the balance goes negative and later requests wait until it is paid
+# back, so oversized requests don't get the excess for free.
+_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local needed = math.min(cost, burst)
+local wait = 0
+if tokens >= needed then
+    tokens = tokens - cost
+else
+    wait = (needed - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil((burst - tokens) / rate) + 1)
+return tostring(wait)
+"""
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when an upload is refused; retry_after is in whole seconds"""
+
+    def __init__(self, message: str, retry_after: float):
+        self.retry_after = max(int(math.ceil(retry_after)), 1)
+        super().__init__(message)
+
+
+class TokenBucket:
+    """
+    Redis token bucket per key, shared by all API processes
+
+    Args:
+        prefix: Redis key prefix of the buckets
+        rate: Tokens added per second
+        burst: Bucket capacity
+    """
+
+    def __init__(self, prefix: str, rate: float, burst: float):
+        self.prefix = prefix
+        self.rate = rate
+        self.burst = burst
+        self._script = get_redis().register_script(_TOKEN_BUCKET)
+
+    def take(self, key: str, cost: float = 1) -> float:
+        """
+        Take ``cost`` tokens from the bucket of ``key``
+
+        Returns:
+            0 if the tokens were taken, otherwise the seconds until they are available
+        """
+        wait = self._script(keys=[f"{self.prefix}{key}"], args=[self.rate, self.burst, cost, time.time()])
+        return float(wait)
+
+
+def queue_depth(queues: Iterable[str]) -> int:
+    """Messages waiting in the given Celery queues, over all priorities"""
+    pipe = get_redis().pipeline(transaction=False)
+    for queue in queues:
+        for key in queue_keys(queue):
+            pipe.llen(key)
+    return sum(pipe.execute())
+
+
+class AdmissionController:
+    """
+    Decides whether an upload may be accepted
+
+    check_request() runs before the upload is read; check_bytes() once its
+    size is known, or up front from the declared Content-Length.
+    """
+
+    def __init__(self):
+        self.requests = TokenBucket(
+            REQUEST_BUCKET_PREFIX, settings.RATE_LIMIT_REQUESTS_PER_SECOND, settings.RATE_LIMIT_REQUESTS_BURST
+        )
+        self.bytes = TokenBucket(
+            BYTES_BUCKET_PREFIX, settings.RATE_LIMIT_BYTES_PER_SECOND, settings.RATE_LIMIT_BYTES_BURST
+        )
+
+    def check_request(self, user_id: str, files: int = 1) -> None:
+        """
+        Admit a request submitting ``files`` uploads
+
+        Raises:
+            AdmissionRejectedError: If the queues are backed up, the user is
+                over their request rate or would exceed their in-flight cap
+        """
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+
+        depth = queue_depth([settings.SMALL_QUEUE, settings.LARGE_QUEUE])
+        if depth >= settings.BACKPRESSURE_QUEUE_DEPTH:
+            raise AdmissionRejectedError(
+                f"Service is busy ({depth} tasks queued), retry later", settings.BACKPRESSURE_RETRY_AFTER
+            )
+
+        wait = self.requests.take(user_id)
+        if wait:
+            raise AdmissionRejectedError(f"Request rate limit exceeded for user {user_id}", wait)
+
+        self.check_inflight(user_id, files)
+
+    def check_inflight(self, user_id: str, files: int) -> None:
+        """
+        Admit ``files`` more uploads of the user, for batches whose number of
+        files is only known once their body is read
+
+        Raises:
+            AdmissionRejectedError: If the user would exceed their in-flight cap
+        """
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+
+        if inflight(user_id) + files > settings.MAX_INFLIGHT_PER_USER:
+            raise AdmissionRejectedError(
+                f"Too many unfinished tasks for user {user_id} (limit {settings.MAX_INFLIGHT_PER_USER})",
+                settings.BACKPRESSURE_RETRY_AFTER
+            )
+
+    def check_bytes(self, user_id: str, size: int) -> None:
+        """
+        Charge ``size`` uploaded bytes to the user
+
+        Raises:
+            AdmissionRejectedError: If the user is over their upload bandwidth
+        """
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+
+        wait = self.bytes.take(user_id, size)
+        if wait:
+            raise AdmissionRejectedError(f"Upload rate limit exceeded for user {user_id}", wait)
@@ -0,0 +1,156 @@
+"""
+Queue backlog signal for autoscaling
+
+Reports how much work is waiting in the broker: the number of queued tasks,
+the age of the oldest one and an estimate of how long the current workers
+need to drain the queue. The estimate uses the durations of recently
+finished tasks (kept per queue in capped Redis lists by the workers) and the
+pool slots of live workers consuming the queue (each worker refreshes a
+heartbeat key holding its concurrency and queues).
+
+The API serves the signal on /backlog for KEDA's metrics-api scaler and as
+gauges on /metrics for an HPA behind the Prometheus adapter.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+import json
+import logging
+import threading
+import time
+
+from kombu.transport.redis import Channel
+
+from app.config import settings
+from app.services.redis_client import get_redis
+from app.services.scheduling import PRIORITY_STEPS
+
+logger = logging.getLogger(__name__)
+
+DURATIONS_KEY_PREFIX = "pdfbacklog:durations:"
+WORKER_KEY_PREFIX = "pdfbacklog:worker:"
+
+
+def queue_keys(queue: str) -> List[str]:
+    """Redis lists backing a Celery queue, one per priority step"""
+    return [queue if step == 0 else f"{queue}{Channel.sep}{step}" for step in PRIORITY_STEPS]
+
+
+def record_task_duration(seconds: float, queue: str) -> None:
+    """Remember how long a task from ``queue`` ran, for the drain time estimate"""
+    key = f"{DURATIONS_KEY_PREFIX}{queue}"
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.lpush(key, round(seconds, 3))
+    pipe.ltrim(key, 0, settings.BACKLOG_DURATION_SAMPLES - 1)
+    pipe.execute()
+
+
+def register_worker(hostname: str, concurrency: int, queues: List[str]) -> None:
+    """Announce a live worker, its pool size and queues; expires unless refreshed"""
+    get_redis().set(
+        f"{WORKER_KEY_PREFIX}{hostname}",
+        json.dumps({"concurrency": concurrency, "queues": queues}),
+        ex=settings.BACKLOG_WORKER_TTL
+    )
+
+
+def unregister_worker(hostname: str) -> None:
+    """Remove a worker that is shutting down"""
+    get_redis().delete(f"{WORKER_KEY_PREFIX}{hostname}")
+
+
+def start_worker_heartbeat(hostname: str, concurrency: int, queues: List[str]) -> threading.Event:
+    """
+    Refresh the worker's registration in a daemon thread
+
+    Returns:
+        An event that stops the heartbeat when set
+    """
+    stopped = threading.Event()
+    interval = max(settings.BACKLOG_WORKER_TTL / 3, 1)
+
+    def beat():
+        while not stopped.is_set():
+            try:
+                register_worker(hostname, concurrency, queues)
+            except Exception as e:
+                logger.warning(f"Failed to refresh worker heartbeat: {str(e)}")
+            stopped.wait(interval)
+
+    threading.Thread(target=beat, name="backlog-heartbeat", daemon=True).start()
+    return stopped
+
+
+def _enqueued_at(message: Optional[bytes]) -> Optional[float]:
+    """Publish time stamped into a raw broker message, if any"""
+    if not message:
+        return None
+    try:
+        return float(json.loads(message)["headers"]["enqueued_at"])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def _live_slots(client, queues: List[str]) -> Dict[str, int]:
+    """Pool size of each live worker consuming any of ``queues``"""
+    keys = list(client.scan_iter(match=f"{WORKER_KEY_PREFIX}*", count=100))
+    slots = {}
+    for key, value in zip(keys, client.mget(keys) if keys else []):
+        if value is None:
+            continue
+        worker = json.loads(value)
+        if set(worker["queues"]) & set(queues):
+            slots[key.decode()[len(WORKER_KEY_PREFIX):]] = worker["concurrency"]
+    return slots
+
+
+def get_backlog(queues: Iterable[str] = ("celery",)) -> Dict[str, Any]:
+    """
+    Snapshot of the broker backlog
+
+    Kombu pushes new messages on the left of each list and workers pop from
+    the right, so the oldest waiting message is at index -1.
+
+    Args:
+        queues: Celery queue names to include
+
+    Returns:
+        Dict with queued, oldest_age_seconds, avg_task_seconds, workers, slots
+        and drain_seconds (None when it cannot be estimated)
+    """
+    client = get_redis()
+    queues = list(queues)
+    keys = [key for queue in queues for key in queue_keys(queue)]
+
+    pipe = client.pipeline(transaction=False)
+    for key in keys:
+        pipe.llen(key)
+        pipe.lindex(key, -1)
+    for queue in queues:
+        pipe.lrange(f"{DURATIONS_KEY_PREFIX}{queue}", 0, -1)
+    replies = pipe.execute()
+
+    lengths = replies[0:2 * len(keys):2]
+    oldest = [_enqueued_at(message) for message in replies[1:2 * len(keys):2]]
+    durations = [float(d) for samples in replies[2 * len(keys):] for d in samples]
+    slots = _live_slots(client, queues)
+
+    now = time.time()
+    queued = sum(lengths)
+    stamps = [stamp for stamp in oldest if stamp is not None]
+    avg_task_seconds = sum(durations) / len(durations) if durations else None
+    total_slots = sum(slots.values())
+
+    if queued == 0:
+        drain_seconds = 0.0
+    elif avg_task_seconds is not None and total_slots:
+        drain_seconds = queued * avg_task_seconds / total_slots
+    else:
+        drain_seconds = None
+
+    return {
+        "queued": queued,
+        "oldest_age_seconds": round(max(now - min(stamps), 0.0), 3) if stamps else 0.0,
+        "avg_task_seconds": round(avg_task_seconds, 3) if avg_task_seconds is not None else None,
+        "workers": len(slots),
+        "slots": total_slots,
+        "drain_seconds": round(drain_seconds, 3) if drain_seconds is not None else None,
+    }
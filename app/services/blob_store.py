@@ -0,0 +1,185 @@
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Optional
+from pathlib import Path
+import io
+import logging
+import os
+import shutil
+import time
+import uuid
+
+import redis
+
+from app.config import settings
+from app.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class BlobNotFoundError(Exception):
+    """Raised when a blob reference no longer resolves (expired or deleted)"""
+    pass
+
+
+class BlobStore(ABC):
+    """
+    Shared store for uploaded PDFs so only a small reference travels through
+    the Celery broker. Implementations must be reachable from both the API and
+    the workers.
+    """
+
+    def put(self, data: bytes) -> str:
+        """Store data and return its reference"""
+        return self.put_stream(io.BytesIO(data))
+
+    @abstractmethod
+    def put_stream(self, stream: BinaryIO) -> str:
+        """Store a file-like object chunk by chunk and return its reference"""
+
+    @abstractmethod
+    def get(self, blob_key: str) -> bytes:
+        """Return the data stored under a reference"""
+
+    @abstractmethod
+    def delete(self, blob_key: str) -> None:
+        """Remove a blob; deleting a missing blob is not an error"""
+
+    @staticmethod
+    def new_key() -> str:
+        return uuid.uuid4().hex
+
+
+class RedisBlobStore(BlobStore):
+    """Blob store keeping uploads in Redis keys with their own TTL"""
+
+    def __init__(
+        self,
+        client: Optional[redis.Redis] = None,
+        prefix: str = "pdfblob",
+        ttl: int = settings.BLOB_TTL,
+    ):
+        self._client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    @property
+    def client(self) -> redis.Redis:
+        if self._client is None:
+            self._client = get_redis()
+        return self._client
+
+    def _key(self, blob_key: str) -> str:
+        return f"{self.prefix}:{blob_key}"
+
+    def put(self, data: bytes) -> str:
+        blob_key = self.new_key()
+        self.client.set(self._key(blob_key), data, ex=self.ttl)
+        return blob_key
+
+    def put_stream(self, stream: BinaryIO) -> str:
+        blob_key = self.new_key()
+        # Build the value under a temporary key so readers never see partial blobs
+        tmp_key = self._key(f"{blob_key}:partial")
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(tmp_key, b"", ex=self.ttl)
+        while True:
+            chunk = stream.read(settings.UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            pipe.append(tmp_key, chunk)
+            # Flush per chunk so the pipeline never buffers the whole file
+            pipe.execute()
+        pipe.rename(tmp_key, self._key(blob_key))
+        pipe.execute()
+        return blob_key
+
+    def get(self, blob_key: str) -> bytes:
+        data = self.client.get(self._key(blob_key))
+        if data is None:
+            raise BlobNotFoundError(f"Blob not found: {blob_key}")
+        return data
+
+    def delete(self, blob_key: str) -> None:
+        self.client.delete(self._key(blob_key))
+
+
+class FilesystemBlobStore(BlobStore):
+    """
+    Blob store writing uploads to a directory, typically a volume shared by
+    the API and worker pods. Blobs older than the TTL are purged
+    opportunistically on writes.
+    """
+
+    PURGE_INTERVAL = 60  # seconds between stale blob sweeps per process
+
+    def __init__(
+        self,
+        root: str = settings.BLOB_STORE_PATH,
+        ttl: int = settings.BLOB_TTL,
+        suffix: str = ".pdf",
+    ):
+        self.root = Path(root)
+        self.ttl = ttl
+        self.suffix = suffix
+        self._last_purge = 0.0
+
+    def _path(self, blob_key: str) -> Path:
+        # Keys are generated by us; reject anything that could escape the root
+        if not blob_key.isalnum():
+            raise BlobNotFoundError(f"Invalid blob reference: {blob_key}")
+        return self.root / f"{blob_key}{self.suffix}"
+
+    def put_stream(self, stream: BinaryIO) -> str:
+        self.root.mkdir(parents=True, exist_ok=True)
+        blob_key = self.new_key()
+        path = self._path(blob_key)
+
+        # Write to a temporary name first so readers never see partial blobs
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            shutil.copyfileobj(stream, f, settings.UPLOAD_CHUNK_SIZE)
+        os.replace(tmp_path, path)
+
+        self.purge_expired()
+        return blob_key
+
+    def get(self, blob_key: str) -> bytes:
+        try:
+            with open(self._path(blob_key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise BlobNotFoundError(f"Blob not found: {blob_key}")
+
+    def delete(self, blob_key: str) -> None:
+        try:
+            self._path(blob_key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def purge_expired(self, force: bool = False) -> int:
+        """Delete blobs older than the TTL, returning how many were removed"""
+        now = time.time()
+        if not force and now - self._last_purge < self.PURGE_INTERVAL:
+            return 0
+        self._last_purge = now
+
+        removed = 0
+        for path in self.root.iterdir():
+            try:
+                if now - path.stat().st_mtime > self.ttl:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        if removed:
+            logger.info(f"Purged {removed} expired blobs from {self.root}")
+        return removed
+
+
+def create_blob_store(backend: str = settings.BLOB_STORE) -> BlobStore:
+    """Create the blob store configured by ``BLOB_STORE``"""
+    if backend == "redis":
+        return RedisBlobStore()
+    if backend == "filesystem":
+        return FilesystemBlobStore()
+    raise ValueError(f"Unknown blob store backend: {backend}")
@@ -0,0 +1,105 @@
+"""
+Page-range checkpoints that let an interrupted parse resume
+
+Documents of more than CHECKPOINT_PAGES pages are converted range by range;
+every finished range is saved (zlib-compressed JSON) in a Redis hash keyed by
+engine and content hash. The next parse of the same content, whether a
+redelivered or retried task, a resubmission or another upload, loads the
+saved ranges and parses only the rest. The hash is deleted once the markdown
+is assembled and otherwise expires after CHECKPOINT_TTL.
+
+Only some interruptions are parsed again on their own. With task_acks_late
+the broker redelivers a task whose whole worker died before acknowledging
+it (pod eviction, node loss). A task killed at the hard time limit or with
+its pool process (WorkerLostError, e.g. the OOM killer) is failed and
+acknowledged instead, since task_reject_on_worker_lost is off so a PDF that
+kills workers can't do so in a loop; its checkpoints help when it is
+submitted again. Max-tasks-per-child recycling waits for the running task.
+"""
+from typing import Any, Dict, List, Optional
+import json
+import logging
+import zlib
+
+from app.config import settings
+from app.services import metrics
+from app.services.pdf_pages import PageRange, plan_page_ranges
+from app.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_KEY_PREFIX = "pdfcheckpoint:"
+
+
+class PageCheckpoints:
+    """Saved page ranges of one document's conversion"""
+
+    def __init__(self, content_hash: str, page_count: int, chunk_pages: Optional[int] = None):
+        self.content_hash = content_hash
+        self.page_count = page_count
+        self.chunk_pages = chunk_pages or settings.CHECKPOINT_PAGES
+        self.saved = 0  # ranges saved by this instance, for crash_guard's progress
+
+    def key(self, engine_name: str) -> str:
+        return f"{CHECKPOINT_KEY_PREFIX}{engine_name}:{self.content_hash}"
+
+    @staticmethod
+    def _field(start: int, end: int) -> str:
+        return f"{start}-{end}"
+
+    def load(self, engine_name: str) -> Dict[PageRange, Dict[str, Any]]:
+        """Saved ranges by (start, end); ranges of another chunk size are ignored by convert()"""
+        saved = {}
+        for field, value in get_redis().hgetall(self.key(engine_name)).items():
+            start, end = (int(n) for n in field.decode().split("-"))
+            saved[(start, end)] = json.loads(zlib.decompress(value))
+        return saved
+
+    def save(self, engine_name: str, page_range: Dict[str, Any]) -> None:
+        value = zlib.compress(json.dumps(page_range).encode("utf-8"), settings.RESULT_COMPRESSION_LEVEL)
+        key = self.key(engine_name)
+        pipe = get_redis().pipeline()
+        pipe.hset(key, self._field(page_range["start"], page_range["end"]), value)
+        pipe.expire(key, settings.CHECKPOINT_TTL)
+        pipe.execute()
+
+    def clear(self, engine_name: str) -> None:
+        get_redis().delete(self.key(engine_name))
+
+    def convert(self, engine, file_data: bytes) -> str:
+        """
+        Convert the document with a range-capable engine, resuming from saved ranges
+
+        A failure to read or write checkpoints only costs the ability to resume.
+        """
+        try:
+            saved = self.load(engine.name)
+        except Exception as e:
+            logger.warning(f"Failed to load checkpoints of {self.content_hash}: {str(e)}")
+            saved = {}
+
+        ranges: List[Dict[str, Any]] = []
+        resumed = 0
+        for start, end in plan_page_ranges(self.page_count, self.chunk_pages):
+            page_range = saved.get((start, end))
+            if page_range is not None:
+                resumed += 1
+                metrics.CHECKPOINTED_PAGES.labels(source="resumed").inc(end - start)
+            else:
+                page_range = engine.extract_range(file_data, start, end)
+                metrics.CHECKPOINTED_PAGES.labels(source="parsed").inc(end - start)
+                try:
+                    self.save(engine.name, page_range)
+                    self.saved += 1
+                except Exception as e:
+                    logger.warning(f"Failed to checkpoint pages {start}-{end} of {self.content_hash}: {str(e)}")
+            ranges.append(page_range)
+
+        if resumed:
+            logger.info(f"Resumed {self.content_hash} from {resumed} checkpointed page ranges")
+        content = engine.merge_ranges(ranges)
+        try:
+            self.clear(engine.name)
+        except Exception as e:
+            logger.warning(f"Failed to clear checkpoints of {self.content_hash}: {str(e)}")
+        return content
@@ -0,0 +1,94 @@
+"""
+PDF-only MarkItDown configuration
+
+MarkItDown() registers every built-in converter and sniffs the file type of
+each stream with Magika. This service only ever sees PDFs, so we register the
+PdfConverter alone: non-PDF input is rejected instead of being rendered as
+plain text, and nothing beyond pdfminer/pdfplumber has to be installed
+(``markitdown[pdf]``).
+"""
+from functools import lru_cache
+from importlib.metadata import version
+from typing import Optional
+import io
+import logging
+import time
+
+from markitdown import MarkItDown, __version__ as markitdown_version
+from markitdown.converters import PdfConverter
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# One page with a line of Helvetica text; the xref table is omitted on purpose,
+# pdfminer rebuilds it, which exercises that code path as well.
+_WARM_UP_PDF = (
+    b"%PDF-1.4\n"
+    b"1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj\n"
+    b"2 0 obj << /Type /Pages /Kids [3 0 R] /Count 1 >> endobj\n"
+    b"3 0 obj << /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+    b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >> endobj\n"
+    b"4 0 obj << /Type /Font /Subtype /Type1 /BaseFont /Helvetica >> endobj\n"
+    b"5 0 obj << /Length 44 >> stream\n"
+    b"BT /F1 12 Tf 72 720 Td (Warm up) Tj ET\n"
+    b"endstream endobj\n"
+    b"trailer << /Root 1 0 R >>\n"
+    b"%%EOF\n"
+)
+
+
+def create_pdf_converter() -> MarkItDown:
+    """Build a MarkItDown instance that only converts PDFs"""
+    converter = MarkItDown(enable_builtins=False, enable_plugins=False)
+    converter.register_converter(PdfConverter())
+    return converter
+
+
+# Libraries whose releases can change the markdown, by distribution name
+_PARSER_LIBRARIES = ("pdfminer.six", "pdfplumber", "pypdfium2")
+
+
+@lru_cache
+def _library_versions() -> str:
+    return "+".join(f"{name}-{version(name)}" for name in _PARSER_LIBRARIES)
+
+
+def parser_version(engine: Optional[str] = None) -> str:
+    """
+    Version of the markdown this build produces for a submission
+
+    The installed MarkItDown, pdfminer.six, pdfplumber and pypdfium2
+    releases, PARSER_REVISION, which is bumped whenever our own conversion
+    changes the output, and the requested engine or, without one, the
+    engine policy settings that choose it.
+    """
+    if engine:
+        policy = engine
+    else:
+        policy = f"auto:{settings.ENGINE_DEFAULT}/{settings.ENGINE_FAST or '-'}/{settings.ENGINE_TABLE_SAMPLE_PAGES}"
+    return f"markitdown-{markitdown_version}+{_library_versions()}+r{settings.PARSER_REVISION}+{policy}"
+
+
+@lru_cache
+def get_pdf_converter() -> MarkItDown:
+    """Process-wide PDF converter, created on first use"""
+    return create_pdf_converter()
+
+
+def warm_up() -> float:
+    """
+    Create the shared converter and run one conversion
+
+    pdfminer and pdfplumber import submodules, font metrics and CMaps lazily
+    on the first parse; doing it up front keeps that cost off the first real
+    request and, in a Celery parent, lets forked children share those pages.
+
+    Returns:
+        Seconds spent warming up
+    """
+    start = time.perf_counter()
+    get_pdf_converter().convert_stream(io.BytesIO(_WARM_UP_PDF))
+    elapsed = time.perf_counter() - start
+    logger.info(f"PDF converter warmed up in {elapsed:.3f}s")
+    return elapsed
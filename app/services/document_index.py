@@ -0,0 +1,196 @@
+"""
+Persistent index of parsed documents per user_id/file_id
+
+Every submission with a file_id is recorded with the upload's content hash,
+the parser version, the engine requested for it ("auto" for the default
+policy) and the task parsing it. When the task finishes, the worker stores
+the markdown (zlib-compressed) in a document store that keeps it for
+DOCUMENT_TTL, well beyond the result backend's RESULT_TTL, and marks the
+entry done. A later submission of the same file whose content hash, parser
+version and requested engine are unchanged is answered from that stored
+markdown without parsing again.
+
+Entries live in one Redis hash per user; a sorted set per user orders them
+by last update for listing. Neither expires.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import time
+import zlib
+
+from app.config import settings
+from app.services.blob_store import BlobNotFoundError, BlobStore, FilesystemBlobStore, RedisBlobStore
+from app.services.converter import parser_version
+from app.services.redis_client import get_redis
+
+INDEX_KEY_PREFIX = "pdfindex:user:"
+RECENT_KEY_PREFIX = "pdfindex:recent:"
+TASK_KEY_PREFIX = "pdfindex:task:"
+
+# Engine recorded for submissions that left the choice to the engine policy
+AUTO_ENGINE = "auto"
+
+
+def create_document_store(backend: str = settings.BLOB_STORE) -> BlobStore:
+    """Create the blob store holding indexed markdown, next to the upload blobs"""
+    if backend == "redis":
+        return RedisBlobStore(prefix="pdfdoc", ttl=settings.DOCUMENT_TTL)
+    if backend == "filesystem":
+        return FilesystemBlobStore(root=settings.DOCUMENT_STORE_PATH, ttl=settings.DOCUMENT_TTL, suffix=".md.z")
+    raise ValueError(f"Unknown blob store backend: {backend}")
+
+
+class DocumentIndex:
+    """
+    Redis index of (user_id, file_id) -> content hash, parser version,
+    task id, result location and timestamps
+    """
+
+    def __init__(self, store: Optional[BlobStore] = None):
+        self._store = store
+
+    @property
+    def store(self) -> BlobStore:
+        if self._store is None:
+            self._store = create_document_store()
+        return self._store
+
+    def get(self, user_id: str, file_id: str) -> Optional[Dict[str, Any]]:
+        value = get_redis().hget(f"{INDEX_KEY_PREFIX}{user_id}", file_id)
+        return json.loads(value) if value else None
+
+    def _put(self, pipe, user_id: str, entry: Dict[str, Any]) -> None:
+        pipe.hset(f"{INDEX_KEY_PREFIX}{user_id}", entry["file_id"], json.dumps(entry))
+        pipe.zadd(f"{RECENT_KEY_PREFIX}{user_id}", {entry["file_id"]: entry["updated_at"]})
+
+    def record_submission(
+        self, user_id: str, file_id: str, content_hash: str, task_id: str, engine: Optional[str] = None
+    ) -> None:
+        """Record a newly enqueued parse of a document, engine being the one the client requested"""
+        now = time.time()
+        previous = self.get(user_id, file_id) or {}
+        entry = {
+            "file_id": file_id,
+            "content_hash": content_hash,
+            "parser_version": parser_version(engine),
+            "engine": engine or AUTO_ENGINE,
+            "task_id": task_id,
+            "status": "pending",
+            "result_key": None,
+            "error": None,
+            "created_at": previous.get("created_at", now),
+            "updated_at": now,
+            "parsed_at": None,
+        }
+        pipe = get_redis().pipeline()
+        self._put(pipe, user_id, entry)
+        pipe.set(f"{TASK_KEY_PREFIX}{task_id}", json.dumps([user_id, file_id]), ex=settings.INFLIGHT_TTL)
+        pipe.execute()
+        if previous.get("result_key"):
+            self.store.delete(previous["result_key"])
+
+    def record_result(
+        self,
+        task_id: str,
+        status: str,
+        compressed: Optional[bytes] = None,
+        error: Optional[str] = None,
+    ) -> bool:
+        """
+        Record the outcome of a task registered with record_submission()
+
+        Returns:
+            False if the task isn't indexed or the document was resubmitted since
+        """
+        client = get_redis()
+        owner = client.get(f"{TASK_KEY_PREFIX}{task_id}")
+        if owner is None:
+            return False
+        user_id, file_id = json.loads(owner)
+
+        result_key = self.store.put(compressed) if status == "success" and compressed else None
+        index_key = f"{INDEX_KEY_PREFIX}{user_id}"
+        updated = False
+
+        def update(pipe) -> None:
+            nonlocal updated
+            value = pipe.hget(index_key, file_id)
+            entry = json.loads(value) if value else None
+            if entry is None or entry["task_id"] != task_id:
+                return
+            now = time.time()
+            entry.update(status=status, result_key=result_key, error=error, updated_at=now, parsed_at=now)
+            pipe.multi()
+            self._put(pipe, user_id, entry)
+            pipe.delete(f"{TASK_KEY_PREFIX}{task_id}")
+            updated = True
+
+        client.transaction(update, index_key)
+        if not updated and result_key:
+            self.store.delete(result_key)
+        return updated
+
+    def record_completed(
+        self,
+        user_id: str,
+        file_id: str,
+        content_hash: str,
+        task_id: str,
+        content: str,
+        engine: Optional[str] = None
+    ) -> None:
+        """Record a document answered from the result cache without a worker"""
+        self.record_submission(user_id, file_id, content_hash, task_id, engine)
+        compressed = zlib.compress(content.encode("utf-8"), settings.RESULT_COMPRESSION_LEVEL)
+        self.record_result(task_id, "success", compressed)
+
+    def record_reused(self, user_id: str, file_id: str, task_id: str) -> None:
+        """Point an entry at the task that was answered from its stored markdown"""
+        entry = self.get(user_id, file_id)
+        if entry is None:
+            return
+        entry.update(task_id=task_id, updated_at=time.time())
+        pipe = get_redis().pipeline()
+        self._put(pipe, user_id, entry)
+        pipe.execute()
+
+    def stored_content(
+        self, user_id: str, file_id: str, content_hash: str, engine: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Markdown of a document parsed before from the same content with the
+        current parser version and the same requested engine, if it is still
+        stored
+        """
+        entry = self.get(user_id, file_id)
+        if (
+            entry is None
+            or entry["status"] != "success"
+            or entry["content_hash"] != content_hash
+            or entry["parser_version"] != parser_version(engine)
+            or entry.get("engine", AUTO_ENGINE) != (engine or AUTO_ENGINE)
+            or not entry["result_key"]
+        ):
+            return None
+        try:
+            return zlib.decompress(self.store.get(entry["result_key"])).decode("utf-8")
+        except BlobNotFoundError:
+            return None
+
+    def list(self, user_id: str, offset: int = 0, limit: int = 100) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        A page of a user's documents, most recently updated first
+
+        Returns:
+            (total number of documents, entries of the page)
+        """
+        client = get_redis()
+        recent_key = f"{RECENT_KEY_PREFIX}{user_id}"
+        pipe = client.pipeline(transaction=False)
+        pipe.zcard(recent_key)
+        pipe.zrevrange(recent_key, offset, offset + limit - 1)
+        total, file_ids = pipe.execute()
+        if not file_ids:
+            return total, []
+        values = client.hmget(f"{INDEX_KEY_PREFIX}{user_id}", file_ids)
+        return total, [json.loads(value) for value in values if value]
@@ -0,0 +1,235 @@
+"""
+Extraction engines and the policy choosing one per document
+
+MarkItDown's PdfConverter runs pdfplumber's word clustering over every page
+to find form- and table-like layouts and, if no page has one, emits
+pdfminer's text of the whole document. For a document with a text layer and
+no tables that first pass is wasted: the ``pdfminer`` engine emits the same
+markdown directly. ``pdfium`` reads the text layer with PDFium, which is
+far faster again, but its line breaks and spacing differ from MarkItDown's
+(``python -m benchmarks.engines`` measures both), so it is only used when
+requested or configured as ENGINE_FAST.
+
+The fast path is opt-in: with ENGINE_FAST set, select_engine() keeps
+ENGINE_DEFAULT for anything the fast engine can't reproduce: no text layer,
+or tables on a sample of the document's pages. A table on a page outside
+the sample is missed, and that document loses its markdown tables.
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+import io
+import logging
+
+import pdfplumber
+import pypdfium2
+from markitdown.converters._pdf_converter import _extract_form_content_from_words, _merge_partial_numbering_lines
+from pdfminer.high_level import extract_text
+
+from app.config import settings
+from app.services import metrics
+from app.services.converter import get_pdf_converter
+from app.services.checkpoints import PageCheckpoints
+from app.services.pdf_pages import extract_page_range, merge_page_ranges, normalize_markdown
+from app.services.preflight import InvalidPDFError, PDFMetadata, inspect_pdf
+
+logger = logging.getLogger(__name__)
+
+
+class UnknownEngineError(Exception):
+    """Raised when no engine is registered under the requested name"""
+    pass
+
+
+class ParserEngine(ABC):
+    """Converts a whole PDF to markdown"""
+
+    name: str = ""
+    supports_ranges: bool = False
+
+    @abstractmethod
+    def convert(self, file_data: bytes) -> str:
+        """Markdown of the whole document"""
+
+
+class RangeParserEngine(ParserEngine):
+    """
+    Engine that can also convert a document range by range
+
+    merge_ranges() of extract_range() results for every page equals
+    convert(), so its parses can be checkpointed and resumed.
+    """
+
+    supports_ranges = True
+
+    @abstractmethod
+    def extract_range(self, file_data: bytes, start: int, end: int) -> Dict[str, Any]:
+        """Extract pages ``[start, end)`` (0-based); the result must be JSON serializable"""
+
+    @abstractmethod
+    def merge_ranges(self, ranges: List[Dict[str, Any]]) -> str:
+        """Markdown of the document from the extract_range() results covering all its pages"""
+
+
+class MarkItDownEngine(RangeParserEngine):
+    """MarkItDown's PdfConverter: forms and tables as markdown, otherwise pdfminer text"""
+
+    name = "markitdown"
+
+    def convert(self, file_data: bytes) -> str:
+        return get_pdf_converter().convert_stream(io.BytesIO(file_data)).text_content
+
+    def extract_range(self, file_data: bytes, start: int, end: int) -> Dict[str, Any]:
+        return extract_page_range(file_data, start, end)
+
+    def merge_ranges(self, ranges: List[Dict[str, Any]]) -> str:
+        return merge_page_ranges(ranges)
+
+
+class PdfminerEngine(RangeParserEngine):
+    """pdfminer text, normalized like MarkItDown; identical to it for documents without tables"""
+
+    name = "pdfminer"
+
+    def convert(self, file_data: bytes) -> str:
+        return normalize_markdown(_merge_partial_numbering_lines(extract_text(io.BytesIO(file_data))))
+
+    def extract_range(self, file_data: bytes, start: int, end: int) -> Dict[str, Any]:
+        return extract_page_range(file_data, start, end, detect_forms=False)
+
+    def merge_ranges(self, ranges: List[Dict[str, Any]]) -> str:
+        return merge_page_ranges(ranges)
+
+
+class PdfiumEngine(ParserEngine):
+    """PDFium's text layer, pages ending in a form feed like pdfminer's"""
+
+    name = "pdfium"
+
+    def convert(self, file_data: bytes) -> str:
+        document = pypdfium2.PdfDocument(file_data)
+        try:
+            pages = []
+            for page in document:
+                textpage = page.get_textpage()
+                pages.append(textpage.get_text_range())
+                textpage.close()
+                page.close()
+        finally:
+            document.close()
+        return normalize_markdown("\n\n\f".join(pages))
+
+
+ENGINES: Dict[str, ParserEngine] = {}
+
+
+def register_engine(engine: ParserEngine) -> None:
+    """Make an engine selectable by its name"""
+    ENGINES[engine.name] = engine
+
+
+for _engine in (MarkItDownEngine(), PdfminerEngine(), PdfiumEngine()):
+    register_engine(_engine)
+
+
+def get_engine(name: str) -> ParserEngine:
+    """
+    Raises:
+        UnknownEngineError: If no engine is registered under name
+    """
+    try:
+        return ENGINES[name]
+    except KeyError:
+        raise UnknownEngineError(f"Unknown engine: {name}. Available: {', '.join(sorted(ENGINES))}")
+
+
+def sample_pages(page_count: int, samples: int) -> List[int]:
+    """Up to ``samples`` 0-based page numbers spread evenly over the document, starting with the first"""
+    if page_count <= samples:
+        return list(range(page_count))
+    step = page_count / samples
+    return sorted({int(i * step) for i in range(samples)})
+
+
+def has_tables(file_data: bytes, page_numbers: List[int]) -> bool:
+    """
+    Whether MarkItDown renders any of the given pages as a form or table
+
+    A document pdfplumber can't read counts as having tables, so it stays on
+    the default engine.
+    """
+    if not page_numbers:
+        return False
+    try:
+        with pdfplumber.open(io.BytesIO(file_data), pages=[n + 1 for n in page_numbers]) as pdf:
+            for page in pdf.pages:
+                form = _extract_form_content_from_words(page)
+                page.close()
+                if form is not None:
+                    return True
+    except Exception as e:
+        logger.warning(f"Table sampling failed, keeping the default engine: {str(e)}")
+        return True
+    return False
+
+
+def select_engine(
+    file_data: bytes,
+    metadata: Optional[PDFMetadata] = None,
+    requested: Optional[str] = None
+) -> Tuple[str, str]:
+    """
+    Choose the engine for a whole-document parse
+
+    Args:
+        metadata: Pre-flight metadata of the PDF, inspected here if not given
+        requested: Engine named by the client, which always wins
+
+    Returns:
+        (engine name, reason): reason is "requested", "default",
+        "no_text_layer", "tables" or "text_layer"
+
+    Raises:
+        UnknownEngineError: If the requested engine isn't registered
+    """
+    if requested:
+        return get_engine(requested).name, "requested"
+
+    default = settings.ENGINE_DEFAULT
+    fast = settings.ENGINE_FAST
+    if not fast or fast == default:
+        return default, "default"
+
+    if metadata is None:
+        try:
+            metadata = inspect_pdf(io.BytesIO(file_data))
+        except InvalidPDFError:
+            # Let the default engine report broken documents
+            return default, "default"
+
+    if not metadata.has_text_layer:
+        return default, "no_text_layer"
+    if settings.ENGINE_TABLE_SAMPLE_PAGES and has_tables(
+        file_data, sample_pages(metadata.page_count, settings.ENGINE_TABLE_SAMPLE_PAGES)
+    ):
+        return default, "tables"
+    return fast, "text_layer"
+
+
+def convert(
+    file_data: bytes,
+    metadata: Optional[PDFMetadata] = None,
+    requested: Optional[str] = None,
+    checkpoints: Optional[PageCheckpoints] = None
+) -> str:
+    """
+    Convert a PDF with the engine select_engine() picks, counting the choice
+
+    With checkpoints, an engine that supports ranges converts the document
+    range by range, skipping ranges finished by an earlier attempt.
+    """
+    name, reason = select_engine(file_data, metadata, requested)
+    metrics.ENGINE_SELECTIONS.labels(engine=name, reason=reason).inc()
+    engine = get_engine(name)
+    if checkpoints is not None and engine.supports_ranges:
+        return checkpoints.convert(engine, file_data)
+    return engine.convert(file_data)
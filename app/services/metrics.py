@@ -0,0 +1,138 @@
+"""
+Prometheus metrics shared by the API and the Celery workers
+
+Both processes define the same metrics; each exposes its own values (the API
+on /metrics, workers on WORKER_METRICS_PORT). With Celery's prefork pool set
+PROMETHEUS_MULTIPROC_DIR so child process values are aggregated.
+"""
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+_BYTE_BUCKETS = (
+    1024, 16 * 1024, 64 * 1024, 256 * 1024, 1024 ** 2, 4 * 1024 ** 2,
+    16 * 1024 ** 2, 64 * 1024 ** 2, 256 * 1024 ** 2,
+)
+_FAST_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+_SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+UPLOAD_BYTES = Histogram(
+    "pdf_upload_bytes", "Size of uploaded PDFs", ["outcome"], buckets=_BYTE_BUCKETS
+)
+UPLOAD_READ_SECONDS = Histogram(
+    "pdf_upload_read_seconds", "Time to read and spool an upload", ["outcome"], buckets=_FAST_BUCKETS
+)
+ENQUEUE_SECONDS = Histogram(
+    "pdf_enqueue_seconds", "Time to store an upload and publish its task", ["outcome"], buckets=_FAST_BUCKETS
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "pdf_queue_wait_seconds", "Time between publishing a task and a worker starting it", ["task"],
+    buckets=_SLOW_BUCKETS
+)
+TASK_SECONDS = Histogram(
+    "pdf_task_seconds", "Task run time", ["task", "outcome"], buckets=_SLOW_BUCKETS
+)
+CONVERT_SECONDS = Histogram(
+    "pdf_convert_seconds", "PDF to markdown conversion time", ["mode", "outcome"], buckets=_SLOW_BUCKETS
+)
+CONVERT_SECONDS_PER_PAGE = Histogram(
+    "pdf_convert_seconds_per_page", "Conversion time divided by page count", ["mode"], buckets=_FAST_BUCKETS
+)
+CONVERT_SECONDS_PER_MB = Histogram(
+    "pdf_convert_seconds_per_mb", "Conversion time divided by PDF size in MB", ["mode"], buckets=_SLOW_BUCKETS
+)
+RESULT_BYTES = Histogram(
+    "pdf_result_bytes", "Size of the produced markdown", ["storage"], buckets=_BYTE_BUCKETS
+)
+ENGINE_SELECTIONS = Counter(
+    "pdf_engine_selections_total", "Extraction engine chosen per whole-document parse", ["engine", "reason"]
+)
+SEARCH_QUERY_SECONDS = Histogram(
+    "pdf_search_query_seconds", "Full-text search time, ranking and snippets included", buckets=_FAST_BUCKETS
+)
+CHECKPOINTED_PAGES = Counter(
+    "pdf_checkpointed_pages_total", "Pages of checkpointed parses, parsed or resumed from a checkpoint", ["source"]
+)
+CACHE_LOOKUPS = Counter(
+    "pdf_cache_lookups_total", "Result cache lookups", ["result"]
+)
+FAILURES = Counter(
+    "pdf_failures_total", "Failed parses by reason", ["stage", "reason"]
+)
+
+# Backlog gauges, refreshed by the API when /metrics is scraped
+BACKLOG_QUEUED = Gauge(
+    "pdf_backlog_queued", "Tasks waiting in the broker", multiprocess_mode="mostrecent"
+)
+BACKLOG_OLDEST_AGE_SECONDS = Gauge(
+    "pdf_backlog_oldest_age_seconds", "Age of the oldest waiting task", multiprocess_mode="mostrecent"
+)
+BACKLOG_DRAIN_SECONDS = Gauge(
+    "pdf_backlog_drain_seconds", "Estimated time for the live workers to drain the queue",
+    multiprocess_mode="mostrecent"
+)
+BACKLOG_SLOTS = Gauge(
+    "pdf_backlog_worker_slots", "Pool processes of live workers", multiprocess_mode="mostrecent"
+)
+
+
+@contextmanager
+def timed(histogram: Histogram, **labels: str) -> Iterator[None]:
+    """Observe the duration of a block, labelled outcome=success or error"""
+    start = time.perf_counter()
+    outcome = "success"
+    try:
+        yield
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        histogram.labels(outcome=outcome, **labels).observe(time.perf_counter() - start)
+
+
+def observe_conversion(mode: str, seconds: float, size_bytes: int, page_count: int) -> None:
+    """Record normalized conversion cost of a successful parse"""
+    if page_count:
+        CONVERT_SECONDS_PER_PAGE.labels(mode=mode).observe(seconds / page_count)
+    if size_bytes:
+        CONVERT_SECONDS_PER_MB.labels(mode=mode).observe(seconds / (size_bytes / 1024 ** 2))
+
+
+def record_failure(stage: str, error: BaseException) -> None:
+    """Count a failure under the exception's class name"""
+    FAILURES.labels(stage=stage, reason=type(error).__name__).inc()
+
+
+def observe_backlog(backlog: Dict[str, Any]) -> None:
+    """Publish a get_backlog() snapshot; an unknown drain time is reported as +Inf"""
+    BACKLOG_QUEUED.set(backlog["queued"])
+    BACKLOG_OLDEST_AGE_SECONDS.set(backlog["oldest_age_seconds"])
+    drain = backlog["drain_seconds"]
+    BACKLOG_DRAIN_SECONDS.set(float("inf") if drain is None else drain)
+    BACKLOG_SLOTS.set(backlog["slots"])
+
+
+def metrics_registry() -> CollectorRegistry:
+    """Registry to expose: aggregated across processes in multiprocess mode"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_metrics() -> bytes:
+    """Metrics in the Prometheus text exposition format"""
+    return generate_latest(metrics_registry())
@@ -0,0 +1,44 @@
+from typing import Optional
+import logging
+
+from app.config import settings
+from app.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY_PREFIX = "pdfstream:"
+
+
+def stream_key(task_id: str) -> str:
+    """Redis stream holding the incremental markdown of one task"""
+    return f"{STREAM_KEY_PREFIX}{task_id}"
+
+
+def reset_stream(task_id: str) -> None:
+    """Drop output of an earlier, interrupted attempt of the same task"""
+    get_redis().delete(stream_key(task_id))
+
+
+def append_chunk(task_id: str, content: str) -> None:
+    """Append a markdown chunk for /task/{task_id}/stream readers"""
+    if not content:
+        return
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.xadd(stream_key(task_id), {"content": content})
+    pipe.expire(stream_key(task_id), settings.STREAM_TTL)
+    pipe.execute()
+
+
+def finish_stream(task_id: str, status: str, error: Optional[str] = None) -> None:
+    """Mark the stream complete; readers stop at this entry"""
+    fields = {"done": "1", "status": status}
+    if error:
+        fields["error"] = error
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.xadd(stream_key(task_id), fields)
+        pipe.expire(stream_key(task_id), settings.STREAM_TTL)
+        pipe.execute()
+    except Exception as e:
+        # Readers fall back to the task result once the task has finished
+        logger.warning(f"Failed to finish stream for task {task_id}: {str(e)}")
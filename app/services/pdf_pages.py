@@ -0,0 +1,233 @@
+"""
+Page-wise PDF extraction that reproduces MarkItDown's PdfConverter output
+
+MarkItDown decides between two renderings for the whole document: if any page
+looks like a form/table it joins per-page pdfplumber chunks, otherwise it uses
+pdfminer's text for the full document. To parse page ranges independently we
+record both renderings for every page and make that decision when merging, so
+the merged markdown is identical to a single ``convert_stream`` call.
+"""
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
+from io import BytesIO, StringIO
+import logging
+import re
+
+import pdfplumber
+from pdfminer.converter import TextConverter
+from pdfminer.layout import LAParams
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import resolve1
+from markitdown.converters._pdf_converter import (
+    PARTIAL_NUMBERING_PATTERN,
+    _extract_form_content_from_words,
+    _merge_partial_numbering_lines,
+)
+
+logger = logging.getLogger(__name__)
+
+PageRange = Tuple[int, int]
+
+# pdfminer ends the text of every page with a form feed
+PAGE_BREAK = b"\f"
+
+
+def count_pages(file_data: Union[bytes, BinaryIO]) -> int:
+    """
+    Return the page count from the document catalog
+
+    Only the page tree root is read, so this is cheap even for large files.
+    Accepts the PDF as bytes or as a seekable binary file.
+    """
+    parser = PDFParser(BytesIO(file_data) if isinstance(file_data, bytes) else file_data)
+    return document_page_count(PDFDocument(parser))
+
+
+def document_page_count(document: PDFDocument) -> int:
+    """count_pages() for an already opened document"""
+    pages = resolve1(document.catalog.get("Pages"))
+    count = resolve1(pages.get("Count")) if pages else None
+    if isinstance(count, int):
+        return count
+    # Broken page tree root: fall back to walking the pages
+    return sum(1 for _ in PDFPage.create_pages(document))
+
+
+def page_offsets(content: str, page_count: Optional[int] = None) -> Optional[List[int]]:
+    """
+    UTF-8 byte offsets at which each page's markdown starts, plus the length
+
+    pdfminer ends every page with a form feed, which survives into markdown
+    rendered from the text layer. Whitespace normalization strips the form
+    feeds of trailing empty pages, so missing trailing breaks are padded up
+    to page_count. MarkItDown's table rendering joins pages without breaks;
+    such documents have no index, and neither has markdown without breaks
+    whose page count isn't known.
+
+    Returns:
+        page_count + 1 offsets (page n is ``data[offsets[n - 1]:offsets[n]]``),
+        or None if the page breaks can't be matched to the pages
+    """
+    data = content.encode("utf-8")
+    offsets = [0]
+    position = data.find(PAGE_BREAK)
+    while position != -1:
+        offsets.append(position + 1)
+        position = data.find(PAGE_BREAK, position + 1)
+    offsets.append(len(data))
+
+    found = len(offsets) - 1
+    if page_count is None:
+        return offsets if found > 1 else None
+    if found > page_count or (found == 1 and page_count > 1):
+        return None
+    return offsets + [len(data)] * (page_count - found)
+
+
+def plan_page_ranges(page_count: int, chunk_size: int) -> List[PageRange]:
+    """Split ``page_count`` pages into ``[start, end)`` ranges of ``chunk_size``"""
+    return [
+        (start, min(start + chunk_size, page_count))
+        for start in range(0, page_count, chunk_size)
+    ]
+
+
+def _pdfminer_page_texts(file_data: bytes, page_numbers: List[int]) -> List[str]:
+    """pdfminer text for each page, exactly as extract_text() would emit it"""
+    output = StringIO()
+    rsrcmgr = PDFResourceManager(caching=True)
+    device = TextConverter(rsrcmgr, output, codec="utf-8", laparams=LAParams())
+    interpreter = PDFPageInterpreter(rsrcmgr, device)
+
+    texts = []
+    # maxpages stops the page tree walk after the range instead of at the end of the document
+    pages = PDFPage.get_pages(BytesIO(file_data), page_numbers, maxpages=max(page_numbers) + 1, caching=True)
+    for page in pages:
+        start = output.tell()
+        interpreter.process_page(page)
+        texts.append(output.getvalue()[start:])
+    device.close()
+    return texts
+
+
+def extract_page_range(file_data: bytes, start: int, end: int, detect_forms: bool = True) -> Dict[str, Any]:
+    """
+    Extract pages ``[start, end)`` (0-based) for a later merge_page_ranges()
+
+    Without detect_forms only the pdfminer rendering is recorded, and the
+    merge produces pdfminer's text of the document.
+
+    Returns:
+        Dict with the per-page renderings under "pages" and whether
+        pdfplumber failed on this range under "plumber_failed"
+    """
+    page_numbers = list(range(start, end))
+    pages: List[Dict[str, Any]] = [
+        {"page": number, "form": False, "chunk": None, "text": text}
+        for number, text in zip(page_numbers, _pdfminer_page_texts(file_data, page_numbers))
+    ]
+
+    plumber_failed = False
+    if not detect_forms:
+        return {"start": start, "end": end, "pages": pages, "plumber_failed": plumber_failed}
+    try:
+        with pdfplumber.open(BytesIO(file_data), pages=[n + 1 for n in page_numbers]) as pdf:
+            for entry, page in zip(pages, pdf.pages):
+                page_content = _extract_form_content_from_words(page)
+                if page_content is not None:
+                    entry["form"] = True
+                    if page_content.strip():
+                        entry["chunk"] = page_content
+                else:
+                    text = page.extract_text()
+                    if text and text.strip():
+                        entry["chunk"] = text.strip()
+                page.close()
+    except Exception as e:
+        logger.warning(f"pdfplumber failed on pages {start}-{end}, falling back to pdfminer: {str(e)}")
+        plumber_failed = True
+
+    return {"start": start, "end": end, "pages": pages, "plumber_failed": plumber_failed}
+
+
+def normalize_markdown(text: str) -> str:
+    """Whitespace normalization MarkItDown applies to every converter result"""
+    text = "\n".join(line.rstrip() for line in re.split(r"\r?\n", text))
+    return re.sub(r"\n{3,}", "\n\n", text)
+
+
+def merge_page_ranges(ranges: List[Dict[str, Any]]) -> str:
+    """
+    Merge extract_page_range() results back into the document's markdown
+
+    Ranges may arrive in any order; they are merged in page order.
+    """
+    ranges = sorted(ranges, key=lambda r: r["start"])
+    pages = [page for r in ranges for page in r["pages"]]
+    pdfminer_text = "".join(page["text"] for page in pages)
+
+    if any(r["plumber_failed"] for r in ranges):
+        markdown = pdfminer_text
+    elif not any(page["form"] for page in pages):
+        markdown = pdfminer_text
+    else:
+        markdown = "\n\n".join(page["chunk"] for page in pages if page["chunk"]).strip()
+
+    if not markdown:
+        markdown = pdfminer_text
+
+    return normalize_markdown(_merge_partial_numbering_lines(markdown))
+
+
+class IncrementalMarkdown:
+    """
+    Normalize pdfminer text as pages arrive, releasing only settled lines
+
+    Normalization only looks ahead to the next non-empty line, so everything
+    before the last non-empty line (and any partial numbering lines that may
+    merge into it) is final. The concatenation of every feed() and finish()
+    is identical to the whole-document pdfminer rendering of MarkItDown;
+    documents with form-like pages are rendered differently by MarkItDown.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+
+    @staticmethod
+    def _render(text: str) -> str:
+        return normalize_markdown(_merge_partial_numbering_lines(text))
+
+    def feed(self, text: str) -> str:
+        """Add raw page text and return the markdown that is now settled"""
+        self._buffer += text
+        lines = self._buffer.split("\n")
+
+        non_empty = [i for i, line in enumerate(lines) if line.strip()]
+        if not non_empty:
+            return ""
+        hold = len(non_empty) - 1
+        while hold > 0 and PARTIAL_NUMBERING_PATTERN.match(lines[non_empty[hold - 1]].strip()):
+            hold -= 1
+        hold = non_empty[hold]
+        if hold == 0:
+            return ""
+
+        self._buffer = "\n".join(lines[hold:])
+        return self._render("\n".join(lines[:hold]) + "\n")
+
+    def finish(self) -> str:
+        """Return the remaining markdown"""
+        text, self._buffer = self._buffer, ""
+        return self._render(text) if text else ""
+
+
+def convert_by_pages(file_data: bytes, chunk_size: int, page_count: Optional[int] = None) -> str:
+    """Sequentially convert a PDF range by range (reference for the fan-out path)"""
+    if page_count is None:
+        page_count = count_pages(file_data)
+    return merge_page_ranges([
+        extract_page_range(file_data, start, end)
+        for start, end in plan_page_ranges(page_count, chunk_size)
+    ])
@@ -1,9 +1,9 @@
-from typing import Union, BinaryIO
-from markitdown import MarkItDown
+from typing import Optional, Union, BinaryIO
 from pathlib import Path
-import io
 import logging
 
+from app.services import engines
+
 logger = logging.getLogger(__name__)
 
 
@@ -13,10 +13,18 @@ class PDFParsingError(Exception):
 
 
 class PDFParserService:
-    """Clean service class for PDF parsing using MarkItDown"""
+    """
+    Clean service class for PDF parsing
+    
+    Each document is converted with ``engine`` or, if it is None, with the
+    engine engines.select_engine() picks for it (MarkItDown unless the
+    document can take the fast path).
+    """
     
-    def __init__(self):
-        self._markitdown = MarkItDown()
+    def __init__(self, engine: Optional[str] = None):
+        if engine is not None:
+            engines.get_engine(engine)
+        self.engine = engine
     
     def parse_pdf_content(self, file_data: Union[bytes, BinaryIO]) -> str:
         """
@@ -32,22 +40,17 @@ class PDFParserService:
             PDFParsingError: If parsing fails
         """
         try:
-            # Convert bytes to BytesIO if needed
-            if isinstance(file_data, bytes):
-                file_stream = io.BytesIO(file_data)
-            else:
-                file_stream = file_data
-            
-            # Ensure we're at the beginning of the stream
-            file_stream.seek(0)
+            # Engines work on the whole document in memory
+            if not isinstance(file_data, bytes):
+                file_data.seek(0)
+                file_data = file_data.read()
             
-            # Parse using MarkItDown
-            result = self._markitdown.convert_stream(file_stream)
+            content = engines.convert(file_data, requested=self.engine)
             
-            if not result or not result.text_content:
+            if not content:
                 raise PDFParsingError("No content extracted from PDF")
                 
-            return result.text_content
+            return content
             
         except Exception as e:
             logger.error(f"PDF parsing failed: {str(e)}")
@@ -0,0 +1,116 @@
+"""
+Pre-flight validation of uploads before they are enqueued
+
+A cheap structural check that runs in the API process: the header magic,
+the trailer at the end of the file, the cross-reference table (read by
+pdfminer, which only touches the xref and the objects it asks for),
+encryption and the page count. Bodies that fail are rejected with a clear
+error instead of costing a broker message and a worker slot.
+
+The metadata collected along the way is attached to the job: it routes the
+job to a queue and tells the worker the page count up front. Whether the
+first pages carry fonts is a hint for a text layer; scanned pages without
+one come out of the parser empty.
+"""
+from dataclasses import asdict, dataclass
+from typing import Any, BinaryIO, Dict, Optional
+import os
+import re
+
+from pdfminer.pdfdocument import PDFDocument, PDFEncryptionError, PDFPasswordIncorrect
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import resolve1
+
+from app.config import settings
+from app.services.pdf_pages import document_page_count
+
+# Readers accept the header anywhere in the first 1KB and %%EOF in the last 1KB
+HEADER_WINDOW = 1024
+TRAILER_WINDOW = 1024
+
+_HEADER = re.compile(rb"%PDF-(\d\.\d)")
+
+
+class InvalidPDFError(Exception):
+    """Raised when an upload fails pre-flight validation"""
+    pass
+
+
+@dataclass
+class PDFMetadata:
+    size: int
+    page_count: int
+    pdf_version: str
+    encrypted: bool
+    has_text_layer: bool
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> Optional["PDFMetadata"]:
+        return cls(**data) if data else None
+
+
+def _has_fonts(document: PDFDocument, sample_pages: int) -> bool:
+    """Whether any of the first pages references a font"""
+    for number, page in enumerate(PDFPage.create_pages(document)):
+        if number >= sample_pages:
+            break
+        fonts = resolve1((page.resources or {}).get("Font"))
+        if fonts:
+            return True
+    return False
+
+
+def inspect_pdf(file: BinaryIO) -> PDFMetadata:
+    """
+    Validate an upload and collect its metadata, leaving the stream at the start
+
+    Raises:
+        InvalidPDFError: If the upload isn't a PDF, is truncated or
+            unreadable, needs a password or has no pages
+    """
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    try:
+        file.seek(0)
+        header = _HEADER.search(file.read(HEADER_WINDOW))
+        if not header:
+            raise InvalidPDFError("File is not a PDF")
+
+        file.seek(max(size - TRAILER_WINDOW, 0))
+        if b"%%EOF" not in file.read(TRAILER_WINDOW):
+            raise InvalidPDFError("PDF is truncated (no end-of-file marker)")
+
+        file.seek(0)
+        try:
+            document = PDFDocument(PDFParser(file), password="")
+        except PDFPasswordIncorrect:
+            raise InvalidPDFError("PDF is password protected")
+        except PDFEncryptionError as e:
+            raise InvalidPDFError(f"PDF uses unsupported encryption: {str(e)}")
+        except Exception as e:
+            raise InvalidPDFError(f"PDF structure is unreadable: {str(e)}")
+
+        try:
+            page_count = document_page_count(document)
+            has_text_layer = _has_fonts(document, settings.PREFLIGHT_TEXT_SAMPLE_PAGES)
+        except Exception as e:
+            raise InvalidPDFError(f"PDF page tree is unreadable: {str(e)}")
+
+        if page_count < 1:
+            raise InvalidPDFError("PDF has no pages")
+        if settings.MAX_PAGES and page_count > settings.MAX_PAGES:
+            raise InvalidPDFError(f"PDF has {page_count} pages. Maximum: {settings.MAX_PAGES}")
+
+        return PDFMetadata(
+            size=size,
+            page_count=page_count,
+            pdf_version=header.group(1).decode("ascii"),
+            encrypted=document.encryption is not None,
+            has_text_layer=has_text_layer,
+        )
+    finally:
+        file.seek(0)
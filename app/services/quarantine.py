@@ -0,0 +1,197 @@
+"""
+Crash detection and quarantine for PDFs that take workers down
+
+Every conversion registers an attempt under the PDF's content hash and
+removes it when the conversion returns or raises. While it runs, a daemon
+thread keeps a liveness key of the attempt alive. An attempt still
+registered after its liveness key expired can't be running any more: its
+process was killed by the hard time limit, the OOM killer or a crash. Such
+abandoned attempts, soft time limit hits and MemoryErrors each count as a
+strike. Concurrent parses of the same PDF don't, so popular files aren't
+quarantined by accident, and neither does a soft time limit hit by a parse
+that saved new checkpoint ranges, since the next attempt resumes further on.
+
+A PDF with QUARANTINE_AFTER_STRIKES strikes is added to the quarantine set:
+workers fail it without parsing and the API rejects it on resubmission.
+"""
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+import logging
+import threading
+import time
+import uuid
+
+from celery.exceptions import SoftTimeLimitExceeded
+
+from app.config import settings
+from app.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+ATTEMPTS_KEY_PREFIX = "pdfattempts:"
+ATTEMPT_ALIVE_KEY_PREFIX = "pdfattempt-alive:"
+STRIKE_KEY_PREFIX = "pdfstrikes:"
+QUARANTINE_KEY = "pdfquarantine"
+
+# Time after the hard limit before an unfinished attempt counts as crashed,
+# for attempts registered without a liveness key
+ABANDONED_GRACE = 60
+
+
+class PDFQuarantinedError(Exception):
+    """Raised for a PDF that repeatedly crashed or stalled workers"""
+
+    def __init__(self):
+        super().__init__("PDF was quarantined after repeatedly crashing or timing out the parser")
+
+
+class ParseTimeoutError(Exception):
+    """Raised when a conversion exceeds TASK_SOFT_TIME_LIMIT"""
+    pass
+
+
+def is_quarantined(content_hash: str) -> bool:
+    """Whether a PDF is in the quarantine set (entries expire after QUARANTINE_TTL)"""
+    added = get_redis().zscore(QUARANTINE_KEY, content_hash)
+    return added is not None and added > time.time() - settings.QUARANTINE_TTL
+
+
+def quarantine(content_hash: str) -> None:
+    """Add a PDF to the quarantine set, dropping expired entries"""
+    now = time.time()
+    pipe = get_redis().pipeline()
+    pipe.zadd(QUARANTINE_KEY, {content_hash: now})
+    pipe.zremrangebyscore(QUARANTINE_KEY, "-inf", now - settings.QUARANTINE_TTL)
+    pipe.delete(f"{STRIKE_KEY_PREFIX}{content_hash}", f"{ATTEMPTS_KEY_PREFIX}{content_hash}")
+    pipe.execute()
+    logger.warning(f"Quarantined PDF {content_hash}")
+
+
+def release(content_hash: str) -> None:
+    """Take a PDF out of quarantine and forget its strikes"""
+    pipe = get_redis().pipeline()
+    pipe.zrem(QUARANTINE_KEY, content_hash)
+    pipe.delete(f"{STRIKE_KEY_PREFIX}{content_hash}", f"{ATTEMPTS_KEY_PREFIX}{content_hash}")
+    pipe.execute()
+
+
+def add_strikes(content_hash: str, count: int = 1) -> int:
+    """
+    Count crashes against a PDF, quarantining it at QUARANTINE_AFTER_STRIKES
+
+    Returns:
+        The PDF's strikes so far
+    """
+    key = f"{STRIKE_KEY_PREFIX}{content_hash}"
+    pipe = get_redis().pipeline()
+    pipe.incrby(key, count)
+    pipe.expire(key, settings.QUARANTINE_STRIKE_TTL)
+    strikes = pipe.execute()[0]
+    if strikes >= settings.QUARANTINE_AFTER_STRIKES:
+        quarantine(content_hash)
+    return strikes
+
+
+def _collect_abandoned(content_hash: str) -> int:
+    """Turn attempts whose process is gone into strikes"""
+    client = get_redis()
+    key = f"{ATTEMPTS_KEY_PREFIX}{content_hash}"
+    attempts = client.hgetall(key)
+    if not attempts:
+        return 0
+    now = time.time()
+    pipe = client.pipeline(transaction=False)
+    for attempt in attempts:
+        pipe.exists(f"{ATTEMPT_ALIVE_KEY_PREFIX}{attempt.decode()}")
+    alive = pipe.execute()
+    abandoned = [
+        attempt
+        for (attempt, started), is_alive in zip(attempts.items(), alive)
+        # The age check covers attempts registered before liveness keys existed
+        if not is_alive and (
+            float(started) < now - settings.QUARANTINE_HEARTBEAT_TTL
+            or float(started) < now - settings.TASK_TIME_LIMIT - ABANDONED_GRACE
+        )
+    ]
+    # HDEL reports how many fields it removed, so concurrent collectors count each attempt once
+    removed = client.hdel(key, *abandoned) if abandoned else 0
+    if removed:
+        logger.warning(f"{removed} earlier attempt(s) to parse {content_hash} crashed")
+        return add_strikes(content_hash, removed)
+    return 0
+
+
+def _keep_alive(attempt: str) -> threading.Event:
+    """
+    Refresh an attempt's liveness key in a daemon thread; it stops, and the
+    key expires, when the process dies
+
+    Returns:
+        An event that stops the refreshing when set
+    """
+    stopped = threading.Event()
+    key = f"{ATTEMPT_ALIVE_KEY_PREFIX}{attempt}"
+    interval = max(settings.QUARANTINE_HEARTBEAT_TTL / 3, 1)
+
+    def beat():
+        while not stopped.wait(interval):
+            try:
+                get_redis().set(key, 1, ex=settings.QUARANTINE_HEARTBEAT_TTL)
+            except Exception as e:
+                logger.warning(f"Failed to refresh parse attempt {attempt}: {str(e)}")
+
+    threading.Thread(target=beat, name="crash-guard-heartbeat", daemon=True).start()
+    return stopped
+
+
+@contextmanager
+def crash_guard(content_hash: str, progress: Optional[Callable[[], int]] = None) -> Iterator[None]:
+    """
+    Wrap a conversion of the PDF with this content hash
+
+    Args:
+        content_hash: The PDF's content hash
+        progress: Returns how much work the conversion has saved for a later
+            attempt (checkpointed page ranges); a soft time limit hit after
+            it grew isn't a strike
+
+    Raises:
+        PDFQuarantinedError: If the PDF is quarantined, or is now because
+            earlier attempts crashed
+        ParseTimeoutError: If the soft time limit fired during the conversion
+    """
+    _collect_abandoned(content_hash)
+    if is_quarantined(content_hash):
+        raise PDFQuarantinedError()
+
+    client = get_redis()
+    key = f"{ATTEMPTS_KEY_PREFIX}{content_hash}"
+    attempt = uuid.uuid4().hex
+    alive_key = f"{ATTEMPT_ALIVE_KEY_PREFIX}{attempt}"
+    pipe = client.pipeline()
+    pipe.hset(key, attempt, time.time())
+    pipe.expire(key, settings.QUARANTINE_STRIKE_TTL)
+    pipe.set(alive_key, 1, ex=settings.QUARANTINE_HEARTBEAT_TTL)
+    pipe.execute()
+    heartbeat = _keep_alive(attempt)
+    saved_before = progress() if progress else 0
+
+    try:
+        yield
+    except SoftTimeLimitExceeded:
+        if progress and progress() > saved_before:
+            logger.warning(f"Parsing {content_hash} exceeded the soft time limit after saving progress")
+        else:
+            logger.warning(f"Parsing {content_hash} exceeded the soft time limit")
+            add_strikes(content_hash)
+        raise ParseTimeoutError(f"Parsing took longer than {settings.TASK_SOFT_TIME_LIMIT} seconds")
+    except MemoryError:
+        logger.warning(f"Parsing {content_hash} ran out of memory")
+        add_strikes(content_hash)
+        raise
+    finally:
+        heartbeat.set()
+        pipe = client.pipeline()
+        pipe.hdel(key, attempt)
+        pipe.delete(alive_key)
+        pipe.execute()
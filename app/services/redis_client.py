@@ -0,0 +1,42 @@
+from functools import lru_cache
+import asyncio
+import weakref
+
+import redis
+import redis.asyncio
+
+from app.config import settings
+
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, redis.asyncio.Redis]" = weakref.WeakKeyDictionary()
+
+
+@lru_cache(maxsize=None)
+def get_redis() -> redis.Redis:
+    """
+    Shared Redis client for service-level state (cache, blobs, counters)
+    
+    The underlying connection pool is created lazily and is fork-safe, so the
+    client can be created in the Celery parent and reused by pool children.
+    """
+    return redis.Redis.from_url(settings.REDIS_URL)
+
+
+def get_async_redis() -> redis.asyncio.Redis:
+    """
+    Shared asyncio Redis client for request handlers
+    
+    Its pool holds at most REDIS_MAX_CONNECTIONS connections; when all are
+    busy, callers wait up to REDIS_POOL_TIMEOUT for one instead of opening
+    more. Connections belong to the event loop that opened them, so there is
+    one client per loop: a single one under uvicorn.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        pool = redis.asyncio.BlockingConnectionPool.from_url(
+            settings.REDIS_URL,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+        )
+        client = _async_clients[loop] = redis.asyncio.Redis(connection_pool=pool)
+    return client
@@ -0,0 +1,182 @@
+from typing import Optional, Dict, Any, Union
+import hashlib
+import logging
+import time
+
+import redis
+
+from app.config import settings
+from app.services import metrics
+from app.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+# Stores an entry, drops bookkeeping for entries whose TTL already expired and
+# evicts least recently used entries until the cache fits in its byte budget.
+# Entry keys are derived from the prefix inside the script, so this assumes a
+# single (non-cluster) Redis instance like the one we deploy.
+_SET_SCRIPT = """
+local entry_prefix = ARGV[1]
+local digest = ARGV[2]
+local value = ARGV[3]
+local ttl = tonumber(ARGV[4])
+local now = tonumber(ARGV[5])
+local max_bytes = tonumber(ARGV[6])
+
+local function forget(member)
+    local size = redis.call('HGET', KEYS[2], member)
+    if size then
+        redis.call('DECRBY', KEYS[3], size)
+        redis.call('HDEL', KEYS[2], member)
+    end
+    redis.call('ZREM', KEYS[1], member)
+end
+
+forget(digest)
+redis.call('SET', entry_prefix .. digest, value, 'EX', ttl)
+redis.call('ZADD', KEYS[1], now, digest)
+redis.call('HSET', KEYS[2], digest, string.len(value))
+redis.call('INCRBY', KEYS[3], string.len(value))
+
+for _, member in ipairs(redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now - ttl)) do
+    forget(member)
+end
+
+local evicted = 0
+while tonumber(redis.call('GET', KEYS[3]) or '0') > max_bytes do
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0)
+    if #oldest == 0 then
+        break
+    end
+    redis.call('DEL', entry_prefix .. oldest[1])
+    forget(oldest[1])
+    evicted = evicted + 1
+end
+return evicted
+"""
+
+
+class ResultCache:
+    """
+    Content-addressed markdown cache backed by Redis
+
+    Entries are keyed by the SHA-256 of the uploaded PDF, which callers may
+    qualify with the parser version that produced it. Every hit refreshes
+    the entry TTL and its LRU position; once the total cached size exceeds
+    ``max_bytes`` the least recently used entries are evicted.
+    """
+
+    def __init__(
+        self,
+        client: Optional[redis.Redis] = None,
+        prefix: str = "pdfcache",
+        ttl: int = settings.CACHE_TTL,
+        max_bytes: int = settings.CACHE_MAX_BYTES,
+    ):
+        self._client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._set_script = None
+
+    @property
+    def client(self) -> redis.Redis:
+        if self._client is None:
+            self._client = get_redis()
+        return self._client
+
+    @staticmethod
+    def content_hash(file_data: bytes) -> str:
+        """Return the SHA-256 hex digest used as cache key"""
+        return hashlib.sha256(file_data).hexdigest()
+
+    def _key(self, name: str) -> str:
+        return f"{self.prefix}:{name}"
+
+    def get(self, content_hash: str, record: bool = True) -> Optional[str]:
+        """
+        Look up cached markdown for a content hash
+
+        Args:
+            content_hash: Cache key
+            record: Count the lookup as a hit or miss; False for a second
+                lookup of an upload whose first one was already counted, so
+                each upload counts once
+
+        Returns:
+            Cached markdown content, or None on a miss
+        """
+        entry_key = self._key(f"entry:{content_hash}")
+        value = self.client.get(entry_key)
+        if value is None and not record:
+            return None
+
+        pipe = self.client.pipeline(transaction=False)
+        if value is None:
+            pipe.incr(self._key("misses"))
+        else:
+            if record:
+                pipe.incr(self._key("hits"))
+            pipe.expire(entry_key, self.ttl)
+            pipe.zadd(self._key("lru"), {content_hash: time.time()})
+        pipe.execute()
+
+        if record:
+            metrics.CACHE_LOOKUPS.labels(result="miss" if value is None else "hit").inc()
+        return value.decode("utf-8") if value is not None else None
+
+    def contains(self, content_hash: str) -> bool:
+        """Check for an entry without touching counters or LRU order"""
+        return bool(self.client.exists(self._key(f"entry:{content_hash}")))
+
+    def set(self, content_hash: str, content: Union[str, bytes]) -> bool:
+        """
+        Store markdown content for a content hash
+
+        Returns:
+            True if the entry was cached, False if it exceeds the cache size
+        """
+        value = content.encode("utf-8") if isinstance(content, str) else content
+        if len(value) > self.max_bytes:
+            logger.info(f"Skipping cache for {content_hash}: {len(value)} bytes exceeds cache size")
+            return False
+
+        if self._set_script is None:
+            self._set_script = self.client.register_script(_SET_SCRIPT)
+
+        evicted = self._set_script(
+            keys=[self._key("lru"), self._key("sizes"), self._key("bytes")],
+            args=[self._key("entry:"), content_hash, value, self.ttl, time.time(), self.max_bytes],
+        )
+        if evicted:
+            logger.info(f"Evicted {evicted} cache entries to stay under {self.max_bytes} bytes")
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current cache occupancy"""
+        pipe = self.client.pipeline(transaction=False)
+        pipe.get(self._key("hits"))
+        pipe.get(self._key("misses"))
+        pipe.zcard(self._key("lru"))
+        pipe.get(self._key("bytes"))
+        hits, misses, entries, size = pipe.execute()
+
+        hits = int(hits or 0)
+        misses = int(misses or 0)
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": int(size or 0),
+            "max_bytes": self.max_bytes,
+        }
+
+    def clear(self) -> None:
+        """Remove every cache entry and reset the counters"""
+        members = self.client.zrange(self._key("lru"), 0, -1)
+        keys = [self._key(f"entry:{m.decode()}") for m in members]
+        keys += [self._key(name) for name in ("lru", "sizes", "bytes", "hits", "misses")]
+        self.client.delete(*keys)
@@ -0,0 +1,116 @@
+"""
+Compact storage of parse results in the Celery result backend
+
+Markdown above RESULT_COMPRESS_THRESHOLD bytes is zlib-compressed before the
+result is stored. Compressed content still above RESULT_OFFLOAD_THRESHOLD is
+moved to a separate result blob store so large documents don't sit in the
+result backend at all. Results and their blobs expire after RESULT_TTL.
+
+Packed results keep the usual dict shape with ``content`` set to None and one
+of ``compressed_content`` (base64 of the zlib stream) or ``content_blob`` (a
+result blob key); unpack_content() reverses either.
+"""
+from typing import Any, Dict, Optional
+import base64
+import logging
+import zlib
+
+from app.config import settings
+from app.services import metrics
+from app.services.blob_store import BlobNotFoundError, BlobStore, FilesystemBlobStore, RedisBlobStore
+
+logger = logging.getLogger(__name__)
+
+
+class ResultExpiredError(Exception):
+    """Raised when an offloaded result is no longer in the result blob store"""
+    pass
+
+
+def create_result_store(backend: str = settings.BLOB_STORE) -> BlobStore:
+    """Create the blob store holding offloaded results, next to the upload blobs"""
+    if backend == "redis":
+        return RedisBlobStore(prefix="pdfresult", ttl=settings.RESULT_TTL)
+    if backend == "filesystem":
+        return FilesystemBlobStore(root=settings.RESULT_STORE_PATH, ttl=settings.RESULT_TTL, suffix=".md.z")
+    raise ValueError(f"Unknown blob store backend: {backend}")
+
+
+result_store = create_result_store()
+
+
+def pack_result(result: Dict[str, Any], store: Optional[BlobStore] = None) -> Dict[str, Any]:
+    """
+    Compress (and if large, offload) the content of a task result
+
+    Returns:
+        The result dict to hand to the result backend
+    """
+    content = result.get("content")
+    if content is None:
+        return result
+
+    raw = content.encode("utf-8")
+    if len(raw) < settings.RESULT_COMPRESS_THRESHOLD:
+        metrics.RESULT_BYTES.labels(storage="plain").observe(len(raw))
+        return result
+
+    compressed = zlib.compress(raw, settings.RESULT_COMPRESSION_LEVEL)
+    packed = dict(result, content=None)
+    if len(compressed) >= settings.RESULT_OFFLOAD_THRESHOLD:
+        packed["content_blob"] = (store or result_store).put(compressed)
+        metrics.RESULT_BYTES.labels(storage="offloaded").observe(len(raw))
+    else:
+        packed["compressed_content"] = base64.b64encode(compressed).decode("ascii")
+        metrics.RESULT_BYTES.labels(storage="compressed").observe(len(raw))
+    return packed
+
+
+def unpack_content(result: Dict[str, Any], store: Optional[BlobStore] = None) -> Optional[str]:
+    """
+    Return the markdown of a (possibly packed) task result
+
+    Raises:
+        ResultExpiredError: If the offloaded content already expired
+    """
+    if result.get("content") is not None:
+        return result["content"]
+
+    if result.get("compressed_content"):
+        compressed = base64.b64decode(result["compressed_content"])
+    elif result.get("content_blob"):
+        try:
+            compressed = (store or result_store).get(result["content_blob"])
+        except BlobNotFoundError:
+            raise ResultExpiredError("Parsed content expired")
+    else:
+        return None
+    return zlib.decompress(compressed).decode("utf-8")
+
+
+def compressed_content(result: Dict[str, Any], store: Optional[BlobStore] = None) -> Optional[bytes]:
+    """
+    The zlib stream of a (possibly packed) task result's content
+
+    Packed content is returned as stored, without a decompress/compress round trip.
+
+    Raises:
+        ResultExpiredError: If the offloaded content already expired
+    """
+    if result.get("compressed_content"):
+        return base64.b64decode(result["compressed_content"])
+    if result.get("content_blob"):
+        try:
+            return (store or result_store).get(result["content_blob"])
+        except BlobNotFoundError:
+            raise ResultExpiredError("Parsed content expired")
+    if result.get("content") is not None:
+        return zlib.compress(result["content"].encode("utf-8"), settings.RESULT_COMPRESSION_LEVEL)
+    return None
+
+
+def unpack_result(result: Dict[str, Any], store: Optional[BlobStore] = None) -> Dict[str, Any]:
+    """Return a copy of a task result with its content restored"""
+    unpacked = {k: v for k, v in result.items() if k not in ("compressed_content", "content_blob")}
+    unpacked["content"] = unpack_content(result, store)
+    return unpacked
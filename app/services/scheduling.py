@@ -0,0 +1,94 @@
+"""
+Queue routing and per-user fair share for parse jobs
+
+Jobs are classified by byte size and page count (read from the document
+catalog, which only needs the xref table) and routed to SMALL_QUEUE or
+LARGE_QUEUE, so a burst of huge scans can't hold every worker slot while
+one-page submissions wait.
+
+Within a queue, each job's Redis priority is the number of jobs its user
+already has in flight (0 is served first). A user who submits 50 files gets
+their first one at priority 0 next to everyone else's first file, and the
+rest behind them. The in-flight count is kept per user in Redis; every job
+remembers which user it was counted for so it can be released when the job
+finishes.
+"""
+from typing import BinaryIO, Optional, Tuple
+import logging
+import os
+
+from app.config import settings
+from app.services.pdf_pages import count_pages
+from app.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Redis priority sub-queues: one per level, 0 served first
+PRIORITY_STEPS = list(range(10))
+
+INFLIGHT_KEY_PREFIX = "pdfinflight:user:"
+INFLIGHT_TASK_PREFIX = "pdfinflight:task:"
+
+
+def measure_job(file: BinaryIO) -> Tuple[int, Optional[int]]:
+    """
+    Byte size and page count of an upload, leaving the stream at the start
+
+    Returns:
+        (size, page count), the page count is None if the PDF can't be read
+    """
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(0)
+    try:
+        page_count = count_pages(file)
+    except Exception as e:
+        logger.info(f"Could not count pages for routing: {str(e)}")
+        page_count = None
+    finally:
+        file.seek(0)
+    return size, page_count
+
+
+def choose_queue(size: int, page_count: Optional[int]) -> str:
+    """Queue for a job: LARGE_QUEUE past either size threshold, else SMALL_QUEUE"""
+    if size >= settings.LARGE_JOB_BYTES:
+        return settings.LARGE_QUEUE
+    if page_count is not None and page_count >= settings.LARGE_JOB_PAGES:
+        return settings.LARGE_QUEUE
+    return settings.SMALL_QUEUE
+
+
+def inflight(user_id: str) -> int:
+    """Jobs of a user that were submitted and haven't finished"""
+    count = get_redis().get(f"{INFLIGHT_KEY_PREFIX}{user_id}")
+    return max(int(count), 0) if count is not None else 0
+
+
+def acquire_slot(task_id: str, user_id: str) -> int:
+    """
+    Count a job as in flight for its user
+
+    Both keys expire after INFLIGHT_TTL so jobs lost with a crashed worker
+    don't count against the user forever.
+
+    Returns:
+        The Redis priority to publish the job with
+    """
+    pipe = get_redis().pipeline()
+    pipe.incr(f"{INFLIGHT_KEY_PREFIX}{user_id}")
+    pipe.expire(f"{INFLIGHT_KEY_PREFIX}{user_id}", settings.INFLIGHT_TTL)
+    pipe.set(f"{INFLIGHT_TASK_PREFIX}{task_id}", user_id, ex=settings.INFLIGHT_TTL)
+    count = pipe.execute()[0]
+    return min(max(count - 1, 0), PRIORITY_STEPS[-1])
+
+
+def release_slot(task_id: str) -> None:
+    """Stop counting a finished job; jobs that were never counted are ignored"""
+    client = get_redis()
+    user_id = client.getdel(f"{INFLIGHT_TASK_PREFIX}{task_id}")
+    if user_id is None:
+        return
+    key = f"{INFLIGHT_KEY_PREFIX}{user_id.decode('utf-8')}"
+    if client.decr(key) <= 0:
+        client.delete(key)
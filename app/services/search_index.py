@@ -0,0 +1,230 @@
+"""
+Full-text search over parsed documents
+
+When SEARCH_INDEX_ENABLED is set, every successful parse of an upload with a
+file_id is queued for indexing (index_search_document_task on SEARCH_QUEUE)
+and its markdown written to a SQLite FTS5 index at SEARCH_INDEX_PATH, one row
+per user_id/file_id; a re-parse of the same file replaces its row. The API
+answers /search from the same file, so the indexing worker and the API must
+share the volume it lives on. SQLite allows a single writer: run one worker
+on SEARCH_QUEUE. WAL mode lets the API read while it writes; searches use
+read-only connections, so they never take the write lock.
+
+Queries are plain terms and "quoted phrases", all of which must occur;
+matches are ranked by BM25 and returned with a highlighted snippet.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+SNIPPET_START = "<mark>"
+SNIPPET_END = "</mark>"
+SNIPPET_ELLIPSIS = "…"
+SNIPPET_TOKENS = 24  # tokens of context per snippet, at most 64
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS documents (
+        id INTEGER PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        file_id TEXT NOT NULL,
+        task_id TEXT NOT NULL,
+        indexed_at REAL NOT NULL,
+        UNIQUE (user_id, file_id)
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+        content, owner, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+)
+
+# Rank by the content alone; owner only narrows a search to one user's documents
+_RANK = "bm25(documents_fts, 1.0, 0.0)"
+
+_TERMS = re.compile(r'"([^"]*)"|(\S+)')
+
+
+class InvalidSearchQueryError(Exception):
+    """Raised when a search query has no terms"""
+    pass
+
+
+def match_expression(query: str) -> str:
+    """
+    FTS5 MATCH expression requiring every term and "quoted phrase" of a query
+
+    Terms are quoted so FTS5 operators and punctuation in the query are
+    searched for literally.
+
+    Raises:
+        InvalidSearchQueryError: If the query has no terms
+    """
+    terms = []
+    for phrase, word in _TERMS.findall(query):
+        term = (phrase or word).strip()
+        if term:
+            terms.append('"' + term.replace('"', '""') + '"')
+    if not terms:
+        raise InvalidSearchQueryError("Search query has no terms")
+    return " ".join(terms)
+
+
+def owner_token(user_id: str) -> str:
+    """Single-token form of a user_id for the FTS5 owner column"""
+    return "u" + hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:32]
+
+
+class SearchIndex:
+    """SQLite FTS5 index of parsed markdown keyed by user_id/file_id"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.SEARCH_INDEX_PATH
+        self._local = threading.local()
+
+    def _writer(self) -> sqlite3.Connection:
+        """This thread's read-write connection; the schema is created on first use"""
+        connection = getattr(self._local, "writer", None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=settings.SEARCH_INDEX_TIMEOUT, isolation_level=None)
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            # Only take the write lock when there is a schema to create
+            if connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'documents_fts'").fetchone() is None:
+                with connection:
+                    connection.execute("BEGIN IMMEDIATE")
+                    for statement in _SCHEMA:
+                        connection.execute(statement)
+            self._local.writer = connection
+        return connection
+
+    def _reader(self) -> sqlite3.Connection:
+        """
+        This thread's read-only connection, so searches never contend for
+        the write lock; the index is created first if it doesn't exist yet
+        """
+        connection = getattr(self._local, "reader", None)
+        if connection is None:
+            if not os.path.exists(self.path):
+                self._writer()
+            connection = sqlite3.connect(
+                f"file:{self.path}?mode=ro", uri=True, timeout=settings.SEARCH_INDEX_TIMEOUT, isolation_level=None
+            )
+            self._local.reader = connection
+        return connection
+
+    def upsert(self, user_id: str, file_id: str, task_id: str, content: str) -> None:
+        """Index a document's markdown, replacing what was indexed for it before"""
+        connection = self._writer()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT id FROM documents WHERE user_id = ? AND file_id = ?", (user_id, file_id)
+            ).fetchone()
+            if row is None:
+                doc_id = connection.execute(
+                    "INSERT INTO documents (user_id, file_id, task_id, indexed_at) VALUES (?, ?, ?, ?)",
+                    (user_id, file_id, task_id, time.time())
+                ).lastrowid
+            else:
+                doc_id = row[0]
+                connection.execute(
+                    "UPDATE documents SET task_id = ?, indexed_at = ? WHERE id = ?", (task_id, time.time(), doc_id)
+                )
+                connection.execute("DELETE FROM documents_fts WHERE rowid = ?", (doc_id,))
+            connection.execute(
+                "INSERT INTO documents_fts (rowid, content, owner) VALUES (?, ?, ?)",
+                (doc_id, content, owner_token(user_id))
+            )
+
+    def delete(self, user_id: str, file_id: str) -> bool:
+        """Remove a document from the index; False if it wasn't indexed"""
+        connection = self._writer()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT id FROM documents WHERE user_id = ? AND file_id = ?", (user_id, file_id)
+            ).fetchone()
+            if row is None:
+                return False
+            connection.execute("DELETE FROM documents_fts WHERE rowid = ?", row)
+            connection.execute("DELETE FROM documents WHERE id = ?", row)
+        return True
+
+    def search(
+        self, query: str, user_id: Optional[str] = None, offset: int = 0, limit: int = 20
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        A page of the documents matching a query, best match first
+
+        Snippets are only built for the documents of the page.
+
+        Args:
+            query: Terms and "quoted phrases" that must all occur
+            user_id: Only search this user's documents
+            offset: Matches to skip
+            limit: Matches to return
+
+        Returns:
+            (total number of matches, hits with user_id, file_id, task_id,
+            indexed_at, score and snippet)
+
+        Raises:
+            InvalidSearchQueryError: If the query has no terms
+        """
+        expression = f"content : ({match_expression(query)})"
+        if user_id is not None:
+            # Filtering inside FTS5 ranks only the user's matches instead of all of them
+            expression = f'owner : "{owner_token(user_id)}" AND {expression}'
+        connection = self._reader()
+
+        (total,) = connection.execute(
+            "SELECT count(*) FROM documents_fts WHERE documents_fts MATCH ?", (expression,)
+        ).fetchone()
+        if total <= offset:
+            return total, []
+
+        rows = connection.execute(
+            f"""
+            SELECT d.user_id, d.file_id, d.task_id, d.indexed_at, page.score,
+                   snippet(documents_fts, 0, ?, ?, ?, ?)
+            FROM (
+                SELECT rowid AS id, {_RANK} AS score FROM documents_fts WHERE documents_fts MATCH ?
+                ORDER BY score LIMIT ? OFFSET ?
+            ) AS page
+            JOIN documents d ON d.id = page.id
+            JOIN documents_fts ON documents_fts.rowid = page.id
+            WHERE documents_fts MATCH ?
+            ORDER BY page.score
+            """,
+            (SNIPPET_START, SNIPPET_END, SNIPPET_ELLIPSIS, SNIPPET_TOKENS, expression, limit, offset, expression)
+        ).fetchall()
+        return total, [
+            {
+                "user_id": user_id,
+                "file_id": file_id,
+                "task_id": task_id,
+                "indexed_at": indexed_at,
+                # bm25() is lower for better matches
+                "score": -rank,
+                "snippet": snippet,
+            }
+            for user_id, file_id, task_id, indexed_at, rank, snippet in rows
+        ]
+
+    def count(self) -> int:
+        (total,) = self._reader().execute("SELECT count(*) FROM documents").fetchone()
+        return total
@@ -0,0 +1,259 @@
+"""
+Near-duplicate detection over parsed documents with MinHash and LSH
+
+When SIMILARITY_INDEX_ENABLED is set, the markdown of every successful parse
+of an upload with a file_id is reduced to a MinHash signature of its word
+SIMILARITY_SHINGLE_SIZE-grams. The share of positions at which two
+signatures agree estimates the Jaccard similarity of the documents' shingle
+sets. Signatures are fixed-width arrays of SIMILARITY_SIGNATURE_SIZE
+unsigned 32-bit integers (512 bytes at 128), so a class of thousands of
+submissions takes a few MB.
+
+Signatures use one permutation hashing with rotation densification
+(Shrivastava & Li, 2014): each shingle is hashed once into one of the
+signature's bins, each bin keeps its minimum and empty bins borrow from the
+next non-empty one. That is one pass over the shingles instead of one per
+position, which matters for long documents in pure Python, with the same
+estimator and LSH behaviour as classic MinHash.
+
+Locality-sensitive hashing splits each signature into SIMILARITY_BANDS
+bands and files the document under one bucket per band. Documents sharing
+a bucket are candidates; only candidates' signatures are compared, so a
+lookup reads a handful of buckets instead of every document. With 16 bands
+of 8 rows a pair at similarity 0.8 shares a bucket with probability 0.92,
+one at 0.5 with probability 0.06.
+
+Signatures and buckets are kept in Redis per user_id (a class or grader),
+like the document index, and don't expire. The key prefix includes the
+shingle size, signature size and bands, so changing them starts a new index.
+"""
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import hashlib
+import re
+
+from app.config import settings
+from app.services.redis_client import get_redis
+
+MAX_HASH = (1 << 32) - 1
+# Added (times the distance) to values borrowed by empty bins, so they can't match a bin's own minimum
+DENSIFY_OFFSET = 0x9E3779B9
+SIGNATURE_TYPECODE = "I"  # unsigned 32-bit
+
+_WORDS = re.compile(r"\w+")
+
+
+def _hash64(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def shingles(content: str, size: int) -> set:
+    """
+    64-bit hashes of the word ``size``-grams of a text, case-insensitive and
+    ignoring punctuation and markdown syntax; a text shorter than ``size``
+    words is one shingle
+    """
+    words = _WORDS.findall(content.lower())
+    if not words:
+        return set()
+    if len(words) <= size:
+        return {_hash64(" ".join(words))}
+    return {_hash64(" ".join(words[i:i + size])) for i in range(len(words) - size + 1)}
+
+
+def minhash(hashes: Iterable[int], size: int) -> Optional[array]:
+    """
+    Densified one-permutation MinHash signature of a set of 64-bit hashes
+
+    The low bits of a hash pick its bin, the high 32 bits are its value.
+
+    Returns:
+        ``size`` unsigned 32-bit values, or None for an empty set
+    """
+    minima: List[Optional[int]] = [None] * size
+    for h in hashes:
+        position = h % size
+        value = h >> 32
+        current = minima[position]
+        if current is None or value < current:
+            minima[position] = value
+
+    if all(value is None for value in minima):
+        return None
+    signature = array(SIGNATURE_TYPECODE, bytes(4 * size))
+    for position in range(size):
+        distance = 0
+        while minima[(position + distance) % size] is None:
+            distance += 1
+        signature[position] = (minima[(position + distance) % size] + distance * DENSIFY_OFFSET) & MAX_HASH
+    return signature
+
+
+def estimate_similarity(first: array, second: array) -> float:
+    """Estimated Jaccard similarity: the share of positions at which the signatures agree"""
+    return sum(x == y for x, y in zip(first, second)) / len(first)
+
+
+class SimilarityIndex:
+    """
+    MinHash signatures and LSH buckets of documents per user_id/file_id
+    """
+
+    def __init__(
+        self,
+        shingle_size: Optional[int] = None,
+        signature_size: Optional[int] = None,
+        bands: Optional[int] = None
+    ):
+        self.shingle_size = shingle_size or settings.SIMILARITY_SHINGLE_SIZE
+        self.signature_size = signature_size or settings.SIMILARITY_SIGNATURE_SIZE
+        self.bands = bands or settings.SIMILARITY_BANDS
+        if self.signature_size % self.bands:
+            raise ValueError(f"Signatures of {self.signature_size} values can't be split into {self.bands} equal bands")
+        self.rows = self.signature_size // self.bands
+        self.prefix = f"pdfsim:k{self.shingle_size}:s{self.signature_size}:b{self.bands}:"
+
+    def signature_of(self, content: str) -> Optional[array]:
+        """MinHash signature of a document's markdown; None if it has no words"""
+        return minhash(shingles(content, self.shingle_size), self.signature_size)
+
+    def _signatures_key(self, user_id: str) -> str:
+        return f"{self.prefix}sig:{user_id}"
+
+    def _bucket_keys(self, user_id: str, signature: array) -> List[str]:
+        """One bucket key per band, named after a hash of the band's rows"""
+        data = signature.tobytes()
+        width = self.rows * signature.itemsize
+        return [
+            f"{self.prefix}band:{user_id}:{band}:"
+            + hashlib.blake2b(data[band * width:(band + 1) * width], digest_size=8).hexdigest()
+            for band in range(self.bands)
+        ]
+
+    def _decode(self, value: Optional[bytes]) -> Optional[array]:
+        if value is None:
+            return None
+        signature = array(SIGNATURE_TYPECODE)
+        signature.frombytes(value)
+        return signature
+
+    def signature(self, user_id: str, file_id: str) -> Optional[array]:
+        return self._decode(get_redis().hget(self._signatures_key(user_id), file_id))
+
+    def add(self, user_id: str, file_id: str, content: str) -> bool:
+        """
+        Index a document's markdown, replacing its previous signature
+
+        Returns:
+            False if the markdown has no words to compare (nothing is indexed)
+        """
+        signature = self.signature_of(content)
+        if signature is None:
+            self.remove(user_id, file_id)
+            return False
+        signatures_key = self._signatures_key(user_id)
+
+        def update(pipe) -> None:
+            previous = self._decode(pipe.hget(signatures_key, file_id))
+            pipe.multi()
+            if previous is not None:
+                for key in self._bucket_keys(user_id, previous):
+                    pipe.srem(key, file_id)
+            pipe.hset(signatures_key, file_id, signature.tobytes())
+            for key in self._bucket_keys(user_id, signature):
+                pipe.sadd(key, file_id)
+
+        get_redis().transaction(update, signatures_key)
+        return True
+
+    def remove(self, user_id: str, file_id: str) -> bool:
+        """Drop a document from the index; False if it wasn't indexed"""
+        signatures_key = self._signatures_key(user_id)
+        removed = False
+
+        def update(pipe) -> None:
+            nonlocal removed
+            previous = self._decode(pipe.hget(signatures_key, file_id))
+            if previous is None:
+                return
+            pipe.multi()
+            for key in self._bucket_keys(user_id, previous):
+                pipe.srem(key, file_id)
+            pipe.hdel(signatures_key, file_id)
+            removed = True
+
+        get_redis().transaction(update, signatures_key)
+        return removed
+
+    def count(self, user_id: str) -> int:
+        return get_redis().hlen(self._signatures_key(user_id))
+
+    def similar_many(
+        self, user_id: str, file_ids: Sequence[str], threshold: Optional[float] = None
+    ) -> Dict[str, List[Tuple[str, float]]]:
+        """
+        Likely near-duplicates of several of a user's documents among all of
+        that user's documents
+
+        Three Redis round trips regardless of the number of documents: their
+        signatures, their buckets' members, the candidates' signatures.
+
+        Returns:
+            For each indexed file_id, (other file_id, estimated similarity)
+            pairs at or above the threshold, most similar first; file_ids
+            that aren't indexed are left out
+        """
+        if threshold is None:
+            threshold = settings.SIMILARITY_THRESHOLD
+        client = get_redis()
+        signatures_key = self._signatures_key(user_id)
+        file_ids = list(dict.fromkeys(file_ids))
+        if not file_ids:
+            return {}
+
+        signatures = {
+            file_id: signature
+            for file_id, signature in zip(file_ids, map(self._decode, client.hmget(signatures_key, file_ids)))
+            if signature is not None
+        }
+        if not signatures:
+            return {}
+
+        pipe = client.pipeline(transaction=False)
+        for signature in signatures.values():
+            for key in self._bucket_keys(user_id, signature):
+                pipe.smembers(key)
+        members = pipe.execute()
+
+        candidates: Dict[str, set] = {}
+        for n, file_id in enumerate(signatures):
+            found = set().union(*members[n * self.bands:(n + 1) * self.bands])
+            found.discard(file_id.encode("utf-8"))
+            candidates[file_id] = {member.decode("utf-8") for member in found}
+
+        others = sorted(set().union(*candidates.values()) - signatures.keys())
+        if others:
+            signatures.update(
+                (file_id, signature)
+                for file_id, signature in zip(others, map(self._decode, client.hmget(signatures_key, others)))
+                if signature is not None
+            )
+
+        results = {}
+        for file_id in candidates:
+            scored = []
+            for other in candidates[file_id]:
+                if other not in signatures:
+                    continue
+                similarity = estimate_similarity(signatures[file_id], signatures[other])
+                if similarity >= threshold:
+                    scored.append((other, similarity))
+            scored.sort(key=lambda item: (-item[1], item[0]))
+            results[file_id] = scored
+        return results
+
+    def similar(
+        self, user_id: str, file_id: str, threshold: Optional[float] = None
+    ) -> Optional[List[Tuple[str, float]]]:
+        """Likely near-duplicates of one document; None if it isn't indexed"""
+        return self.similar_many(user_id, [file_id], threshold).get(file_id)
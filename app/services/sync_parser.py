@@ -0,0 +1,153 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+import asyncio
+import logging
+import multiprocessing
+import threading
+
+from app.config import settings
+from app.services.converter import warm_up
+from app.services.pdf_parser import PDFParserService
+
+logger = logging.getLogger(__name__)
+
+# Parser kept warm in each pool process, created by _init_worker
+_parser: Optional[PDFParserService] = None
+
+
+def _init_worker() -> None:
+    global _parser
+    _parser = PDFParserService()
+    warm_up()
+
+
+def _parse_in_worker(file_data: bytes) -> str:
+    return _parser.parse_pdf_content(file_data)
+
+
+class SyncParserBusyError(Exception):
+    """Raised when every parser process is busy and the wait queue is full"""
+    pass
+
+
+class SyncParserUnavailableError(Exception):
+    """Raised when the parser pool is shut down or its processes died"""
+    pass
+
+
+class SyncParseTimeoutError(Exception):
+    """Raised when a parse takes longer than the per-request timeout"""
+    pass
+
+
+class SyncParserPool:
+    """
+    Bounded process pool for parsing PDFs inside the API process
+
+    At most ``workers`` PDFs are parsed at once and at most ``queue_size``
+    more wait for a process; anything beyond that is rejected right away
+    instead of piling up. Each process keeps one PDFParserService warm. A
+    parse can't be interrupted inside its process, so on a timeout the pool
+    is recycled: its processes are killed, which frees the timed-out slot
+    and fails the other parses running in it with
+    SyncParserUnavailableError, and the next parse starts a fresh pool.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.SYNC_PARSE_WORKERS,
+        queue_size: int = settings.SYNC_PARSE_QUEUE_SIZE,
+        timeout: float = settings.SYNC_PARSE_TIMEOUT,
+    ):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Parses running or waiting for a process"""
+        return self._in_flight
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that runs an event loop and threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return self._executor
+
+    def _release(self, future: Future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def _submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        with self._lock:
+            if self._in_flight >= self.workers + self.queue_size:
+                raise SyncParserBusyError(
+                    f"All {self.workers} parser processes are busy and {self.queue_size} requests are waiting"
+                )
+            try:
+                future = self._get_executor().submit(fn, *args)
+            except (BrokenProcessPool, RuntimeError) as e:
+                raise SyncParserUnavailableError(f"Parser pool unavailable: {str(e)}") from e
+            self._in_flight += 1
+        future.add_done_callback(self._release)
+        return future
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        future = self._submit(fn, *args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            # A parse still waiting for a process is simply dropped
+            if not future.cancel():
+                self._recycle()
+            raise SyncParseTimeoutError(f"Parsing did not finish within {self.timeout} seconds")
+        except BrokenProcessPool as e:
+            # A crashed process breaks the whole pool; start a fresh one next time
+            with self._lock:
+                if self._executor is not None and self._executor._broken:
+                    self._executor.shutdown(wait=False, cancel_futures=True)
+                    self._executor = None
+            raise SyncParserUnavailableError(f"Parser process died: {str(e)}") from e
+
+    def _recycle(self) -> None:
+        """Kill the pool's processes so a runaway parse stops using CPU and memory"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        # The executor can't cancel running calls; terminating its processes
+        # breaks it, which fails their futures and releases their slots
+        for process in list(executor._processes.values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+        logger.warning("Recycled the sync parser pool after a parse timed out")
+
+    async def parse(self, file_data: bytes) -> str:
+        """
+        Parse a PDF in a pool process without blocking the event loop
+
+        Returns:
+            Parsed markdown content
+
+        Raises:
+            SyncParserBusyError: If the pool and its wait queue are full
+            SyncParserUnavailableError: If the pool can't run the parse
+            SyncParseTimeoutError: If parsing exceeds the timeout
+            PDFParsingError: If the PDF can't be parsed
+        """
+        return await self._run(_parse_in_worker, file_data)
+
+    def shutdown(self) -> None:
+        """Stop the pool processes, dropping queued parses"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
@@ -0,0 +1,209 @@
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+import http.client
+import ipaddress
+import json
+import logging
+import socket
+import urllib.request
+
+from app.config import settings
+from app.models import TaskStatus
+from app.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+EVENT_CHANNEL_PREFIX = "pdfevents:"
+WEBHOOK_KEY_PREFIX = "pdfwebhook:"
+WEBHOOK_TTL = 7 * 24 * 3600  # callbacks for tasks that never finish are dropped after a week
+
+TERMINAL_STATUSES = {TaskStatus.SUCCESS, TaskStatus.FAILED}
+
+
+def event_channel(task_id: str) -> str:
+    """Redis pub/sub channel carrying status changes of one task"""
+    return f"{EVENT_CHANNEL_PREFIX}{task_id}"
+
+
+def publish_task_event(task_id: str, status: TaskStatus) -> None:
+    """Announce a task status change to /events subscribers"""
+    try:
+        get_redis().publish(event_channel(task_id), json.dumps({"task_id": task_id, "status": status.value}))
+    except Exception as e:
+        # Subscribers fall back to polling, so a lost event only delays them
+        logger.warning(f"Failed to publish event for task {task_id}: {str(e)}")
+
+
+class WebhookTargetError(ValueError):
+    """Raised when a callback URL points at a host webhooks may not be sent to"""
+    pass
+
+
+def _host_allowed(host: str) -> bool:
+    """Whether a host is listed in WEBHOOK_ALLOWED_HOSTS (".example.com" also matches its subdomains)"""
+    host = host.lower().rstrip(".")
+    for entry in settings.WEBHOOK_ALLOWED_HOSTS:
+        if host == entry or (entry.startswith(".") and host.endswith(entry)):
+            return True
+    return False
+
+
+def _public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def resolve_webhook_host(host: str, port: int) -> List[Tuple[int, int, int, Tuple[Any, ...]]]:
+    """
+    Resolve a webhook host, refusing hosts that aren't allowed
+
+    A host listed in WEBHOOK_ALLOWED_HOSTS may resolve anywhere. When the
+    list isn't empty, no other host is allowed; when it is, any host whose
+    addresses are all public is (no loopback, private, link-local, shared,
+    reserved, multicast or unspecified address, so webhooks can't reach the
+    service's own network or cloud metadata endpoints).
+
+    Returns:
+        (family, type, proto, sockaddr) of each address to connect to
+
+    Raises:
+        WebhookTargetError: If the host isn't allowed or doesn't resolve
+    """
+    if _host_allowed(host):
+        trusted = True
+    elif settings.WEBHOOK_ALLOWED_HOSTS:
+        raise WebhookTargetError(f"callback_url host {host} is not in WEBHOOK_ALLOWED_HOSTS")
+    else:
+        trusted = False
+    try:
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError) as e:
+        raise WebhookTargetError(f"callback_url host {host} can't be resolved: {str(e)}")
+    if not infos:
+        raise WebhookTargetError(f"callback_url host {host} can't be resolved")
+    if not trusted:
+        for _, _, _, _, sockaddr in infos:
+            if not _public_address(sockaddr[0]):
+                raise WebhookTargetError(f"callback_url host {host} resolves to non-public address {sockaddr[0]}")
+    return [(family, kind, proto, sockaddr) for family, kind, proto, _, sockaddr in infos]
+
+
+def validate_callback_url(url: str) -> str:
+    """
+    Check that a webhook URL is an absolute http(s) URL of an allowed host
+
+    Raises:
+        ValueError: If the URL can't be used as a webhook (WebhookTargetError
+            if its host isn't allowed)
+    """
+    parsed = urlparse(url)
+    try:
+        port = parsed.port
+    except ValueError:
+        port = None
+        parsed = parsed._replace(netloc="")
+    if parsed.scheme not in ("http", "https") or not parsed.netloc or not parsed.hostname:
+        raise ValueError("callback_url must be an absolute http(s) URL")
+    resolve_webhook_host(parsed.hostname, port or (443 if parsed.scheme == "https" else 80))
+    return url
+
+
+def _connect(host: str, port: int, timeout: Optional[float], source_address=None) -> socket.socket:
+    """
+    Connect to one of the addresses the host was checked against, so a DNS
+    answer that changes between the check and the connection can't redirect it
+    """
+    error: Optional[OSError] = None
+    for family, kind, proto, sockaddr in resolve_webhook_host(host, port):
+        sock = socket.socket(family, kind, proto)
+        try:
+            if timeout is not None:
+                sock.settimeout(timeout)
+            if source_address:
+                sock.bind(source_address)
+            sock.connect(sockaddr)
+            return sock
+        except OSError as e:
+            error = e
+            sock.close()
+    raise error
+
+
+class _WebhookHTTPConnection(http.client.HTTPConnection):
+    def connect(self):
+        self.sock = _connect(self.host, self.port, self.timeout, self.source_address)
+
+
+class _WebhookHTTPSConnection(http.client.HTTPSConnection):
+    def connect(self):
+        sock = _connect(self.host, self.port, self.timeout, self.source_address)
+        self.sock = self._context.wrap_socket(sock, server_hostname=self.host)
+
+
+class _WebhookHTTPHandler(urllib.request.HTTPHandler):
+    def http_open(self, req):
+        return self.do_open(_WebhookHTTPConnection, req)
+
+
+class _WebhookHTTPSHandler(urllib.request.HTTPSHandler):
+    def https_open(self, req):
+        return self.do_open(_WebhookHTTPSConnection, req, context=self._context)
+
+
+# No proxies: they would make the connection on our behalf, past the address checks.
+# Redirects go through the same handlers, so their targets are checked too.
+_webhook_opener = urllib.request.build_opener(
+    urllib.request.ProxyHandler({}), _WebhookHTTPHandler, _WebhookHTTPSHandler
+)
+
+
+def post_webhook(url: str, payload: Dict[str, Any], timeout: float) -> int:
+    """
+    POST a JSON payload to a callback URL, connecting only to allowed hosts
+
+    Returns:
+        The HTTP status of the response
+
+    Raises:
+        ValueError: If the URL can't be used as a webhook (WebhookTargetError
+            if its host isn't allowed)
+        OSError: If the request fails
+    """
+    validate_callback_url(url)
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    with _webhook_opener.open(request, timeout=timeout) as response:
+        return response.status
+
+
+def webhook_payload(task_id: str, status: TaskStatus, error: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Body POSTed to a task's callback URL
+
+    Only the outcome and where to fetch the result, not the markdown: the
+    receiver reads it from /task/{task_id}, which also keeps results out of
+    the logs of whatever sits between the worker and the receiver.
+    """
+    return {
+        "task_id": task_id,
+        "status": status.value,
+        "error": error,
+        "links": {"result": f"/task/{task_id}"},
+    }
+
+
+def register_webhook(task_id: str, url: str) -> None:
+    """Remember the callback URL to notify once the task finishes"""
+    get_redis().set(f"{WEBHOOK_KEY_PREFIX}{task_id}", url, ex=WEBHOOK_TTL)
+
+
+def pop_webhook(task_id: str) -> Optional[str]:
+    """Return and forget the callback URL registered for a task"""
+    url = get_redis().getdel(f"{WEBHOOK_KEY_PREFIX}{task_id}")
+    return url.decode("utf-8") if url is not None else None
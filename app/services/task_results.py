@@ -0,0 +1,136 @@
+from typing import Any, List, Optional, Tuple
+import logging
+
+from celery import Celery, states
+from celery.backends.base import KeyValueStoreBackend
+from starlette.concurrency import run_in_threadpool
+import redis.asyncio
+
+from app.models import ParseResult, TaskStatus
+from app.services.redis_client import get_async_redis
+from app.services.result_store import ResultExpiredError, unpack_content
+
+logger = logging.getLogger(__name__)
+
+
+def to_parse_result(task_id: str, state: str, result: Any, include_content: bool = True) -> ParseResult:
+    """
+    Map a Celery task state and result onto the API's ParseResult
+    
+    Compressed or offloaded content is restored unless include_content is False.
+    page_offsets are the UTF-8 byte offsets of the pages in the content.
+    """
+    if state == states.SUCCESS:
+        task_result = result or {}
+        failed = task_result.get("status") == "failed"
+        error = task_result.get("error")
+        content = None
+        if include_content:
+            try:
+                content = unpack_content(task_result)
+            except ResultExpiredError as e:
+                failed = True
+                error = str(e)
+        return ParseResult(
+            task_id=task_id,
+            status=TaskStatus.FAILED if failed else TaskStatus.SUCCESS,
+            content=content,
+            user_id=task_result.get("user_id") or "",
+            file_id=task_result.get("file_id"),
+            error=error,
+            page_offsets=task_result.get("page_offsets")
+        )
+    elif state == states.FAILURE:
+        return ParseResult(
+            task_id=task_id,
+            status=TaskStatus.FAILED,
+            content=None,
+            user_id="",
+            file_id=None,
+            error=str(result)
+        )
+    elif state == states.PENDING:
+        return ParseResult(
+            task_id=task_id,
+            status=TaskStatus.PENDING,
+            content=None,
+            user_id="",
+            file_id=None,
+            error=None
+        )
+    else:
+        return ParseResult(
+            task_id=task_id,
+            status=TaskStatus.PROCESSING,
+            content=None,
+            user_id="",
+            file_id=None,
+            error=None
+        )
+
+
+def _decode_states(backend: KeyValueStoreBackend, values: List[Optional[bytes]]) -> List[Tuple[str, Any]]:
+    task_states = []
+    for value in values:
+        if value is None:
+            task_states.append((states.PENDING, None))
+            continue
+        meta = backend.decode_result(value)
+        task_states.append((meta["status"], meta["result"]))
+    return task_states
+
+
+def fetch_task_states(celery_app: Celery, task_ids: List[str]) -> List[Tuple[str, Any]]:
+    """
+    Read the state and result of many tasks with a single MGET
+
+    Returns:
+        (state, result) per task id, in the order given; unknown tasks are PENDING
+    """
+    if not task_ids:
+        return []
+
+    backend = celery_app.backend
+    keys = [backend.get_key_for_task(task_id) for task_id in task_ids]
+    return _decode_states(backend, backend.client.mget(keys))
+
+
+async def fetch_task_states_async(
+    client: redis.asyncio.Redis, celery_app: Celery, task_ids: List[str]
+) -> List[Tuple[str, Any]]:
+    """
+    fetch_task_states() over an asyncio client, without blocking the event loop
+
+    Celery's own AsyncResult reads state and result in separate blocking
+    round trips; this is one MGET for any number of tasks.
+    """
+    if not task_ids:
+        return []
+
+    backend = celery_app.backend
+    keys = [backend.get_key_for_task(task_id) for task_id in task_ids]
+    return _decode_states(backend, await client.mget(keys))
+
+
+def has_offloaded_content(state: str, result: Any) -> bool:
+    """Whether to_parse_result() has to read the content from the result blob store"""
+    return state == states.SUCCESS and isinstance(result, dict) and bool(result.get("content_blob"))
+
+
+async def read_task_results(celery_app: Celery, task_ids: List[str], include_content: bool = True) -> List[ParseResult]:
+    """
+    ParseResults of many tasks, read with one MGET on the shared async pool
+
+    Content offloaded to the result blob store is read in the threadpool.
+    """
+    task_states = await fetch_task_states_async(get_async_redis(), celery_app, task_ids)
+
+    def convert() -> List[ParseResult]:
+        return [
+            to_parse_result(task_id, state, result, include_content)
+            for task_id, (state, result) in zip(task_ids, task_states)
+        ]
+
+    if include_content and any(has_offloaded_content(state, result) for state, result in task_states):
+        return await run_in_threadpool(convert)
+    return convert()
@@ -0,0 +1,96 @@
+from typing import BinaryIO, Optional
+from fastapi import UploadFile
+import hashlib
+import tempfile
+
+from app.config import settings
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds the configured maximum size"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        super().__init__(f"File too large. Maximum size: {max_size // (1024*1024)}MB")
+
+
+class SpooledUpload:
+    """
+    Upload copied into a spooled temporary file
+
+    Small uploads stay in memory; anything above the spool threshold is
+    written to a temporary file, so holding a SpooledUpload costs at most
+    ``UPLOAD_SPOOL_THRESHOLD`` bytes of memory.
+    """
+
+    def __init__(self, file: BinaryIO, size: int, content_hash: str):
+        self.file = file
+        self.size = size
+        self.content_hash = content_hash
+
+    def read(self) -> bytes:
+        """Read the whole upload into memory (only for small files)"""
+        self.file.seek(0)
+        data = self.file.read()
+        self.file.seek(0)
+        return data
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> "SpooledUpload":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+async def spool_upload(
+    upload: UploadFile,
+    max_size: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    spool_threshold: Optional[int] = None,
+) -> SpooledUpload:
+    """
+    Read an upload in chunks, enforcing the size limit and hashing as we go
+
+    Args:
+        upload: Incoming multipart file
+        max_size: Maximum accepted size in bytes (default: MAX_FILE_SIZE)
+        chunk_size: Bytes read per chunk (default: UPLOAD_CHUNK_SIZE)
+        spool_threshold: Bytes kept in memory before spilling to disk
+            (default: UPLOAD_SPOOL_THRESHOLD)
+
+    Returns:
+        SpooledUpload positioned at the start of the content
+
+    Raises:
+        UploadTooLargeError: As soon as the upload is known to exceed max_size
+    """
+    max_size = max_size if max_size is not None else settings.MAX_FILE_SIZE
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+    spool_threshold = spool_threshold if spool_threshold is not None else settings.UPLOAD_SPOOL_THRESHOLD
+
+    # The multipart parser already knows the part size; reject before copying
+    if upload.size is not None and upload.size > max_size:
+        raise UploadTooLargeError(max_size)
+
+    spool = tempfile.SpooledTemporaryFile(max_size=spool_threshold)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_size:
+                raise UploadTooLargeError(max_size)
+            digest.update(chunk)
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+
+    spool.seek(0)
+    return SpooledUpload(spool, size, digest.hexdigest())
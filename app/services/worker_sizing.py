@@ -0,0 +1,92 @@
+"""
+Size the Celery worker pool from the container's CPU and memory limits
+
+Parsing is CPU-bound, so a pool larger than the CPU quota only adds memory
+and context switches; one smaller than the quota leaves paid-for CPU idle.
+Each pool process also holds a converter and the PDF being parsed, so the
+memory limit caps the pool as well.
+"""
+from typing import Optional
+import math
+import os
+
+from app.config import settings
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+# cgroup v1 reports "no limit" as a huge page-aligned number
+_UNLIMITED_MEMORY = 1 << 60
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cpu_limit(root: str = CGROUP_ROOT) -> float:
+    """
+    CPUs this process may use: the cgroup quota if any, else the CPU affinity
+    """
+    quota = period = None
+    cpu_max = _read(os.path.join(root, "cpu.max"))  # cgroup v2: "<quota|max> <period>"
+    if cpu_max:
+        fields = cpu_max.split()
+        if fields[0] != "max" and len(fields) == 2:
+            quota, period = int(fields[0]), int(fields[1])
+    else:
+        v1_quota = _read(os.path.join(root, "cpu", "cpu.cfs_quota_us"))
+        v1_period = _read(os.path.join(root, "cpu", "cpu.cfs_period_us"))
+        if v1_quota and v1_period and int(v1_quota) > 0:
+            quota, period = int(v1_quota), int(v1_period)
+
+    available = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    if quota and period:
+        return min(quota / period, available)
+    return float(available)
+
+
+def memory_limit(root: str = CGROUP_ROOT) -> Optional[int]:
+    """Memory limit of the cgroup in bytes, or None when unlimited"""
+    value = _read(os.path.join(root, "memory.max"))  # cgroup v2
+    if value is None:
+        value = _read(os.path.join(root, "memory", "memory.limit_in_bytes"))
+    if not value or value == "max":
+        return None
+    limit = int(value)
+    return None if limit >= _UNLIMITED_MEMORY else limit
+
+
+def auto_concurrency(
+    cpus: float,
+    memory: Optional[int],
+    process_memory: int = settings.WORKER_PROCESS_MEMORY
+) -> int:
+    """
+    Pool size for the given limits
+
+    One process per whole CPU (at least one), and no more processes than fit
+    in the memory limit after reserving one share for the worker parent.
+    """
+    concurrency = max(int(math.floor(cpus)), 1)
+    if memory is not None and process_memory > 0:
+        concurrency = min(concurrency, memory // process_memory - 1)
+    return max(concurrency, 1)
+
+
+def resolve_concurrency(value: str = settings.WORKER_CONCURRENCY, root: str = CGROUP_ROOT) -> int:
+    """
+    Worker concurrency: WORKER_CONCURRENCY when set to a number, otherwise
+    ("auto") derived from the cgroup limits
+
+    Raises:
+        ValueError: If the value is neither "auto" nor a positive integer
+    """
+    if value.strip().lower() == "auto":
+        return auto_concurrency(cpu_limit(root), memory_limit(root))
+    concurrency = int(value)
+    if concurrency < 1:
+        raise ValueError(f"WORKER_CONCURRENCY must be positive, got {value}")
+    return concurrency
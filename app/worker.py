@@ -1,10 +1,65 @@
-from celery import Celery
-from markitdown import MarkItDown
-from typing import Dict, Any
+from celery import Celery, chord, group, states
+from celery.exceptions import TimeLimitExceeded, WorkerLostError
+from celery.result import GroupResult
+from kombu import Queue
+from celery.signals import (
+    before_task_publish,
+    task_failure,
+    task_postrun,
+    task_prerun,
+    worker_init,
+    worker_process_init,
+    worker_process_shutdown,
+    worker_ready,
+    worker_shutdown,
+)
+from typing import Dict, Any, List, Optional, Tuple, Union, BinaryIO
+import gc
+import hashlib
 import io
 import logging
+import os
+import resource
+import sqlite3
+import time
+import uuid
+
+from prometheus_client import multiprocess, start_http_server
 
 from app.config import settings
+from app.models import TaskStatus
+from app.services import engines, metrics
+from app.services.backlog import record_task_duration, start_worker_heartbeat, unregister_worker
+from app.services.blob_store import BlobNotFoundError, create_blob_store
+from app.services.checkpoints import PageCheckpoints
+from app.services.converter import parser_version, warm_up
+from app.services.page_stream import append_chunk, finish_stream, reset_stream
+from app.services.pdf_pages import (
+    IncrementalMarkdown,
+    PageRange,
+    count_pages,
+    extract_page_range,
+    merge_page_ranges,
+    page_offsets,
+    plan_page_ranges,
+)
+from app.services.result_cache import ResultCache
+from app.services.document_index import DocumentIndex
+from app.services.preflight import PDFMetadata
+from app.services.quarantine import PDFQuarantinedError, crash_guard, is_quarantined
+from app.services.result_store import ResultExpiredError, compressed_content, pack_result, unpack_content
+from app.services.scheduling import PRIORITY_STEPS, acquire_slot, choose_queue, measure_job, release_slot
+from app.services.search_index import SearchIndex
+from app.services.similarity import SimilarityIndex
+from app.services.task_events import (
+    WebhookTargetError,
+    pop_webhook,
+    post_webhook,
+    publish_task_event,
+    register_webhook,
+    webhook_payload,
+)
+from app.services.task_results import to_parse_result
 
 logger = logging.getLogger(__name__)
 
@@ -24,39 +79,897 @@ celery_app.conf.update(
     enable_utc=True,
     worker_prefetch_multiplier=1,  # Important for fair task distribution
     task_acks_late=True,  # Acknowledge tasks after completion
-    worker_max_tasks_per_child=1000,  # Restart worker after 1000 tasks to prevent memory leaks
+    task_reject_on_worker_lost=False,  # Fail tasks whose pool process died rather than redeliver them into a crash loop
+    task_track_started=True,  # Report PROCESSING while a task runs
+    result_expires=settings.RESULT_TTL,  # Offloaded result blobs expire with the same TTL
+    worker_max_tasks_per_child=settings.WORKER_MAX_TASKS_PER_CHILD,  # Restart worker after N tasks to prevent memory leaks
+    worker_max_memory_per_child=settings.WORKER_MAX_MEMORY_PER_CHILD // 1024 or None,  # KiB of RSS before the process is replaced
+    task_soft_time_limit=settings.TASK_SOFT_TIME_LIMIT,  # Raises inside the task so it can fail cleanly
+    task_time_limit=settings.TASK_TIME_LIMIT,  # Kills the pool process if the soft limit didn't stop it
+    # Parse jobs are routed by size; workers without -Q consume small jobs first
+    task_queues=(
+        Queue(settings.SMALL_QUEUE, routing_key=settings.SMALL_QUEUE),
+        Queue('celery', routing_key='celery'),
+        Queue(settings.LARGE_QUEUE, routing_key=settings.LARGE_QUEUE),
+        Queue(settings.SEARCH_QUEUE, routing_key=settings.SEARCH_QUEUE),
+    ),
+    task_routes={
+        'app.worker.parse_pdf_pages_task': {'queue': settings.LARGE_QUEUE},
+        'app.worker.merge_pdf_pages_task': {'queue': settings.LARGE_QUEUE},
+        # SQLite has a single writer; one worker consumes SEARCH_QUEUE
+        'app.worker.index_search_document_task': {'queue': settings.SEARCH_QUEUE},
+    },
+    broker_transport_options={
+        'priority_steps': PRIORITY_STEPS,  # Fair share: priority = jobs the user already has in flight
+        'queue_order_strategy': 'priority',
+    },
 )
 
-# Initialize PDF parser
-md = MarkItDown()
+# Content-addressed markdown cache shared by the API and the workers
+result_cache = ResultCache()
+
+# Shared store for uploads; only blob references go through the broker
+blob_store = create_blob_store()
+
+# Parsed documents per user_id/file_id, with their stored markdown
+document_index = DocumentIndex()
+
+# Full-text index of parsed documents, written by the worker consuming SEARCH_QUEUE
+search_index = SearchIndex()
+
+# MinHash/LSH index of parsed documents per user_id for near-duplicate lookups
+similarity_index = SimilarityIndex()
+
+
+def _indexed(file_id: Optional[str]) -> bool:
+    return settings.DOCUMENT_INDEX_ENABLED and file_id is not None
+
+
+def _cache_key(content_hash: str, engine: Optional[str] = None) -> str:
+    """
+    Result cache key of a document's markdown for the current parser version
+
+    The version covers the requested engine or the engine policy, so output
+    of another engine, policy, PDF library or PARSER_REVISION never answers.
+    """
+    version = hashlib.sha256(parser_version(engine).encode("utf-8")).hexdigest()[:16]
+    return f"{content_hash}:{version}"
+
+
+def complete_from_cache(
+    content_hash: str,
+    user_id: str,
+    file_id: str = None,
+    callback_url: Optional[str] = None,
+    engine: Optional[str] = None,
+    page_count: Optional[int] = None
+) -> Optional[str]:
+    """
+    Answer a submission from stored results without a worker round trip
+    
+    A document whose file_id was parsed before from the same content with
+    the current parser version is answered from the document index; any
+    other upload from the content-addressed result cache. On a hit the
+    result is written straight to the Celery result backend under a fresh
+    task id, so clients fetch it through /task/{task_id} as usual. A
+    callback_url is notified right away. Results of an explicitly requested
+    engine only answer requests for the same engine. page_count, from
+    pre-flight, completes the result's page index.
+    
+    Returns:
+        The completed task id on a hit, otherwise None
+    """
+    if _indexed(file_id):
+        content = document_index.stored_content(user_id, file_id, content_hash, engine)
+        if content is not None:
+            task_id = _complete(content, user_id, file_id, callback_url, page_count)
+            document_index.record_reused(user_id, file_id, task_id)
+            queue_document_indexing(task_id, file_id)
+            return task_id
+    
+    if not settings.CACHE_ENABLED:
+        return None
+    
+    content = result_cache.get(_cache_key(content_hash, engine))
+    if content is None:
+        return None
+    
+    task_id = _complete(content, user_id, file_id, callback_url, page_count)
+    if _indexed(file_id):
+        document_index.record_completed(user_id, file_id, content_hash, task_id, content, engine)
+    queue_document_indexing(task_id, file_id)
+    return task_id
+
+
+def queue_document_indexing(task_id: str, file_id: Optional[str]) -> None:
+    """Queue a successful task's markdown for the search and similarity indexes that are enabled"""
+    if file_id is None:
+        return
+    for enabled, task in (
+        (settings.SEARCH_INDEX_ENABLED, index_search_document_task),
+        (settings.SIMILARITY_INDEX_ENABLED, index_similarity_task),
+    ):
+        if not enabled:
+            continue
+        try:
+            task.delay(task_id)
+        except Exception as e:
+            logger.warning(f"Failed to queue task {task_id} for {task.name}: {str(e)}")
+
+
+def _complete(
+    content: str,
+    user_id: str,
+    file_id: Optional[str],
+    callback_url: Optional[str],
+    page_count: Optional[int] = None
+) -> str:
+    """Store a successful result under a fresh task id and notify the webhook"""
+    task_id = str(uuid.uuid4())
+    task_result = _success_result(content, user_id, file_id, page_count)
+    celery_app.backend.store_result(task_id, task_result, states.SUCCESS)
+    
+    if callback_url:
+        deliver_webhook_task.delay(callback_url, webhook_payload(task_id, TaskStatus.SUCCESS))
+    return task_id
+
+
+def _success_result(
+    content: str,
+    user_id: str,
+    file_id: Optional[str],
+    page_count: Optional[int] = None
+) -> Dict[str, Any]:
+    """Packed result of a successful parse, with the markdown's page offsets"""
+    return pack_result({
+        "status": "success",
+        "content": content,
+        "user_id": user_id,
+        "file_id": file_id,
+        "error": None,
+        "page_offsets": page_offsets(content, page_count or None)
+    })
+
+
+def _hash_stream(file: BinaryIO) -> str:
+    """SHA-256 of a seekable upload, leaving it at the start"""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(settings.UPLOAD_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def _route(file: BinaryIO, metadata: Optional[PDFMetadata]) -> str:
+    """Queue for an upload, from its pre-flight metadata if there is any"""
+    if metadata:
+        return choose_queue(metadata.size, metadata.page_count)
+    return choose_queue(*measure_job(file))
+
+
+def submit_parse_task(
+    file_data: Union[bytes, BinaryIO],
+    user_id: str,
+    file_id: str = None,
+    callback_url: Optional[str] = None,
+    stream: bool = False,
+    metadata: Optional[PDFMetadata] = None,
+    content_hash: Optional[str] = None,
+    engine: Optional[str] = None
+):
+    """
+    Store the upload in the blob store and enqueue a parse task referencing it
+    
+    The task goes to the small or large queue by size and page count, with a
+    priority that puts the user's earlier in-flight jobs first in line.
+    
+    Args:
+        file_data: PDF as bytes or a binary file-like object (streamed in chunks)
+        callback_url: Optional webhook notified with the result when the task finishes
+        stream: Publish the markdown page by page for /task/{task_id}/stream
+        metadata: Pre-flight metadata of the upload; routes the job without
+            re-reading the PDF and is passed on to the task
+        content_hash: SHA-256 of the upload for the document index, computed
+            here if not given
+        engine: Extraction engine to use instead of the automatic choice
+        
+    Returns:
+        The AsyncResult of the submitted task
+    """
+    stream_data = io.BytesIO(file_data) if isinstance(file_data, bytes) else file_data
+    queue = _route(stream_data, metadata)
+    if _indexed(file_id) and content_hash is None:
+        content_hash = _hash_stream(stream_data)
+    if isinstance(file_data, bytes):
+        blob_key = blob_store.put(file_data)
+    else:
+        blob_key = blob_store.put_stream(file_data)
+    options = {}
+    if stream:
+        options["stream"] = True
+    if metadata:
+        options["metadata"] = metadata.to_dict()
+    if engine:
+        options["engine"] = engine
+    task_id = str(uuid.uuid4())
+    try:
+        # Register the webhook before publishing so a fast worker can't miss it
+        if callback_url:
+            register_webhook(task_id, callback_url)
+        if _indexed(file_id):
+            document_index.record_submission(user_id, file_id, content_hash, task_id, engine)
+        priority = acquire_slot(task_id, user_id)
+        return parse_pdf_blob_task.apply_async(
+            (blob_key, user_id, file_id),
+            options or None,
+            task_id=task_id,
+            queue=queue,
+            priority=priority
+        )
+    except Exception:
+        release_slot(task_id)
+        blob_store.delete(blob_key)
+        raise
+
+
+def submit_parse_batch(
+    files: List[Tuple[BinaryIO, str, Optional[str], Optional[PDFMetadata]]],
+    user_id: str,
+    callback_url: Optional[str] = None,
+    engine: Optional[str] = None
+) -> GroupResult:
+    """
+    Submit many uploads as one batch
+    
+    Cached files complete immediately; the rest are stored in the blob store
+    and dispatched together as a Celery group.
+    
+    Args:
+        files: (file stream, content hash, file_id, pre-flight metadata) per upload
+        callback_url: Optional webhook notified once per file as it finishes
+        engine: Extraction engine for every file instead of the automatic choice
+        
+    Returns:
+        A GroupResult saved in the result backend, listing every file's task
+        in upload order
+    """
+    task_ids: List[Optional[str]] = []
+    signatures = []
+    blob_keys = []
+    try:
+        for stream, content_hash, file_id, metadata in files:
+            cached_task_id = complete_from_cache(
+                content_hash, user_id, file_id, callback_url, engine, metadata.page_count if metadata else None
+            )
+            if cached_task_id:
+                task_ids.append(cached_task_id)
+                continue
+            queue = _route(stream, metadata)
+            blob_key = blob_store.put_stream(stream)
+            blob_keys.append(blob_key)
+            signature = parse_pdf_blob_task.s(
+                blob_key, user_id, file_id, metadata=metadata.to_dict() if metadata else None, engine=engine
+            )
+            task_id = signature.freeze().id
+            if callback_url:
+                register_webhook(task_id, callback_url)
+            if _indexed(file_id):
+                document_index.record_submission(user_id, file_id, content_hash, task_id, engine)
+            signature.set(queue=queue, priority=acquire_slot(task_id, user_id))
+            signatures.append(signature)
+            task_ids.append(None)
+        
+        dispatched = group(signatures).apply_async() if signatures else None
+    except Exception:
+        for signature in signatures:
+            release_slot(signature.id)
+        for blob_key in blob_keys:
+            blob_store.delete(blob_key)
+        raise
+    
+    dispatched_ids = iter([result.id for result in dispatched.results] if dispatched else [])
+    results = [celery_app.AsyncResult(task_id or next(dispatched_ids)) for task_id in task_ids]
+    
+    batch = GroupResult(str(uuid.uuid4()), results, app=celery_app)
+    batch.save()
+    return batch
+
+
+def parse_pdf_bytes(
+    file_data: bytes,
+    user_id: str,
+    file_id: str = None,
+    engine: Optional[str] = None,
+    metadata: Optional[PDFMetadata] = None
+) -> Dict[str, Any]:
+    """
+    Parse PDF bytes to markdown, going through the result cache
+    
+    The extraction engine is the requested one, or else chosen from the
+    document's traits by engines.select_engine(). Documents of more than
+    CHECKPOINT_PAGES pages are converted in checkpointed page ranges, so the
+    next parse of the same content resumes where the last attempt stopped.
+    """
+    try:
+        content_hash = ResultCache.content_hash(file_data)
+        cache_key = _cache_key(content_hash, engine)
+        # The API already counted this upload's lookup
+        content = result_cache.get(cache_key, record=False) if settings.CACHE_ENABLED else None
+        page_count = metadata.page_count if metadata else _page_count(file_data)
+        
+        if content is None:
+            convert_start = time.perf_counter()
+            checkpoints = None
+            if settings.CHECKPOINT_PAGES and page_count > settings.CHECKPOINT_PAGES:
+                checkpoints = PageCheckpoints(content_hash, page_count)
+            progress = (lambda: checkpoints.saved) if checkpoints else None
+            with crash_guard(content_hash, progress), metrics.timed(metrics.CONVERT_SECONDS, mode="whole"):
+                content = engines.convert(file_data, metadata, engine, checkpoints)
+            metrics.observe_conversion("whole", time.perf_counter() - convert_start, len(file_data), page_count)
+            
+            if settings.CACHE_ENABLED:
+                result_cache.set(cache_key, content)
+        
+        return _success_result(content, user_id, file_id, page_count)
+        
+    except Exception as e:
+        logger.error(f"PDF parsing failed: {str(e)}")
+        metrics.record_failure("parse", e)
+        return {
+            "status": "failed",
+            "content": None,
+            "user_id": user_id,
+            "file_id": file_id,
+            "error": str(e)
+        }
 
 
 @celery_app.task
-def parse_pdf_task(file_data: bytes, user_id: str, file_id: str = None) -> Dict[str, Any]:
+def parse_pdf_task(file_data: bytes, user_id: str, file_id: str = None, engine: Optional[str] = None) -> Dict[str, Any]:
     """
     Parse PDF content to markdown
+    
+    Carries the whole PDF in the broker message; the API enqueues
+    parse_pdf_blob_task instead.
     """
+    return parse_pdf_bytes(file_data, user_id, file_id, engine)
+
+
+def _page_count(file_data: bytes) -> int:
+    """Page count for metrics; 0 if the catalog can't be read"""
     try:
-        # Convert bytes to stream
-        file_stream = io.BytesIO(file_data)
+        return count_pages(file_data)
+    except Exception:
+        return 0
+
+
+def plan_split(file_data: bytes, content_hash: str, page_count: Optional[int] = None) -> Optional[List[PageRange]]:
+    """
+    Decide whether a PDF should be parsed as parallel page ranges
+    
+    Args:
+        page_count: Page count from pre-flight, read from the PDF if not given
+    
+    Returns:
+        Page ranges to fan out, or None to parse the document in one go
+    """
+    if not settings.PAGE_SPLIT_THRESHOLD:
+        return None
+    if settings.CACHE_ENABLED and result_cache.contains(_cache_key(content_hash)):
+        return None
+    
+    if page_count is None:
+        try:
+            page_count = count_pages(file_data)
+        except Exception as e:
+            # Let the regular conversion path report broken documents
+            logger.warning(f"Could not count pages, parsing without splitting: {str(e)}")
+            return None
+    
+    if page_count <= settings.PAGE_SPLIT_THRESHOLD:
+        return None
+    return plan_page_ranges(page_count, settings.PAGE_SPLIT_SIZE)
+
+
+def parse_pdf_streaming(
+    task_id: str,
+    file_data: bytes,
+    content_hash: str,
+    user_id: str,
+    file_id: str = None
+) -> Dict[str, Any]:
+    """
+    Parse a PDF in page order, appending settled markdown to the task's stream
+    
+    The returned result holds the regular whole-document markdown. For
+    documents without form-like pages it equals the concatenated stream.
+    """
+    reset_stream(task_id)
+    try:
+        content = result_cache.get(_cache_key(content_hash), record=False) if settings.CACHE_ENABLED else None
+        page_count = None
+        
+        if content is None:
+            ranges = []
+            markdown = IncrementalMarkdown()
+            convert_start = time.perf_counter()
+            with crash_guard(content_hash), metrics.timed(metrics.CONVERT_SECONDS, mode="stream"):
+                page_count = count_pages(file_data)
+                for start, end in plan_page_ranges(page_count, settings.STREAM_CHUNK_PAGES):
+                    page_range = extract_page_range(file_data, start, end)
+                    ranges.append(page_range)
+                    append_chunk(task_id, markdown.feed("".join(page["text"] for page in page_range["pages"])))
+                append_chunk(task_id, markdown.finish())
+                content = merge_page_ranges(ranges)
+            metrics.observe_conversion("stream", time.perf_counter() - convert_start, len(file_data), page_count)
+            
+            if settings.CACHE_ENABLED:
+                result_cache.set(_cache_key(content_hash), content)
+        else:
+            # One entry per page, like a live parse, rather than the whole document at once
+            data = content.encode("utf-8")
+            offsets = page_offsets(content) or [0, len(data)]
+            for start, end in zip(offsets, offsets[1:]):
+                append_chunk(task_id, data[start:end].decode("utf-8"))
         
-        # Parse using MarkItDown
-        result = md.convert_stream(file_stream)
+        finish_stream(task_id, "success")
+        return _success_result(content, user_id, file_id, page_count or _page_count(file_data))
         
+    except Exception as e:
+        logger.error(f"PDF parsing failed: {str(e)}")
+        metrics.record_failure("stream", e)
+        finish_stream(task_id, "failed", str(e))
         return {
-            "status": "success",
-            "content": result.text_content,
+            "status": "failed",
+            "content": None,
             "user_id": user_id,
             "file_id": file_id,
-            "error": None
+            "error": str(e)
+        }
+
+
+@celery_app.task(bind=True)
+def parse_pdf_blob_task(
+    self,
+    blob_key: str,
+    user_id: str,
+    file_id: str = None,
+    stream: bool = False,
+    metadata: Optional[Dict[str, Any]] = None,
+    engine: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Parse a PDF stored in the blob store to markdown
+    
+    The blob is deleted once parsing finishes. If the worker dies mid-task the
+    blob is left in place for the redelivered task and expires via its TTL.
+    Documents above PAGE_SPLIT_THRESHOLD pages are replaced by a chord of
+    page-range tasks whose merge step inherits this task's id. Streaming
+    tasks are never split, since their pages have to be produced in order.
+    metadata is the upload's pre-flight metadata, if the API collected it.
+    A requested engine parses the whole document with that engine; split
+    and streamed tasks always render like MarkItDown.
+    """
+    try:
+        file_data = blob_store.get(blob_key)
+    except BlobNotFoundError as e:
+        logger.error(f"PDF parsing failed: {str(e)}")
+        metrics.record_failure("fetch", e)
+        return {
+            "status": "failed",
+            "content": None,
+            "user_id": user_id,
+            "file_id": file_id,
+            "error": "Uploaded file expired before it could be parsed"
+        }
+    
+    content_hash = ResultCache.content_hash(file_data)
+    if is_quarantined(content_hash):
+        blob_store.delete(blob_key)
+        error = PDFQuarantinedError()
+        metrics.record_failure("parse", error)
+        return {
+            "status": "failed",
+            "content": None,
+            "user_id": user_id,
+            "file_id": file_id,
+            "error": str(error)
         }
+    
+    if stream:
+        try:
+            return parse_pdf_streaming(self.request.id, file_data, content_hash, user_id, file_id)
+        finally:
+            blob_store.delete(blob_key)
+    
+    preflight = PDFMetadata.from_dict(metadata)
+    page_ranges = None if engine else plan_split(file_data, content_hash, preflight.page_count if preflight else None)
+    if page_ranges:
+        logger.info(f"Splitting {blob_key} into {len(page_ranges)} page ranges")
+        return self.replace(split_parse(blob_key, content_hash, user_id, file_id, page_ranges))
+    
+    try:
+        return parse_pdf_bytes(file_data, user_id, file_id, engine, preflight)
+    finally:
+        blob_store.delete(blob_key)
+
+
+def split_parse(
+    blob_key: str,
+    content_hash: str,
+    user_id: str,
+    file_id: Optional[str],
+    page_ranges: List[PageRange]
+) -> chord:
+    """
+    Chord parsing the page ranges of a blob in parallel and merging them
+
+    If a page range fails the merge step never runs; its error callback
+    fails the document and cleans up in its place.
+    """
+    merge = merge_pdf_pages_task.s(blob_key, content_hash, user_id, file_id)
+    merge.link_error(fail_split_parse_task.s(blob_key, user_id, file_id))
+    return chord(
+        [parse_pdf_pages_task.s(blob_key, start, end, content_hash) for start, end in page_ranges],
+        merge
+    )
+
+
+@celery_app.task
+def parse_pdf_pages_task(blob_key: str, start: int, end: int, content_hash: str = None) -> Dict[str, Any]:
+    """
+    Extract pages [start, end) of a blob for merge_pdf_pages_task
+    """
+    file_data = blob_store.get(blob_key)
+    convert_start = time.perf_counter()
+    with crash_guard(content_hash or ResultCache.content_hash(file_data)):
+        with metrics.timed(metrics.CONVERT_SECONDS, mode="pages"):
+            page_range = extract_page_range(file_data, start, end)
+    metrics.observe_conversion("pages", time.perf_counter() - convert_start, 0, end - start)
+    return page_range
+
+
+@celery_app.task
+def merge_pdf_pages_task(
+    ranges: List[Dict[str, Any]],
+    blob_key: str,
+    content_hash: str,
+    user_id: str,
+    file_id: str = None
+) -> Dict[str, Any]:
+    """
+    Merge page-range results in page order into the document's markdown
+    """
+    try:
+        content = merge_page_ranges(ranges)
+        
+        if settings.CACHE_ENABLED:
+            result_cache.set(_cache_key(content_hash), content)
+        
+        return _success_result(content, user_id, file_id, sum(len(r["pages"]) for r in ranges))
         
     except Exception as e:
         logger.error(f"PDF parsing failed: {str(e)}")
+        metrics.record_failure("merge", e)
         return {
             "status": "failed",
             "content": None,
             "user_id": user_id,
             "file_id": file_id,
             "error": str(e)
-        } 
\ No newline at end of file
+        }
+    finally:
+        blob_store.delete(blob_key)
+
+
+@celery_app.task
+def fail_split_parse_task(request, exc, traceback, blob_key: str, user_id: str, file_id: str = None) -> None:
+    """
+    Error callback of a split parse whose page range failed
+
+    Celery calls it in the worker that saw the failure, with the request of
+    the merge step, which carries the document's task id. It fails the
+    document and runs the task_postrun hooks the merge step would have
+    triggered (user slot, events, webhook, document index), then deletes
+    the blob.
+    """
+    task_id = request.id
+    try:
+        logger.error(f"PDF parsing failed: {str(exc)}")
+        metrics.record_failure("merge", exc)
+        # The chord marks the failure too, but only after its error callbacks return
+        celery_app.backend.mark_as_failure(task_id, exc)
+        task_postrun.send(
+            sender=merge_pdf_pages_task,
+            task_id=task_id,
+            task=merge_pdf_pages_task,
+            args=(),
+            kwargs={},
+            retval=exc,
+            state=states.FAILURE
+        )
+    finally:
+        blob_store.delete(blob_key)
+
+
+@celery_app.task(
+    autoretry_for=(Exception,),
+    dont_autoretry_for=(WebhookTargetError,),
+    retry_backoff=True,
+    retry_kwargs={"max_retries": settings.WEBHOOK_MAX_RETRIES}
+)
+def deliver_webhook_task(url: str, payload: Dict[str, Any]) -> int:
+    """
+    POST a task's outcome to a client's callback URL, retrying with backoff
+
+    The host is checked again here, against the addresses actually connected
+    to, since its DNS may have changed since the URL was accepted.
+    """
+    return post_webhook(url, payload, settings.WEBHOOK_TIMEOUT)
+
+
+def _indexable_result(task_id: str) -> Optional[Tuple[str, str, str]]:
+    """
+    (user_id, file_id, markdown) of a successful task submitted with a
+    file_id, read from the result backend; None for any other task
+    """
+    meta = celery_app.backend.get_task_meta(task_id)
+    result = meta.get("result")
+    if meta.get("status") != states.SUCCESS or not isinstance(result, dict) or result.get("status") != "success":
+        return None
+    if not result.get("file_id"):
+        return None
+    try:
+        content = unpack_content(result)
+    except ResultExpiredError:
+        logger.warning(f"Result of task {task_id} expired before it was indexed")
+        return None
+    return result["user_id"], result["file_id"], content or ""
+
+
+@celery_app.task(
+    autoretry_for=(sqlite3.OperationalError,),
+    retry_backoff=True,
+    retry_kwargs={"max_retries": 5}
+)
+def index_search_document_task(task_id: str) -> bool:
+    """
+    Write a finished task's markdown into the search index under its user_id/file_id
+
+    The markdown is read from the result backend, so only the task id goes
+    through the broker.
+
+    Returns:
+        False if the task didn't succeed, has no file_id or its result expired
+    """
+    document = _indexable_result(task_id)
+    if document is None:
+        return False
+    user_id, file_id, content = document
+    search_index.upsert(user_id, file_id, task_id, content)
+    return True
+
+
+@celery_app.task
+def index_similarity_task(task_id: str) -> bool:
+    """
+    Add a finished task's MinHash signature to its user's near-duplicate index
+
+    Returns:
+        False if the task didn't succeed, has no file_id, its result expired
+        or its markdown has no words
+    """
+    document = _indexable_result(task_id)
+    if document is None:
+        return False
+    user_id, file_id, content = document
+    return similarity_index.add(user_id, file_id, content)
+
+
+@worker_init.connect
+def preload_pdf_converter(**kwargs):
+    """
+    Warm the PDF converter in the worker parent before the pool forks
+    
+    Children (including the ones replacing recycled processes) inherit the
+    imported modules and converter copy-on-write instead of loading them
+    again. gc.freeze() keeps the collector from touching, and so copying,
+    those inherited objects.
+    """
+    warm_up()
+    gc.freeze()
+
+
+@worker_init.connect
+def start_metrics_server(**kwargs):
+    """Expose worker metrics on WORKER_METRICS_PORT (0 disables)"""
+    if settings.WORKER_METRICS_PORT:
+        start_http_server(settings.WORKER_METRICS_PORT, registry=metrics.metrics_registry())
+
+
+# Stops the backlog heartbeat of this worker on shutdown
+_heartbeat_stop = None
+
+
+@worker_ready.connect
+def announce_worker(sender=None, **kwargs):
+    """Register this worker's pool size for the backlog drain estimate"""
+    global _heartbeat_stop
+    queues = list(sender.app.amqp.queues.consume_from)
+    _heartbeat_stop = start_worker_heartbeat(sender.hostname, sender.controller.concurrency, queues)
+
+
+@worker_shutdown.connect
+def retire_worker(sender=None, **kwargs):
+    """Stop counting this worker's slots as soon as it shuts down"""
+    if _heartbeat_stop is not None:
+        _heartbeat_stop.set()
+    try:
+        unregister_worker(sender.hostname)
+    except Exception as e:
+        logger.warning(f"Failed to unregister worker: {str(e)}")
+
+
+@worker_process_init.connect
+def limit_child_memory(**kwargs):
+    """
+    Cap each pool process's address space at WORKER_CHILD_MEMORY_LIMIT
+    
+    A runaway parse then fails with MemoryError in its own process instead
+    of getting the whole pod OOM-killed.
+    """
+    if settings.WORKER_CHILD_MEMORY_LIMIT:
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (settings.WORKER_CHILD_MEMORY_LIMIT, hard))
+
+
+@worker_process_shutdown.connect
+def release_process_metrics(pid=None, **kwargs):
+    """Drop a recycled pool process's live gauges in multiprocess mode"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+@before_task_publish.connect
+def stamp_enqueue_time(headers=None, **kwargs):
+    """Record when a task was published, for the queue wait metric"""
+    if headers is not None:
+        headers["enqueued_at"] = time.time()
+
+
+# Start times of running tasks in this process, for the task duration metric
+_task_started: Dict[str, float] = {}
+
+
+@task_prerun.connect
+def record_task_start(task_id=None, task=None, **kwargs):
+    """Observe how long the task waited in the queue"""
+    if task is None:
+        return
+    _task_started[task_id] = time.perf_counter()
+    enqueued_at = getattr(task.request, "enqueued_at", None)
+    if enqueued_at:
+        metrics.QUEUE_WAIT_SECONDS.labels(task=task.name).observe(max(0.0, time.time() - enqueued_at))
+
+
+@task_postrun.connect
+def record_task_end(task_id=None, task=None, retval=None, state=None, **kwargs):
+    """Observe task run time, labelled by outcome, and keep it for the backlog estimate"""
+    start = _task_started.pop(task_id, None)
+    if task is None or start is None:
+        return
+    if state == states.SUCCESS:
+        failed = isinstance(retval, dict) and retval.get("status") == "failed"
+        outcome = "failed" if failed else "success"
+    elif state == states.FAILURE:
+        outcome = "error"
+        if isinstance(retval, BaseException):
+            metrics.record_failure("task", retval)
+    else:
+        outcome = (state or "unknown").lower()
+    elapsed = time.perf_counter() - start
+    metrics.TASK_SECONDS.labels(task=task.name, outcome=outcome).observe(elapsed)
+    delivery_info = task.request.delivery_info or {}
+    try:
+        record_task_duration(elapsed, delivery_info.get("routing_key") or celery_app.conf.task_default_queue)
+    except Exception as e:
+        logger.warning(f"Failed to record task duration: {str(e)}")
+
+
+# Tasks whose id is the one clients track; page-range subtasks are internal
+CLIENT_FACING_TASKS = {parse_pdf_task.name, parse_pdf_blob_task.name, merge_pdf_pages_task.name}
+
+
+@task_prerun.connect
+def announce_task_started(task_id=None, task=None, **kwargs):
+    """Publish PROCESSING when a client-facing task starts"""
+    if task is not None and task.name in CLIENT_FACING_TASKS:
+        publish_task_event(task_id, TaskStatus.PROCESSING)
+
+
+@task_postrun.connect
+def release_user_slot(task_id=None, task=None, state=None, **kwargs):
+    """Stop counting a finished job against its user's fair share"""
+    if task is None or task.name not in CLIENT_FACING_TASKS:
+        return
+    # Replaced tasks (page-range fan-out) finish as IGNORED; the merge task releases instead
+    if state not in (states.SUCCESS, states.FAILURE):
+        return
+    try:
+        release_slot(task_id)
+    except Exception as e:
+        logger.warning(f"Failed to release in-flight slot of task {task_id}: {str(e)}")
+
+
+@task_postrun.connect
+def index_finished_document(task_id=None, task=None, retval=None, state=None, **kwargs):
+    """Store the markdown of a finished task submitted with a file_id in the document index"""
+    if not settings.DOCUMENT_INDEX_ENABLED or task is None or task.name not in CLIENT_FACING_TASKS:
+        return
+    # Replaced tasks (page-range fan-out) finish as IGNORED; the merge task records instead
+    if state not in (states.SUCCESS, states.FAILURE):
+        return
+    
+    try:
+        result = to_parse_result(task_id, state, retval, include_content=False)
+        compressed = None
+        if result.status == TaskStatus.SUCCESS:
+            compressed = compressed_content(retval)
+        document_index.record_result(task_id, result.status.value, compressed, result.error)
+    except Exception as e:
+        logger.warning(f"Failed to index result of task {task_id}: {str(e)}")
+
+
+@task_postrun.connect
+def index_finished_markdown(task_id=None, task=None, retval=None, state=None, **kwargs):
+    """Queue the markdown of a successful task submitted with a file_id for the search and similarity indexes"""
+    if task is None or task.name not in CLIENT_FACING_TASKS:
+        return
+    if state != states.SUCCESS or not isinstance(retval, dict) or retval.get("status") != "success":
+        return
+    queue_document_indexing(task_id, retval.get("file_id"))
+
+
+@task_postrun.connect
+def announce_task_finished(task_id=None, task=None, retval=None, state=None, **kwargs):
+    """Publish the final status and notify the webhook when a client-facing task finishes"""
+    if task is None or task.name not in CLIENT_FACING_TASKS:
+        return
+    # Replaced tasks (page-range fan-out) finish as IGNORED; the merge task reports instead
+    if state not in (states.SUCCESS, states.FAILURE):
+        return
+    
+    result = to_parse_result(task_id, state, retval, include_content=False)
+    publish_task_event(task_id, result.status)
+    
+    try:
+        callback_url = pop_webhook(task_id)
+        if callback_url:
+            deliver_webhook_task.delay(callback_url, webhook_payload(task_id, result.status, result.error))
+    except Exception as e:
+        logger.error(f"Failed to schedule webhook for task {task_id}: {str(e)}")
+
+
+@task_failure.connect
+def finish_killed_task(sender=None, task_id=None, exception=None, **kwargs):
+    """
+    Run the task_postrun hooks of a task whose pool process was killed
+
+    When a task hits TASK_TIME_LIMIT or its process dies (WorkerLostError,
+    e.g. RLIMIT_AS or the OOM killer), the worker's main process marks it
+    failed and sends task_failure, but task_postrun never fires. Without
+    this the user slot, the document index entry and the webhook would
+    wait for a task_postrun that never comes.
+    """
+    if sender is None or not isinstance(exception, (TimeLimitExceeded, WorkerLostError)):
+        return
+    task_postrun.send(
+        sender=sender,
+        task_id=task_id,
+        task=sender,
+        args=(),
+        kwargs={},
+        retval=exception,
+        state=states.FAILURE
+    )
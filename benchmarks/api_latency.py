@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Measure end-to-end API latency percentiles against a running service.
+
+--requests corpus documents are uploaded to POST /parse with --concurrency
+clients; each client then polls /task/{task_id} until the task finishes.
+Reported are the upload latency (until /parse answers) and the end-to-end
+latency (until the markdown is available), as p50/p90/p95/p99 in ms. Every
+upload gets a unique trailer comment so the result cache isn't hit.
+
+Needs the API and at least one worker running (e.g. docker compose up) and
+httpx (a dev dependency). Per-user rate limits apply to the benchmark user;
+429 responses are counted as rejected.
+
+Usage:
+    python -m benchmarks.api_latency --url http://localhost:8000 --requests 100 --concurrency 8
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import statistics
+import time
+import uuid
+
+import httpx
+
+from benchmarks.corpus import DEFAULT_PROFILES, PROFILES, build_corpus
+
+
+def percentiles(samples: list) -> dict:
+    """p50/p90/p95/p99 and max of latencies in seconds, reported in ms"""
+    if not samples:
+        return {}
+    if len(samples) == 1:
+        cuts = samples * 99
+    else:
+        cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "p50_ms": round(cuts[49] * 1000, 1),
+        "p90_ms": round(cuts[89] * 1000, 1),
+        "p95_ms": round(cuts[94] * 1000, 1),
+        "p99_ms": round(cuts[98] * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+    }
+
+
+async def _one_request(client: httpx.AsyncClient, data: bytes, user_id: str, poll_interval: float) -> dict:
+    payload = data + f"\n% {uuid.uuid4()}\n".encode()
+    start = time.perf_counter()
+    response = await client.post(
+        "/parse",
+        params={"user_id": user_id},
+        files={"file": ("bench.pdf", payload, "application/pdf")},
+    )
+    uploaded = time.perf_counter()
+    if response.status_code == 429:
+        return {"outcome": "rejected"}
+    response.raise_for_status()
+
+    task_id = response.json()["task_id"]
+    while True:
+        result = (await client.get(f"/task/{task_id}")).json()
+        if result["status"] in ("success", "failed"):
+            break
+        await asyncio.sleep(poll_interval)
+    return {
+        "outcome": result["status"],
+        "upload_s": uploaded - start,
+        "total_s": time.perf_counter() - start,
+    }
+
+
+async def _run(url: str, corpus: list, requests: int, concurrency: int, poll_interval: float) -> dict:
+    jobs = itertools.islice(itertools.cycle(corpus), requests)
+    semaphore = asyncio.Semaphore(concurrency)
+    user_id = f"bench-{uuid.uuid4().hex[:8]}"
+
+    async with httpx.AsyncClient(base_url=url, timeout=600) as client:
+        async def limited(data):
+            async with semaphore:
+                return await _one_request(client, data, user_id, poll_interval)
+
+        start = time.perf_counter()
+        samples = await asyncio.gather(*(limited(data) for _, data in jobs))
+        elapsed = time.perf_counter() - start
+
+    done = [sample for sample in samples if sample["outcome"] != "rejected"]
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "succeeded": sum(1 for sample in done if sample["outcome"] == "success"),
+        "failed": sum(1 for sample in done if sample["outcome"] == "failed"),
+        "rejected": len(samples) - len(done),
+        "seconds": round(elapsed, 3),
+        "requests_per_s": round(len(done) / elapsed, 3),
+        "upload": percentiles([sample["upload_s"] for sample in done]),
+        "end_to_end": percentiles([sample["total_s"] for sample in done]),
+    }
+
+
+def run(url: str, profiles, requests: int, concurrency: int, poll_interval: float = 0.05, seed: int = 0) -> dict:
+    """Latency summary of one load run"""
+    return asyncio.run(_run(url, build_corpus(profiles, seed), requests, concurrency, poll_interval))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--profiles", nargs="+", default=DEFAULT_PROFILES, choices=list(PROFILES))
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--poll-interval", type=float, default=0.05, help="Seconds between /task polls")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.url, args.profiles, args.requests, args.concurrency, args.poll_interval, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
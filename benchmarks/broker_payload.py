@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Compare broker memory and enqueue latency of shipping raw PDF bytes through
+Celery (parse_pdf_task) against enqueueing a blob reference (parse_pdf_blob_task).
+
+Messages are published to a throwaway queue that no worker consumes, measured,
+and then removed together with their blobs. Requires the Redis at REDIS_URL.
+
+Usage:
+    python -m benchmarks.broker_payload --sizes 0.1 1 10 --count 20
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+import uuid
+
+import redis
+
+from app.services.redis_client import get_redis
+from app.worker import blob_store, parse_pdf_blob_task, parse_pdf_task
+
+
+def _used_memory(client):
+    try:
+        return int(client.info("memory")["used_memory"])
+    except redis.ResponseError:
+        # Some Redis-compatible servers don't implement INFO
+        return None
+
+
+def _queue_bytes(client, queue: str) -> int:
+    """Total serialized size of the messages sitting in a queue"""
+    return sum(len(message) for message in client.lrange(queue, 0, -1))
+
+
+def run_case(mode: str, payload: bytes, count: int) -> dict:
+    client = get_redis()
+    queue = f"bench-broker-{uuid.uuid4().hex}"
+    blob_keys = []
+    latencies = []
+
+    memory_before = _used_memory(client)
+    try:
+        for _ in range(count):
+            start = time.perf_counter()
+            if mode == "raw":
+                parse_pdf_task.apply_async(args=(payload, "bench", None), queue=queue)
+            else:
+                blob_key = blob_store.put(payload)
+                blob_keys.append(blob_key)
+                parse_pdf_blob_task.apply_async(args=(blob_key, "bench", None), queue=queue)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        queue_bytes = _queue_bytes(client, queue)
+        memory_after = _used_memory(client)
+    finally:
+        client.delete(queue)
+        for blob_key in blob_keys:
+            blob_store.delete(blob_key)
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "payload_bytes": len(payload),
+        "count": count,
+        "enqueue_ms_mean": round(statistics.mean(latencies), 3),
+        "enqueue_ms_p95": round(latencies[int(0.95 * (len(latencies) - 1))], 3),
+        "broker_bytes_per_message": queue_bytes // count,
+        "redis_used_memory_delta": (
+            memory_after - memory_before if memory_before is not None else None
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=float, nargs="+", default=[0.1, 1, 10], help="Payload sizes in MB")
+    parser.add_argument("--count", type=int, default=20, help="Messages per case")
+    args = parser.parse_args()
+
+    for size_mb in args.sizes:
+        payload = b"%PDF-1.4\n" + os.urandom(int(size_mb * 1024 * 1024))
+        for mode in ("raw", "blob"):
+            print(json.dumps(run_case(mode, payload, args.count)))
+
+
+if __name__ == "__main__":
+    main()
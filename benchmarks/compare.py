@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Compare two benchmark reports written by benchmarks.suite and flag
+regressions.
+
+Throughput metrics regress when they drop, memory and latency metrics when
+they grow, by more than --threshold (relative). Prints one JSON row per
+metric present in both reports and exits with status 1 if anything
+regressed, so it can gate CI.
+
+Usage:
+    python -m benchmarks.compare baseline.json current.json --threshold 0.1
+"""
+import argparse
+import json
+import sys
+
+# (section, row key, metric, higher is better)
+METRICS = [
+    ("parse", "profile", "pages_per_s", True),
+    ("parse", "profile", "mb_per_s", True),
+    ("parse", "profile", "peak_rss_mb", False),
+    ("parse", "profile", "parse_rss_mb", False),
+    ("workers", "concurrency", "docs_per_s", True),
+    ("workers", "concurrency", "pages_per_s", True),
+]
+API_METRICS = [("upload", "p95_ms"), ("end_to_end", "p50_ms"), ("end_to_end", "p95_ms"), ("end_to_end", "p99_ms")]
+
+
+def _rows(report: dict, section: str, key: str) -> dict:
+    return {row[key]: row for row in report.get(section, [])}
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """One row per metric present in both reports"""
+    pairs = []
+    for section, key, metric, higher_is_better in METRICS:
+        old_rows, new_rows = _rows(baseline, section, key), _rows(current, section, key)
+        for name in old_rows.keys() & new_rows.keys():
+            pairs.append((f"{section}.{name}.{metric}", old_rows[name][metric], new_rows[name][metric], higher_is_better))
+    if "api" in baseline and "api" in current:
+        for group, metric in API_METRICS:
+            old, new = baseline["api"][group].get(metric), current["api"][group].get(metric)
+            if old is not None and new is not None:
+                pairs.append((f"api.{group}.{metric}", old, new, False))
+
+    rows = []
+    for name, old, new, higher_is_better in sorted(pairs):
+        change = (new - old) / old if old else 0.0
+        worse = -change if higher_is_better else change
+        rows.append({
+            "metric": name,
+            "baseline": old,
+            "current": new,
+            "change": round(change, 4),
+            "regression": worse > threshold,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change counted as a regression")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    rows = compare(baseline, current, args.threshold)
+    print(json.dumps({
+        "baseline": baseline.get("meta", {}).get("commit"),
+        "current": current.get("meta", {}).get("commit"),
+        "metrics": rows,
+    }, indent=2))
+    sys.exit(1 if any(row["regression"] for row in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Synthetic PDF corpus for the benchmarks
+
+Each profile fixes page count, text density (lines per page, words per
+line), table rows and embedded image bytes per page; images are incompressible
+grayscale bitmaps, so they also control the file size. Documents are built
+deterministically from a seed, so the same commit always benchmarks the same
+bytes.
+
+Usage:
+    python -m benchmarks.corpus --out bench-corpus
+    python -m benchmarks.corpus --out bench-corpus --profiles text-1p tables-10p
+"""
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Tuple
+import argparse
+import json
+import os
+import random
+
+_WORDS = (
+    "student answer question score rubric grade points total section page "
+    "the a of and to in is that for with as on by this be are from or"
+).split()
+
+
+@dataclass(frozen=True)
+class Profile:
+    name: str
+    pages: int
+    lines_per_page: int = 40
+    words_per_line: int = 10
+    table_rows: int = 0  # rows of a 4-column table on every page
+    image_kb: int = 0  # embedded image bytes per page
+
+
+PROFILES: Dict[str, Profile] = {
+    profile.name: profile for profile in [
+        Profile("text-1p", pages=1),
+        Profile("text-10p", pages=10),
+        Profile("text-100p", pages=100),
+        Profile("sparse-10p", pages=10, lines_per_page=5, words_per_line=6),
+        Profile("dense-10p", pages=10, lines_per_page=60, words_per_line=16),
+        Profile("tables-10p", pages=10, lines_per_page=10, table_rows=25),
+        Profile("images-10p", pages=10, lines_per_page=20, image_kb=256),
+        Profile("scan-20mb", pages=20, lines_per_page=2, image_kb=1024),
+    ]
+}
+
+# Quick set used by the other benchmarks unless --profiles is given
+DEFAULT_PROFILES = ["text-1p", "text-10p", "sparse-10p", "dense-10p", "tables-10p", "images-10p"]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _page_content(profile: Profile, page: int, rng: random.Random) -> bytes:
+    ops = ["BT", "/F1 10 Tf"]
+    y = 760
+    ops.append(f"1 0 0 1 50 {y} Tm (Page {page}) Tj")
+    for _ in range(profile.lines_per_page):
+        y -= 12
+        line = " ".join(rng.choice(_WORDS) for _ in range(profile.words_per_line))
+        ops.append(f"1 0 0 1 50 {y} Tm ({_escape(line)}) Tj")
+    for row in range(profile.table_rows):
+        y -= 14
+        cells = [f"Q{row + 1}", str(rng.randint(0, 10)), str(rng.randint(0, 10)), rng.choice(_WORDS)]
+        for column, cell in enumerate(cells):
+            ops.append(f"1 0 0 1 {50 + 120 * column} {y} Tm ({_escape(cell)}) Tj")
+    ops.append("ET")
+    if profile.image_kb:
+        ops.append("q 200 0 0 150 360 40 cm /Im1 Do Q")
+    return "\n".join(ops).encode("latin-1")
+
+
+def make_document(profile: Profile, seed: int = 0) -> bytes:
+    """Build the PDF for a profile"""
+    rng = random.Random(f"{profile.name}:{seed}")
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # page tree, filled in once page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_refs = []
+    for page in range(1, profile.pages + 1):
+        resources = b"/Font << /F1 3 0 R >>"
+        if profile.image_kb:
+            width = 512
+            pixels = rng.randbytes(profile.image_kb * 1024)
+            height = len(pixels) // width
+            objects.append(
+                b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray "
+                b"/BitsPerComponent 8 /Length %d >>\nstream\n%s\nendstream"
+                % (width, height, width * height, pixels[:width * height])
+            )
+            resources += b" /XObject << /Im1 %d 0 R >>" % len(objects)
+        content = _page_content(profile, page, rng)
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << %s >> /Contents %d 0 R >>"
+            % (resources, len(objects))
+        )
+        page_refs.append(len(objects))
+
+    kids = b" ".join(b"%d 0 R" % ref for ref in page_refs)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_refs))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(out)
+
+
+def build_corpus(names: List[str], seed: int = 0) -> List[Tuple[Profile, bytes]]:
+    """Documents for the named profiles, in order"""
+    return [(PROFILES[name], make_document(PROFILES[name], seed)) for name in names]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True, help="Directory to write the PDFs and manifest.json to")
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES), choices=list(PROFILES))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    manifest = []
+    for profile, data in build_corpus(args.profiles, args.seed):
+        path = os.path.join(args.out, f"{profile.name}.pdf")
+        with open(path, "wb") as f:
+            f.write(data)
+        manifest.append(dict(asdict(profile), path=path, bytes=len(data)))
+
+    with open(os.path.join(args.out, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(json.dumps(manifest, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Compare the extraction engines on the synthetic corpus: speed and how close
+each engine's markdown comes to MarkItDown's
+
+For every profile and engine the median time of --repeat conversions is
+reported along with two fidelity scores against MarkItDown's output:
+word_f1 (are the same words there, in any order) and line_ratio (difflib
+similarity of the whitespace-collapsed lines, so differing line breaks and
+reading order cost). "auto" is the engine select_engine() picks for the
+document, timed including the selection.
+
+Usage:
+    python -m benchmarks.engines --repeat 3
+    python -m benchmarks.engines --profiles text-100p tables-10p --engines markitdown pdfium
+"""
+from collections import Counter
+import argparse
+import difflib
+import json
+import statistics
+import time
+
+from benchmarks.corpus import DEFAULT_PROFILES, PROFILES, make_document
+
+
+def word_f1(reference: str, candidate: str) -> float:
+    """Overlap of the two texts' words as multisets, 1.0 when they hold the same words"""
+    expected, produced = Counter(reference.split()), Counter(candidate.split())
+    total = sum(expected.values()) + sum(produced.values())
+    if not total:
+        return 1.0
+    return 2 * sum((expected & produced).values()) / total
+
+
+def line_ratio(reference: str, candidate: str) -> float:
+    """difflib similarity of the non-empty lines, with whitespace inside a line collapsed"""
+    def lines(text):
+        return [" ".join(line.split()) for line in text.splitlines() if line.strip()]
+
+    return difflib.SequenceMatcher(None, lines(reference), lines(candidate), autojunk=False).ratio()
+
+
+def _time(convert, data: bytes, repeat: int):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        content = convert(data)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), content
+
+
+def run(profiles, engine_names=None, repeat: int = 3, seed: int = 0) -> list:
+    """One result row per profile and engine"""
+    from app.services import engines
+    from app.services.converter import warm_up
+
+    warm_up()
+    engine_names = engine_names or sorted(engines.ENGINES)
+    rows = []
+    for name in profiles:
+        profile = PROFILES[name]
+        data = make_document(profile, seed)
+        reference_seconds, reference = _time(engines.get_engine("markitdown").convert, data, repeat)
+        chosen, reason = engines.select_engine(data)
+
+        candidates = [(engine, engines.get_engine(engine).convert) for engine in engine_names]
+        candidates.append(("auto", lambda document: engines.convert(document)))
+        for engine, convert in candidates:
+            if engine == "markitdown":
+                seconds, content = reference_seconds, reference
+            else:
+                seconds, content = _time(convert, data, repeat)
+            row = {
+                "profile": name,
+                "engine": engine,
+                "pages": profile.pages,
+                "seconds": round(seconds, 4),
+                "pages_per_s": round(profile.pages / seconds, 2),
+                "speedup": round(reference_seconds / seconds, 2),
+                "exact": content == reference,
+                "word_f1": round(word_f1(reference, content), 4),
+                "line_ratio": round(line_ratio(reference, content), 4),
+            }
+            if engine == "auto":
+                row.update(chosen=chosen, reason=reason)
+            rows.append(row)
+    return rows
+
+
+def main():
+    from app.services.engines import ENGINES
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", nargs="+", default=DEFAULT_PROFILES, choices=list(PROFILES))
+    parser.add_argument("--engines", nargs="+", choices=sorted(ENGINES), help="Engines to compare (default: all)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.profiles, args.engines, args.repeat, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Measure PDFParserService.parse_pdf_content throughput (pages/s, MB/s) and
+peak RSS per corpus profile.
+
+Each profile runs in a fresh process: the converter is warmed up first, so
+the reported RSS growth is what parsing the document itself costs. Times are
+the median of --repeat parses.
+
+Usage:
+    python -m benchmarks.parse_throughput --repeat 3
+    python -m benchmarks.parse_throughput --profiles text-100p scan-20mb --repeat 1
+"""
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import multiprocessing
+import resource
+import statistics
+import sys
+import time
+
+from benchmarks.corpus import DEFAULT_PROFILES, PROFILES, make_document
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def _measure(name: str, repeat: int, seed: int) -> dict:
+    from app.services.converter import warm_up
+    from app.services.pdf_parser import PDFParserService
+
+    profile = PROFILES[name]
+    data = make_document(profile, seed)
+    service = PDFParserService()
+    warm_up()
+    baseline_rss = _peak_rss_mb()
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        service.parse_pdf_content(data)
+        times.append(time.perf_counter() - start)
+
+    seconds = statistics.median(times)
+    peak_rss = _peak_rss_mb()
+    return {
+        "profile": name,
+        "pages": profile.pages,
+        "bytes": len(data),
+        "seconds": round(seconds, 4),
+        "pages_per_s": round(profile.pages / seconds, 2),
+        "mb_per_s": round(len(data) / 1024 ** 2 / seconds, 3),
+        "peak_rss_mb": round(peak_rss, 1),
+        "parse_rss_mb": round(peak_rss - baseline_rss, 1),
+    }
+
+
+def run(profiles, repeat: int = 3, seed: int = 0) -> list:
+    """One result row per profile"""
+    context = multiprocessing.get_context("spawn")
+    rows = []
+    for name in profiles:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            rows.append(pool.submit(_measure, name, repeat, seed).result())
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", nargs="+", default=DEFAULT_PROFILES, choices=list(PROFILES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.profiles, args.repeat, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
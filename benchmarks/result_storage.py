@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Report Redis bytes per stored task result (value size of the result key),
+before (plain JSON, as Celery stored it) and after pack_result() (zlib, large
+results offloaded).
+
+Results are written to the real result backend under throwaway task ids and
+removed afterwards. Offloaded content is counted separately since it lives in
+the result blob store (Redis or filesystem, per BLOB_STORE). Requires the
+Redis at REDIS_URL.
+
+Usage:
+    python -m benchmarks.result_storage --sizes 1 16 256 2048
+    python -m benchmarks.result_storage --pdf sample.pdf
+"""
+import argparse
+import io
+import json
+import random
+import uuid
+
+from celery import states
+
+from app.services.redis_client import get_redis
+from app.services.result_store import pack_result, result_store
+from app.worker import celery_app
+
+_WORDS = (
+    "student answer question score rubric grade points total section page "
+    "the a of and to in is that for with as on by this be are from or"
+).split()
+
+
+def synthetic_markdown(size_kb: float, seed: int = 0) -> str:
+    """Prose-like markdown of roughly ``size_kb`` KB"""
+    rng = random.Random(seed)
+    lines = []
+    size = 0
+    while size < size_kb * 1024:
+        line = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(6, 16)))
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+
+def measure(content: str) -> dict:
+    client = get_redis()
+    backend = celery_app.backend
+    result = {"status": "success", "content": content, "user_id": "bench", "file_id": None, "error": None}
+
+    row = {"content_bytes": len(content.encode("utf-8"))}
+    for label, stored in (("plain", result), ("packed", pack_result(result))):
+        task_id = f"bench-{uuid.uuid4()}"
+        backend.store_result(task_id, stored, states.SUCCESS)
+        key = backend.get_key_for_task(task_id).decode()
+        try:
+            row[f"{label}_backend_bytes"] = client.strlen(key)
+        finally:
+            client.delete(key)
+
+        blob_key = stored.get("content_blob")
+        row[f"{label}_blob_bytes"] = len(result_store.get(blob_key)) if blob_key else 0
+        if blob_key:
+            result_store.delete(blob_key)
+
+    row["backend_reduction"] = round(1 - row["packed_backend_bytes"] / row["plain_backend_bytes"], 3)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 16, 256, 2048], help="Synthetic markdown sizes in KB")
+    parser.add_argument("--pdf", nargs="*", default=[], help="PDFs whose real markdown is measured as well")
+    args = parser.parse_args()
+
+    rows = [dict(measure(synthetic_markdown(size)), source=f"synthetic-{size:g}KB") for size in args.sizes]
+    if args.pdf:
+        from app.services.converter import get_pdf_converter
+
+        for path in args.pdf:
+            with open(path, "rb") as f:
+                content = get_pdf_converter().convert_stream(io.BytesIO(f.read())).text_content
+            rows.append(dict(measure(content), source=path))
+
+    print(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Measure full-text search latency over a synthetic index of many documents
+
+Documents are drawn from a Zipf-distributed vocabulary, like natural text:
+a few words occur in nearly every document and most words in few. Queries
+pick words at a range of vocabulary ranks, so the report shows how latency
+grows with the number of matching documents (BM25 ranking reads every
+match), for searches across all users and scoped to one user_id.
+
+The index is built once at --path through SearchIndex.upsert() and reused
+by later runs with the same --documents.
+
+Usage:
+    python -m benchmarks.search --documents 200000
+    python -m benchmarks.search --documents 20000 --path /tmp/search-bench.db --queries 50
+"""
+import argparse
+import bisect
+import itertools
+import json
+import os
+import random
+import statistics
+import time
+
+from app.services.search_index import SearchIndex
+
+_SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "ze", "pa", "qu", "ba", "do", "fe", "gi", "hu"]
+QUERY_RANKS = (5, 50, 500, 5000)
+
+
+def vocabulary(size: int) -> list:
+    """Distinct pronounceable words, shortest first"""
+    words = []
+    for length in itertools.count(2):
+        for syllables in itertools.product(_SYLLABLES, repeat=length):
+            words.append("".join(syllables))
+            if len(words) == size:
+                return words
+
+
+class Corpus:
+    """Deterministic Zipf-distributed documents"""
+
+    def __init__(self, vocabulary_size: int = 50000, words_per_document: int = 300, exponent: float = 1.1):
+        self.words = vocabulary(vocabulary_size)
+        self.words_per_document = words_per_document
+        weights = [1 / rank ** exponent for rank in range(1, vocabulary_size + 1)]
+        self.cumulative = list(itertools.accumulate(weights))
+
+    def document(self, seed: int) -> str:
+        rng = random.Random(seed)
+        total = self.cumulative[-1]
+        words = [
+            self.words[bisect.bisect(self.cumulative, rng.random() * total)]
+            for _ in range(self.words_per_document)
+        ]
+        return "\n".join(" ".join(words[i:i + 15]) for i in range(0, len(words), 15))
+
+
+def build(index: SearchIndex, corpus: Corpus, documents: int, users: int) -> float:
+    """Index the documents; returns documents indexed per second"""
+    start = time.perf_counter()
+    for n in range(documents):
+        index.upsert(f"user-{n % users}", f"file-{n}", f"task-{n}", corpus.document(n))
+    return documents / (time.perf_counter() - start)
+
+
+def _time_queries(index: SearchIndex, queries: list, limit: int) -> dict:
+    times, totals = [], []
+    for query, user_id in queries:
+        start = time.perf_counter()
+        total, _ = index.search(query, user_id, 0, limit)
+        times.append((time.perf_counter() - start) * 1000)
+        totals.append(total)
+    times.sort()
+    return {
+        "matches": round(statistics.mean(totals)),
+        "p50_ms": round(statistics.median(times), 2),
+        "p95_ms": round(times[int(0.95 * (len(times) - 1))], 2),
+    }
+
+
+def run(path: str, documents: int, users: int = 200, queries: int = 20, limit: int = 20, seed: int = 0) -> dict:
+    corpus = Corpus()
+    index = SearchIndex(path)
+    report = {"documents": documents, "users": users}
+    if index.count() != documents:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        index = SearchIndex(path)
+        report["indexed_per_s"] = round(build(index, corpus, documents, users))
+    report["index_mb"] = round(os.path.getsize(path) / 1024 ** 2, 1)
+
+    rng = random.Random(seed)
+    rows = []
+    for rank in QUERY_RANKS:
+        if rank >= len(corpus.words):
+            continue
+        # Words around the rank, so the row's matches vary little between queries
+        words = [corpus.words[rank + rng.randrange(rank // 5 + 1)] for _ in range(queries)]
+        for scope in ("all", "user"):
+            user_ids = [f"user-{rng.randrange(users)}" if scope == "user" else None for _ in words]
+            rows.append(dict(
+                _time_queries(index, list(zip(words, user_ids)), limit), query=f"rank-{rank}", scope=scope
+            ))
+        pairs = [(f"{corpus.words[rank]} {word}", None) for word in words]
+        rows.append(dict(_time_queries(index, pairs, limit), query=f"rank-{rank}+term", scope="all"))
+    report["queries"] = rows
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=200000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--path", default="/tmp/grading-pdf-search-bench.db")
+    parser.add_argument("--queries", type=int, default=20, help="Queries timed per row")
+    parser.add_argument("--limit", type=int, default=20, help="Hits per query")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.path, args.documents, args.users, args.queries, args.limit, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Measure near-duplicate lookups in the MinHash/LSH index as a class grows
+
+For each --sizes class size, synthetic essays are indexed under a throwaway
+user_id, with --duplicates of them paired with a lightly edited copy
+(--edits words replaced). The report has the indexing rate, the bytes of
+one signature, the time to look up one document and a whole class, the
+candidates compared per lookup (the work LSH saves over comparing every
+pair), and the recall of the planted pairs: among LSH candidates, and at
+the reporting threshold. Requires the Redis at REDIS_URL; the index is
+removed afterwards.
+
+Usage:
+    python -m benchmarks.similarity --sizes 1000 5000 --duplicates 50
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+import uuid
+
+from app.services.redis_client import get_redis
+from app.services.similarity import SimilarityIndex
+
+
+def essay(rng: random.Random, words: int = 500, vocabulary: int = 20000) -> str:
+    return " ".join(f"w{int(rng.paretovariate(1.2)) % vocabulary}" for _ in range(words))
+
+
+def edit(text: str, rng: random.Random, changes: int) -> str:
+    words = text.split()
+    for i in rng.sample(range(len(words)), changes):
+        words[i] = f"edit{rng.randrange(1 << 30)}"
+    return " ".join(words)
+
+
+def run(size: int, duplicates: int = 50, edits: int = 5, lookups: int = 50, seed: int = 0) -> dict:
+    index = SimilarityIndex()
+    rng = random.Random(seed)
+    user_id = f"bench-{uuid.uuid4()}"
+    originals = [essay(rng) for _ in range(size - duplicates)]
+    documents = {f"doc-{n}": text for n, text in enumerate(originals)}
+    planted = {}
+    for n in range(duplicates):
+        planted[f"copy-{n}"] = f"doc-{n}"
+        documents[f"copy-{n}"] = edit(originals[n], rng, edits)
+
+    try:
+        start = time.perf_counter()
+        for file_id, text in documents.items():
+            index.add(user_id, file_id, text)
+        indexing = time.perf_counter() - start
+
+        times = []
+        for file_id in rng.sample(sorted(documents), min(lookups, len(documents))):
+            start = time.perf_counter()
+            index.similar(user_id, file_id)
+            times.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        matches = index.similar_many(user_id, list(documents))
+        class_seconds = time.perf_counter() - start
+        candidates = index.similar_many(user_id, list(planted), threshold=0.0)
+
+        buckets = get_redis().pipeline(transaction=False)
+        for file_id in documents:
+            for key in index._bucket_keys(user_id, index.signature(user_id, file_id)):
+                buckets.scard(key)
+        sizes = buckets.execute()
+
+        def recall(found):
+            hits = sum(1 for copy, original in planted.items() if original in dict(found.get(copy, [])))
+            return round(hits / duplicates, 3) if duplicates else None
+
+        return {
+            "documents": size,
+            "signature_bytes": len(index.signature(user_id, "doc-0").tobytes()),
+            "indexed_per_s": round(len(documents) / indexing),
+            "lookup_p50_ms": round(statistics.median(times), 2),
+            "class_lookup_s": round(class_seconds, 3),
+            "candidates_per_lookup": round(sum(size - 1 for size in sizes) / len(documents), 1),
+            "candidate_recall": recall(candidates),
+            "recall": recall(matches),
+            "reported_pairs": sum(len(similar) for similar in matches.values()) // 2,
+        }
+    finally:
+        client = get_redis()
+        keys = list(client.scan_iter(f"{index.prefix}*{user_id}*"))
+        if keys:
+            client.delete(*keys)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--duplicates", type=int, default=50, help="Near-duplicate pairs planted per class")
+    parser.add_argument("--edits", type=int, default=5, help="Words replaced in each planted copy of 500 words")
+    parser.add_argument("--lookups", type=int, default=50, help="Single-document lookups timed")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rows = [run(size, args.duplicates, args.edits, args.lookups, args.seed) for size in args.sizes]
+    print(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Measure cold-start cost of the PDF converter: import time, converter
+construction, time to first parse and a second (warm) parse.
+
+Every run happens in a fresh interpreter so imports are really cold. The
+``pdf-only`` mode is what the service uses (app.services.converter); the
+``markitdown`` mode is a default MarkItDown() with every built-in converter,
+for comparison. ``worker`` imports app.worker and runs its preload hook.
+
+Usage:
+    python -m benchmarks.startup --pdf sample.pdf --repeat 3
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+_CHILD = """
+import io, json, sys, time
+mode, path = sys.argv[1], sys.argv[2]
+data = open(path, "rb").read()
+
+start = time.perf_counter()
+if mode == "markitdown":
+    from markitdown import MarkItDown
+    imported = time.perf_counter()
+    converter = MarkItDown()
+elif mode == "worker":
+    import app.worker
+    from app.services.converter import get_pdf_converter
+    imported = time.perf_counter()
+    app.worker.preload_pdf_converter()
+    converter = get_pdf_converter()
+else:
+    from app.services.converter import create_pdf_converter
+    imported = time.perf_counter()
+    converter = create_pdf_converter()
+created = time.perf_counter()
+converter.convert_stream(io.BytesIO(data))
+first = time.perf_counter()
+converter.convert_stream(io.BytesIO(data))
+second = time.perf_counter()
+
+print(json.dumps({
+    "import_s": imported - start,
+    "create_s": created - imported,
+    "first_parse_s": first - created,
+    "second_parse_s": second - first,
+    "time_to_first_parse_s": first - start,
+}))
+"""
+
+MODES = ["pdf-only", "markitdown", "worker"]
+
+
+def run_once(mode: str, pdf_path: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", _CHILD, mode, pdf_path],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run_case(mode: str, pdf_path: str, repeat: int) -> dict:
+    runs = [run_once(mode, pdf_path) for _ in range(repeat)]
+    summary = {"mode": mode, "runs": repeat}
+    for metric in runs[0]:
+        summary[metric] = round(statistics.median(run[metric] for run in runs), 4)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", help="PDF to parse (default: the converter's built-in warm-up page)")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per mode; medians are reported")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    args = parser.parse_args()
+
+    pdf_path = args.pdf
+    temp_path = None
+    if pdf_path is None:
+        from app.services.converter import _WARM_UP_PDF
+
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+            f.write(_WARM_UP_PDF)
+            temp_path = pdf_path = f.name
+    try:
+        results = [run_case(mode, pdf_path, args.repeat) for mode in args.modes]
+    finally:
+        if temp_path:
+            os.unlink(temp_path)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
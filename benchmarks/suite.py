@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Run the parse, worker and (optionally) API benchmarks on the synthetic
+corpus and write one JSON report, stamped with the commit it was run on.
+Compare two reports with ``python -m benchmarks.compare``.
+
+The API benchmark only runs with --api-url, since it needs a running
+service. Requires the Redis at REDIS_URL for the worker benchmark.
+
+Usage:
+    python -m benchmarks.suite --output bench-$(git rev-parse --short HEAD).json
+    python -m benchmarks.suite --output bench.json --api-url http://localhost:8000 --skip-workers
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+
+from benchmarks import api_latency, parse_throughput, worker_throughput
+from benchmarks.corpus import DEFAULT_PROFILES, PROFILES
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def metadata(args: argparse.Namespace) -> dict:
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "profiles": args.profiles,
+        "seed": args.seed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", required=True, help="File to write the JSON report to")
+    parser.add_argument("--profiles", nargs="+", default=DEFAULT_PROFILES, choices=list(PROFILES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Parses per profile in the parse benchmark")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4], help="Worker pool sizes")
+    parser.add_argument("--tasks", type=int, default=24, help="Documents per worker pool size")
+    parser.add_argument("--skip-workers", action="store_true")
+    parser.add_argument("--api-url", help="Base URL of a running API for the latency benchmark")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--api-concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    report = {"meta": metadata(args)}
+    report["parse"] = parse_throughput.run(args.profiles, args.repeat, args.seed)
+    if not args.skip_workers:
+        report["workers"] = worker_throughput.run(args.profiles, args.concurrency, args.tasks, args.seed)
+    if args.api_url:
+        report["api"] = api_latency.run(args.api_url, args.profiles, args.requests, args.api_concurrency, seed=args.seed)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Measure worker throughput (documents/s, pages/s, MB/s) at different pool
+sizes.
+
+For every --concurrency level a Celery worker is started on a throwaway
+queue with the result cache disabled, --tasks corpus documents are enqueued
+through the blob store at once, and the wall time until the last result is
+measured. Every upload gets a unique trailer comment so no two tasks share a
+content hash. Requires the Redis at REDIS_URL; no other worker needs to run.
+
+Usage:
+    python -m benchmarks.worker_throughput --concurrency 1 2 4 --tasks 40
+"""
+import argparse
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+
+from benchmarks.corpus import DEFAULT_PROFILES, PROFILES, build_corpus
+
+
+def _start_worker(queue: str, concurrency: int) -> tuple:
+    hostname = f"bench-{uuid.uuid4().hex[:8]}@{socket.gethostname()}"
+    env = dict(os.environ, CACHE_ENABLED="false", WORKER_METRICS_PORT="0")
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "celery", "-A", "app.worker.celery_app", "worker",
+            "-Q", queue, f"--concurrency={concurrency}", "-n", hostname, "--loglevel=warning",
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return process, hostname
+
+
+def _wait_until_ready(process: subprocess.Popen, hostname: str, timeout: float = 120) -> None:
+    """Wait for the worker's backlog heartbeat, which it writes once it consumes"""
+    from app.services.backlog import WORKER_KEY_PREFIX
+    from app.services.redis_client import get_redis
+
+    deadline = time.time() + timeout
+    while not get_redis().exists(f"{WORKER_KEY_PREFIX}{hostname}"):
+        if process.poll() is not None:
+            raise RuntimeError("Benchmark worker exited during startup")
+        if time.time() > deadline:
+            raise TimeoutError("Benchmark worker did not become ready")
+        time.sleep(0.2)
+
+
+def _cleanup(queue: str) -> None:
+    from app.services.backlog import DURATIONS_KEY_PREFIX, queue_keys
+    from app.services.redis_client import get_redis
+
+    get_redis().delete(*queue_keys(queue), f"{DURATIONS_KEY_PREFIX}{queue}", f"_kombu.binding.{queue}")
+
+
+def run_level(corpus: list, concurrency: int, tasks: int) -> dict:
+    from app.worker import blob_store, parse_pdf_blob_task
+
+    queue = f"bench-worker-{uuid.uuid4().hex}"
+    process, hostname = _start_worker(queue, concurrency)
+    try:
+        _wait_until_ready(process, hostname)
+
+        jobs = list(itertools.islice(itertools.cycle(corpus), tasks))
+        payloads = [data + f"\n% {uuid.uuid4()}\n".encode() for _, data in jobs]
+        blob_keys = [blob_store.put(payload) for payload in payloads]
+
+        start = time.perf_counter()
+        results = [
+            parse_pdf_blob_task.apply_async((blob_key, "bench", None), queue=queue)
+            for blob_key in blob_keys
+        ]
+        outcomes = [result.get(timeout=3600) for result in results]
+        elapsed = time.perf_counter() - start
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+        _cleanup(queue)
+
+    pages = sum(profile.pages for profile, _ in jobs)
+    size = sum(len(payload) for payload in payloads)
+    return {
+        "concurrency": concurrency,
+        "tasks": tasks,
+        "failed": sum(1 for outcome in outcomes if outcome.get("status") != "success"),
+        "seconds": round(elapsed, 3),
+        "docs_per_s": round(tasks / elapsed, 3),
+        "pages_per_s": round(pages / elapsed, 2),
+        "mb_per_s": round(size / 1024 ** 2 / elapsed, 3),
+    }
+
+
+def run(profiles, concurrency_levels, tasks: int, seed: int = 0) -> list:
+    """One result row per concurrency level"""
+    corpus = build_corpus(profiles, seed)
+    return [run_level(corpus, concurrency, tasks) for concurrency in concurrency_levels]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", nargs="+", default=DEFAULT_PROFILES, choices=list(PROFILES))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--tasks", type=int, default=24, help="Documents per concurrency level")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.profiles, args.concurrency, args.tasks, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
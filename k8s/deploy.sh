@@ -32,6 +32,12 @@ kubectl apply -f service.yaml
 echo "🚀 Deploying Applications..."
 kubectl apply -f deployment.yaml
 
+# Autoscale workers on the queue backlog (needs KEDA)
+if kubectl get crd scaledobjects.keda.sh >/dev/null 2>&1; then
+    echo "📈 Applying worker autoscaling..."
+    kubectl apply -f autoscaling.yaml
+fi
+
 # Apply Ingress
 echo "🌐 Applying Ingress..."
 kubectl apply -f ingress.yaml
@@ -40,6 +46,7 @@ kubectl apply -f ingress.yaml
 echo "⏳ Waiting for deployments to be ready..."
 kubectl rollout status deployment grading-pdf-api -n $NAMESPACE
 kubectl rollout status deployment grading-pdf-worker -n $NAMESPACE
+kubectl rollout status deployment grading-pdf-worker-large -n $NAMESPACE
 
 echo "✅ Deployment completed!"
 echo ""
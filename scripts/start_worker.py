@@ -1,22 +1,28 @@
 #!/usr/bin/env python3
 """
 Script to start Celery worker
+
+The pool size comes from WORKER_CONCURRENCY; "auto" (the default) sizes it
+from the container's CPU and memory limits. Extra arguments are passed on to
+celery. The script execs celery so it receives signals (e.g. SIGTERM from
+Docker or Kubernetes) directly.
 """
-import subprocess
+import os
 import sys
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.worker_sizing import resolve_concurrency  # noqa: E402
+
 if __name__ == "__main__":
     cmd = [
         "celery", "-A", "app.worker.celery_app", "worker",
         "--loglevel=info",
-        "--concurrency=4"
+        f"--concurrency={resolve_concurrency()}",
+        *sys.argv[1:]
     ]
-    
+
     print("Starting Celery worker...")
-    print(f"Command: {' '.join(cmd)}")
-    
-    try:
-        subprocess.run(cmd)
-    except KeyboardInterrupt:
-        print("\nShutting down worker...")
-        sys.exit(0) 
\ No newline at end of file
+    print(f"Command: {' '.join(cmd)}", flush=True)
+
+    os.execvp(cmd[0], cmd)
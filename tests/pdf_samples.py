@@ -0,0 +1,67 @@
+"""
+Helpers for building small, valid multi-page PDFs in tests
+"""
+from typing import List, Sequence, Union
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages: List[List[Union[str, Sequence[str]]]]) -> bytes:
+    """
+    Build a PDF with one page per entry, each line drawn in Helvetica
+
+    Args:
+        pages: Lines for every page; a line is either a string or a sequence
+            of table cells placed in fixed-width columns
+
+    Returns:
+        PDF file as bytes
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_refs = []
+    for lines in pages:
+        ops = ["BT", "/F1 12 Tf"]
+        for row, line in enumerate(lines):
+            y = 720 - 14 * row
+            cells = [line] if isinstance(line, str) else line
+            for column, cell in enumerate(cells):
+                ops.append(f"1 0 0 1 {72 + 150 * column} {y} Tm ({_escape(cell)}) Tj")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        page_refs.append(len(objects))
+
+    kids = b" ".join(b"%d 0 R" % ref for ref in page_refs)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_refs))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(out)
+
+
+def make_text_pdf(page_count: int, lines_per_page: int = 5) -> bytes:
+    """Build a prose-only PDF whose lines identify their page"""
+    return make_pdf([
+        [f"Page {page} line {line}: the quick brown fox jumps over the lazy dog." for line in range(lines_per_page)]
+        for page in range(1, page_count + 1)
+    ])
@@ -0,0 +1,152 @@
+import uuid
+from io import BytesIO
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.config import settings
+from app.services.admission import AdmissionRejectedError, TokenBucket
+from app.services.scheduling import acquire_slot, release_slot
+from tests.pdf_samples import make_text_pdf
+
+
+client = TestClient(main.app)
+
+
+def bucket(rate, burst):
+    """A token bucket isolated from the real limits"""
+    return TokenBucket(f"test-pdfratelimit:{uuid.uuid4().hex}:", rate, burst)
+
+
+def upload(user_id):
+    pdf_bytes = make_text_pdf(1) + f"\n% {uuid.uuid4()}".encode()
+    files = {"file": ("test.pdf", BytesIO(pdf_bytes), "application/pdf")}
+    return client.post("/parse", files=files, params={"user_id": user_id})
+
+
+def test_token_bucket():
+    """Test that a bucket allows its burst and then reports the wait"""
+    limiter = bucket(rate=1, burst=3)
+
+    assert [limiter.take("u1") for _ in range(3)] == [0, 0, 0]
+    assert 0 < limiter.take("u1") <= 1
+    assert limiter.take("u2") == 0
+
+
+def test_oversized_cost_passes_on_full_bucket():
+    """Test that a cost above the burst size passes on a full bucket instead of never passing"""
+    limiter = bucket(rate=10, burst=100)
+
+    assert limiter.take("u1", 500) == 0
+    assert limiter.take("u1", 50) > 0
+
+
+def test_oversized_cost_is_charged_in_full():
+    """Test that the part of a cost above the burst size is paid back before anything else passes"""
+    limiter = bucket(rate=10, burst=100)
+
+    assert limiter.take("u1", 500) == 0
+    # 400 tokens in debt: 50 more need 45 seconds, another oversized request 50
+    assert 44 < limiter.take("u1", 50) <= 45
+    assert 49 < limiter.take("u1", 500) <= 50
+    assert 49 < limiter.take("u1", 100) <= 50
+
+
+def test_oversized_upload_is_not_admitted_for_free(monkeypatch):
+    """Test that an upload larger than the byte burst delays the next one by its full size"""
+    pdf_size = len(make_text_pdf(1))
+    monkeypatch.setattr(main.admission, "bytes", bucket(rate=pdf_size / 100, burst=pdf_size / 10))
+    user_id = f"user-{uuid.uuid4().hex}"
+
+    assert upload(user_id).status_code == 200
+    response = upload(user_id)
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 90
+
+
+def test_retry_after_is_whole_seconds():
+    """Test that Retry-After values are rounded up to at least one second"""
+    assert AdmissionRejectedError("x", 0.2).retry_after == 1
+    assert AdmissionRejectedError("x", 2.1).retry_after == 3
+
+
+def test_request_rate_limit(monkeypatch):
+    """Test that /parse returns 429 with Retry-After past the request rate"""
+    monkeypatch.setattr(main.admission, "requests", bucket(rate=0.1, burst=1))
+    user_id = f"user-{uuid.uuid4().hex}"
+
+    assert upload(user_id).status_code == 200
+    response = upload(user_id)
+
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["Retry-After"]) <= 10
+    assert upload(f"user-{uuid.uuid4().hex}").status_code == 200
+
+
+def test_upload_bytes_limit(monkeypatch):
+    """Test that /parse returns 429 past the upload bandwidth"""
+    monkeypatch.setattr(main.admission, "bytes", bucket(rate=100, burst=1000))
+    user_id = f"user-{uuid.uuid4().hex}"
+
+    assert upload(user_id).status_code == 200
+    response = upload(user_id)
+
+    assert response.status_code == 429
+    assert "Upload rate limit" in response.json()["detail"]
+
+
+def test_inflight_cap(monkeypatch):
+    """Test that users with too many unfinished tasks are refused"""
+    monkeypatch.setattr(settings, "MAX_INFLIGHT_PER_USER", 1)
+    user_id = f"user-{uuid.uuid4().hex}"
+    task_id = str(uuid.uuid4())
+    acquire_slot(task_id, user_id)
+
+    try:
+        response = upload(user_id)
+    finally:
+        release_slot(task_id)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(settings.BACKPRESSURE_RETRY_AFTER)
+
+
+def test_batch_is_admitted_before_its_body_is_read(monkeypatch):
+    """Test that a batch is charged its Content-Length and refused before its files are read"""
+    monkeypatch.setattr(main.admission, "bytes", bucket(rate=1, burst=10))
+    user_id = f"user-{uuid.uuid4().hex}"
+    main.admission.bytes.take(user_id, 10)
+
+    def unexpected_read(part):
+        raise AssertionError("The batch was read before admission")
+
+    monkeypatch.setattr(main, "spool_upload", unexpected_read)
+    files = [("files", ("a.pdf", BytesIO(make_text_pdf(1)), "application/pdf"))]
+    response = client.post("/parse/batch", files=files, params={"user_id": user_id})
+
+    assert response.status_code == 429
+    assert "Upload rate limit" in response.json()["detail"]
+
+    chunked = client.post(
+        "/parse/batch",
+        content=iter([b"--x\r\n"]),
+        headers={"Content-Type": "multipart/form-data; boundary=x"},
+        params={"user_id": user_id}
+    )
+    assert chunked.status_code == 411
+
+
+def test_global_backpressure(monkeypatch):
+    """Test that uploads and batches are refused while the queues are too deep"""
+    monkeypatch.setattr(settings, "BACKPRESSURE_QUEUE_DEPTH", 0)
+
+    response = upload(f"user-{uuid.uuid4().hex}")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(settings.BACKPRESSURE_RETRY_AFTER)
+
+    files = [("files", ("a.pdf", BytesIO(make_text_pdf(1)), "application/pdf"))]
+    assert client.post("/parse/batch", files=files).status_code == 429
+
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    assert upload(f"user-{uuid.uuid4().hex}").status_code == 200
@@ -0,0 +1,119 @@
+import time
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.backlog import (
+    DURATIONS_KEY_PREFIX,
+    get_backlog,
+    queue_keys,
+    record_task_duration,
+    register_worker,
+    unregister_worker,
+)
+from app.services.redis_client import get_redis
+from app.services.worker_sizing import auto_concurrency, cpu_limit, memory_limit, resolve_concurrency
+from app.worker import parse_pdf_task
+
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def queue():
+    """A queue no worker consumes, removed afterwards"""
+    name = f"test-backlog-{uuid.uuid4().hex}"
+    yield name
+    get_redis().delete(*queue_keys(name), f"{DURATIONS_KEY_PREFIX}{name}", f"_kombu.binding.{name}")
+
+
+def test_backlog_counts_queued_tasks(queue):
+    """Test queue length and oldest task age across priority sub-queues"""
+    parse_pdf_task.apply_async(args=("x", "backlog_user"), queue=queue)
+    time.sleep(0.2)
+    parse_pdf_task.apply_async(args=("x", "backlog_user"), queue=queue, priority=3)
+    parse_pdf_task.apply_async(args=("x", "backlog_user"), queue=queue)
+
+    backlog = get_backlog([queue])
+
+    assert backlog["queued"] == 3
+    assert 0.2 <= backlog["oldest_age_seconds"] < 10
+
+
+def test_backlog_drain_estimate(queue):
+    """Test that the drain time uses recent durations and live worker slots"""
+    hostname = f"test-worker-{uuid.uuid4().hex}"
+    register_worker(hostname, 4, [queue])
+    record_task_duration(2.0, queue)
+    for _ in range(2):
+        parse_pdf_task.apply_async(args=("x", "backlog_user"), queue=queue)
+
+    try:
+        backlog = get_backlog([queue])
+    finally:
+        unregister_worker(hostname)
+
+    assert backlog["workers"] == 1
+    assert backlog["slots"] == 4
+    assert backlog["avg_task_seconds"] == 2.0
+    assert backlog["drain_seconds"] == 1.0
+
+
+def test_empty_backlog(queue):
+    """Test that an empty queue needs no time to drain"""
+    backlog = get_backlog([queue])
+    assert backlog["queued"] == 0
+    assert backlog["oldest_age_seconds"] == 0.0
+    assert backlog["drain_seconds"] == 0.0
+
+
+def test_backlog_endpoints():
+    """Test the /backlog endpoint and its gauges on /metrics"""
+    response = client.get("/backlog")
+    assert response.status_code == 200
+    assert {"queued", "oldest_age_seconds", "drain_seconds", "slots"} <= set(response.json())
+
+    assert "pdf_backlog_queued" in client.get("/metrics").text
+
+
+def test_cgroup_v2_limits(tmp_path):
+    """Test reading cgroup v2 CPU quota and memory limit"""
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+    (tmp_path / "memory.max").write_text(f"{1024 ** 3}\n")
+
+    assert cpu_limit(str(tmp_path)) == min(1.5, cpu_limit(str(tmp_path / "missing")))
+    assert memory_limit(str(tmp_path)) == 1024 ** 3
+
+    (tmp_path / "memory.max").write_text("max\n")
+    assert memory_limit(str(tmp_path)) is None
+
+
+def test_cgroup_v1_limits(tmp_path):
+    """Test reading cgroup v1 CFS quota and memory limit"""
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("-1\n")
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+    (tmp_path / "memory").mkdir()
+    (tmp_path / "memory" / "memory.limit_in_bytes").write_text("9223372036854771712\n")
+
+    assert cpu_limit(str(tmp_path)) == cpu_limit(str(tmp_path / "missing"))
+    assert memory_limit(str(tmp_path)) is None
+
+
+def test_auto_concurrency():
+    """Test that the pool follows the CPU quota and fits the memory limit"""
+    mb = 1024 ** 2
+    assert auto_concurrency(4, None, 256 * mb) == 4
+    assert auto_concurrency(0.5, None, 256 * mb) == 1
+    assert auto_concurrency(8, 1024 * mb, 256 * mb) == 3
+    assert auto_concurrency(8, 128 * mb, 256 * mb) == 1
+
+
+def test_resolve_concurrency(tmp_path):
+    """Test the WORKER_CONCURRENCY override"""
+    assert resolve_concurrency("6") == 6
+    assert resolve_concurrency("auto", str(tmp_path)) >= 1
+    with pytest.raises(ValueError):
+        resolve_concurrency("0")
@@ -0,0 +1,41 @@
+from benchmarks.compare import compare
+from benchmarks.corpus import PROFILES, make_document
+from benchmarks.engines import line_ratio, word_f1
+from app.services.pdf_pages import count_pages
+
+
+def test_corpus_documents_are_valid():
+    """Test that every corpus profile builds a deterministic PDF with its page count"""
+    for name in ("text-1p", "tables-10p", "images-10p"):
+        profile = PROFILES[name]
+        data = make_document(profile)
+        assert data == make_document(profile)
+        assert count_pages(data) == profile.pages
+    assert len(make_document(PROFILES["images-10p"])) > 10 * 256 * 1024
+
+
+def test_compare_flags_regressions():
+    """Test that throughput drops and latency growth beyond the threshold are flagged"""
+    baseline = {
+        "parse": [{"profile": "text-1p", "pages_per_s": 10.0, "mb_per_s": 1.0, "peak_rss_mb": 100, "parse_rss_mb": 5}],
+        "api": {"upload": {"p95_ms": 10}, "end_to_end": {"p50_ms": 100, "p95_ms": 200, "p99_ms": 300}},
+    }
+    current = {
+        "parse": [{"profile": "text-1p", "pages_per_s": 8.0, "mb_per_s": 1.2, "peak_rss_mb": 105, "parse_rss_mb": 5}],
+        "api": {"upload": {"p95_ms": 10}, "end_to_end": {"p50_ms": 100, "p95_ms": 260, "p99_ms": 300}},
+    }
+
+    regressions = {row["metric"] for row in compare(baseline, current, 0.1) if row["regression"]}
+
+    assert regressions == {"parse.text-1p.pages_per_s", "api.end_to_end.p95_ms"}
+
+
+def test_engine_fidelity_scores():
+    """Test that word overlap ignores line breaks while the line ratio penalizes them"""
+    reference = "alpha beta\ngamma delta\n"
+    rewrapped = "alpha\nbeta gamma\ndelta\n"
+
+    assert word_f1(reference, rewrapped) == 1.0
+    assert line_ratio(reference, reference) == 1.0
+    assert line_ratio(reference, rewrapped) < 0.5
+    assert word_f1(reference, "alpha beta") == 2 / 3
@@ -0,0 +1,104 @@
+import os
+import time
+import uuid
+from io import BytesIO
+
+import pytest
+
+from app.config import settings
+from app.services.blob_store import (
+    BlobNotFoundError,
+    BlobStore,
+    FilesystemBlobStore,
+    RedisBlobStore,
+    create_blob_store,
+)
+
+
+@pytest.fixture(params=["redis", "filesystem"])
+def store(request, tmp_path):
+    """Each blob store backend, isolated from real uploads"""
+    if request.param == "redis":
+        return RedisBlobStore(prefix=f"test-pdfblob-{uuid.uuid4().hex}", ttl=60)
+    return FilesystemBlobStore(root=str(tmp_path), ttl=60)
+
+
+def test_blob_roundtrip(store):
+    """Test that stored data is returned by reference"""
+    blob_key = store.put(b"%PDF-1.4 data")
+    assert store.get(blob_key) == b"%PDF-1.4 data"
+
+
+def test_blob_put_stream(store, monkeypatch):
+    """Test that file-like uploads are stored chunk by chunk"""
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_SIZE", 16)
+    data = b"%PDF-1.4 " + b"x" * 100
+    
+    blob_key = store.put_stream(BytesIO(data))
+    assert store.get(blob_key) == data
+
+
+def test_blob_delete(store):
+    """Test that deleted blobs are gone and repeated deletes are harmless"""
+    blob_key = store.put(b"%PDF-1.4 data")
+    store.delete(blob_key)
+    store.delete(blob_key)
+    
+    with pytest.raises(BlobNotFoundError):
+        store.get(blob_key)
+
+
+def test_missing_blob(store):
+    """Test that unknown references raise BlobNotFoundError"""
+    with pytest.raises(BlobNotFoundError):
+        store.get(uuid.uuid4().hex)
+
+
+def test_redis_blob_has_ttl():
+    """Test that Redis blobs expire on their own"""
+    store = RedisBlobStore(prefix=f"test-pdfblob-{uuid.uuid4().hex}", ttl=60)
+    blob_key = store.put(b"data")
+    assert 0 < store.client.ttl(store._key(blob_key)) <= 60
+    store.delete(blob_key)
+
+
+def test_filesystem_rejects_path_traversal(tmp_path):
+    """Test that references cannot point outside the blob directory"""
+    store = FilesystemBlobStore(root=str(tmp_path))
+    with pytest.raises(BlobNotFoundError):
+        store.get("../etc/passwd")
+
+
+def test_filesystem_purges_expired_blobs(tmp_path):
+    """Test that blobs older than the TTL are purged"""
+    store = FilesystemBlobStore(root=str(tmp_path), ttl=60)
+    old_key = store.put(b"old")
+    new_key = store.put(b"new")
+    stale = time.time() - 120
+    os.utime(tmp_path / f"{old_key}.pdf", (stale, stale))
+    
+    assert store.purge_expired(force=True) == 1
+    assert store.get(new_key) == b"new"
+    with pytest.raises(BlobNotFoundError):
+        store.get(old_key)
+
+
+def test_unknown_backend():
+    """Test that a misconfigured backend fails loudly"""
+    with pytest.raises(ValueError):
+        create_blob_store("s3")
+
+
+def test_backends_must_implement_their_interface():
+    """Test that a backend missing a storage method can't be created"""
+    class Incomplete(BlobStore):
+        def put_stream(self, stream):
+            return self.new_key()
+
+        def get(self, blob_key):
+            return b""
+
+    with pytest.raises(TypeError):
+        BlobStore()
+    with pytest.raises(TypeError):
+        Incomplete()
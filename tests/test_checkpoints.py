@@ -0,0 +1,133 @@
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.config import settings
+from app.services.checkpoints import PageCheckpoints
+from app.services.engines import get_engine
+from app.services.redis_client import get_redis
+from app.services.result_cache import ResultCache
+from app.worker import parse_pdf_bytes
+from app.services.result_store import unpack_content
+from tests.pdf_samples import make_pdf, make_text_pdf
+
+
+GRADES_TABLE = [("Student", "Score", "Grade")] + [(f"S{i}", str(60 + i), "B") for i in range(8)]
+
+
+def unique(pdf_bytes):
+    return pdf_bytes + f"\n% {uuid.uuid4()}".encode()
+
+
+def pages_counted(source):
+    return REGISTRY.get_sample_value("pdf_checkpointed_pages_total", {"source": source}) or 0
+
+
+class CrashingEngine:
+    """Wraps an engine and raises once it has extracted ``crash_after`` ranges"""
+
+    def __init__(self, engine, crash_after=None):
+        self.engine = engine
+        self.name = engine.name
+        self.crash_after = crash_after
+        self.extracted = []
+
+    def extract_range(self, file_data, start, end):
+        if self.crash_after is not None and len(self.extracted) >= self.crash_after:
+            raise RuntimeError("worker lost")
+        self.extracted.append((start, end))
+        return self.engine.extract_range(file_data, start, end)
+
+    def merge_ranges(self, ranges):
+        return self.engine.merge_ranges(ranges)
+
+
+@pytest.mark.parametrize("engine_name, pages", [
+    ("pdfminer", [[f"Page {n} text."] for n in range(7)]),
+    ("markitdown", [GRADES_TABLE, ["Plain prose page."], [".1", "Intro text"], [], GRADES_TABLE]),
+])
+def test_checkpointed_conversion_matches_whole_document(engine_name, pages):
+    """Test that stitching checkpointed ranges gives the engine's whole-document markdown"""
+    data = unique(make_pdf(pages))
+    engine = get_engine(engine_name)
+    checkpoints = PageCheckpoints(ResultCache.content_hash(data), len(pages), chunk_pages=2)
+
+    assert checkpoints.convert(engine, data) == engine.convert(data)
+    assert not get_redis().exists(checkpoints.key(engine_name))
+
+
+def test_retry_parses_only_remaining_ranges():
+    """Test that a retried conversion reuses the ranges saved before the failure"""
+    data = unique(make_text_pdf(10))
+    checkpoints = PageCheckpoints(ResultCache.content_hash(data), 10, chunk_pages=3)
+
+    with pytest.raises(RuntimeError):
+        checkpoints.convert(CrashingEngine(get_engine("pdfminer"), crash_after=2), data)
+    assert get_redis().hlen(checkpoints.key("pdfminer")) == 2
+
+    retry = CrashingEngine(get_engine("pdfminer"))
+    content = checkpoints.convert(retry, data)
+
+    assert retry.extracted == [(6, 9), (9, 10)]
+    assert content == get_engine("pdfminer").convert(data)
+
+
+_CHILD = """
+import sys
+from app.worker import parse_pdf_bytes
+with open(sys.argv[1], "rb") as f:
+    parse_pdf_bytes(f.read(), "chaos")
+"""
+
+
+def test_killed_parse_resumes_from_checkpoints(monkeypatch):
+    """
+    Chaos test: SIGKILL a process mid-parse, parse the same PDF again as a
+    retry or resubmission would and check that only the pages without a
+    checkpoint were parsed the second time
+    """
+    page_count, chunk_pages = 120, 10
+    data = unique(make_text_pdf(page_count, lines_per_page=20))
+    key = PageCheckpoints(ResultCache.content_hash(data), page_count).key("pdfminer")
+    client = get_redis()
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as pdf_file:
+        pdf_file.write(data)
+        pdf_file.flush()
+        env = dict(os.environ, CHECKPOINT_PAGES=str(chunk_pages), CACHE_ENABLED="false", ENGINE_FAST="pdfminer")
+        child = subprocess.Popen([sys.executable, "-c", _CHILD, pdf_file.name], env=env)
+        try:
+            deadline = time.time() + 60
+            while client.hlen(key) < 3:
+                assert child.poll() is None, "parse finished before it could be interrupted"
+                assert time.time() < deadline
+                time.sleep(0.05)
+            child.send_signal(signal.SIGKILL)
+            child.wait(10)
+        finally:
+            if child.poll() is None:
+                child.kill()
+
+    saved_pages = client.hlen(key) * chunk_pages
+    assert 0 < saved_pages < page_count
+
+    monkeypatch.setattr(settings, "CHECKPOINT_PAGES", chunk_pages)
+    monkeypatch.setattr(settings, "CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "ENGINE_FAST", "pdfminer")
+    parsed_before, resumed_before = pages_counted("parsed"), pages_counted("resumed")
+
+    result = parse_pdf_bytes(data, "chaos")
+
+    assert result["status"] == "success"
+    assert unpack_content(result) == get_engine("pdfminer").convert(data)
+    # Across both attempts at most the range in flight when the worker died was parsed twice
+    assert pages_counted("resumed") - resumed_before == saved_pages
+    assert pages_counted("parsed") - parsed_before == page_count - saved_pages
+    assert not client.exists(key)
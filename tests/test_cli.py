@@ -0,0 +1,119 @@
+import json
+import os
+
+from app import cli
+from app.cli import STATE_FILENAME, main
+from tests.pdf_samples import make_text_pdf
+
+
+def write_pdf(path, pages=1):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(make_text_pdf(pages))
+
+
+def summary(capsys):
+    return json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+
+
+def test_ingest_markdown_tree(tmp_path, capsys):
+    """Test that a directory is parsed into a mirrored markdown tree"""
+    write_pdf(tmp_path / "src" / "a.pdf")
+    write_pdf(tmp_path / "src" / "course" / "b.pdf", pages=2)
+    (tmp_path / "src" / "notes.txt").write_text("ignored")
+    out = tmp_path / "out"
+
+    assert main(["ingest", str(tmp_path / "src"), "--out", str(out), "--workers", "2", "--quiet"]) == 0
+
+    result = summary(capsys)
+    assert (result["total"], result["parsed"], result["skipped"], result["failed"]) == (2, 2, 0, 0)
+    assert "Page 1 line 0" in (out / "a.md").read_text()
+    assert "Page 2 line 0" in (out / "course" / "b.md").read_text()
+    assert (out / STATE_FILENAME).exists()
+
+
+def test_ingest_skips_unchanged(tmp_path, capsys):
+    """Test that a rerun only parses new, changed and deleted-output files"""
+    src, out = tmp_path / "src", tmp_path / "out"
+    for name in ["a", "b", "c", "d"]:
+        write_pdf(src / f"{name}.pdf")
+    args = ["ingest", str(src), "--out", str(out), "--workers", "1", "--quiet"]
+    assert main(args) == 0
+    capsys.readouterr()
+
+    write_pdf(src / "a.pdf", pages=3)  # changed content
+    os.utime(src / "b.pdf", ns=(0, 0))  # touched, same content
+    (out / "c.md").unlink()  # output removed
+    write_pdf(src / "e.pdf")  # new file
+
+    assert main(args) == 0
+
+    result = summary(capsys)
+    assert (result["parsed"], result["skipped"], result["failed"]) == (3, 2, 0)
+    assert "Page 3 line 0" in (out / "a.md").read_text()
+
+
+def test_ingest_jsonl_and_failures(tmp_path, capsys):
+    """Test JSONL output from a manifest, with failed files retried on request"""
+    write_pdf(tmp_path / "good.pdf")
+    (tmp_path / "bad.pdf").write_bytes(b"not a pdf")
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("# regrade\ngood.pdf\n\nbad.pdf\n")
+    jsonl = tmp_path / "out.jsonl"
+    args = ["ingest", "--manifest", str(manifest), "--jsonl", str(jsonl), "--workers", "1", "--quiet"]
+
+    assert main(args) == 1
+    records = [json.loads(line) for line in jsonl.read_text().splitlines()]
+    assert sorted((r["path"], r["status"]) for r in records) == [("bad.pdf", "failed"), ("good.pdf", "success")]
+    assert all(len(r["sha256"]) == 64 for r in records)
+
+    capsys.readouterr()
+    assert main(args) == 0
+    assert summary(capsys)["skipped"] == 2
+
+    assert main(args + ["--retry-failed"]) == 1
+    assert summary(capsys)["failed"] == 1
+    assert len(jsonl.read_text().splitlines()) == 3
+
+
+def test_ingest_resumes_from_journal(tmp_path, capsys):
+    """Test that files recorded before an interruption aren't parsed again"""
+    src, out = tmp_path / "src", tmp_path / "out"
+    write_pdf(src / "a.pdf")
+    write_pdf(src / "b.pdf")
+    args = ["ingest", str(src), "--out", str(out), "--workers", "1", "--quiet"]
+    assert main(args) == 0
+
+    # Simulate a run killed after one file: journal with a single, half-written tail
+    state = out / STATE_FILENAME
+    first = state.read_text().splitlines()[0]
+    state.write_text(first + "\n" + '{"path": "trunc')
+    capsys.readouterr()
+
+    assert main(args) == 0
+    result = summary(capsys)
+    assert (result["parsed"], result["skipped"]) == (1, 1)
+
+
+def crashing_parse(path):
+    """Stands in for a PDF that kills the parser process"""
+    if path.endswith("crash.pdf"):
+        os._exit(1)
+    return cli._parse_original(path)
+
+
+def test_ingest_survives_crashed_process(tmp_path, monkeypatch, capsys):
+    """Test that only the file that crashes the parser fails and the files in flight with it are parsed"""
+    src, out = tmp_path / "src", tmp_path / "out"
+    write_pdf(src / "a-crash.pdf")
+    for name in ["b", "c", "d", "e", "f"]:
+        write_pdf(src / f"{name}.pdf")
+    monkeypatch.setattr(cli, "_parse_original", cli._parse, raising=False)
+    monkeypatch.setattr(cli, "_parse", crashing_parse)
+
+    assert main(["ingest", str(src), "--out", str(out), "--workers", "3", "--quiet"]) == 1
+
+    result = summary(capsys)
+    assert (result["parsed"], result["failed"]) == (5, 1)
+    assert sorted(path.name for path in out.glob("*.md")) == ["b.md", "c.md", "d.md", "e.md", "f.md"]
+    entries = [json.loads(line) for line in (out / STATE_FILENAME).read_text().splitlines()]
+    assert [entry["error"] for entry in entries if entry["status"] == "failed"] == ["Parser process crashed"]
@@ -0,0 +1,42 @@
+import io
+from importlib.metadata import version
+
+import pytest
+from markitdown import MarkItDown, UnsupportedFormatException
+
+from app.config import settings
+from app.services.converter import create_pdf_converter, get_pdf_converter, parser_version, warm_up
+from tests.pdf_samples import make_pdf, make_text_pdf
+
+
+def test_matches_default_markitdown():
+    """Test that the PDF-only converter renders PDFs exactly like MarkItDown()"""
+    converter = create_pdf_converter()
+    for pdf_bytes in [make_text_pdf(3), make_pdf([[["Name", "Score"], ["Alice", "90"], ["Bob", "85"]]])]:
+        expected = MarkItDown().convert_stream(io.BytesIO(pdf_bytes)).text_content
+        assert converter.convert_stream(io.BytesIO(pdf_bytes)).text_content == expected
+
+
+def test_rejects_non_pdf():
+    """Test that non-PDF input is no longer rendered as plain text"""
+    with pytest.raises(UnsupportedFormatException):
+        create_pdf_converter().convert_stream(io.BytesIO(b"not a pdf"))
+
+
+def test_warm_up_uses_shared_converter():
+    """Test that warm_up() runs a conversion on the process-wide converter"""
+    assert warm_up() > 0
+    assert get_pdf_converter() is get_pdf_converter()
+
+
+def test_parser_version_covers_libraries_and_engine_policy(monkeypatch):
+    """Test that the parser version changes with the PDF libraries, the requested engine and the engine policy"""
+    auto = parser_version()
+    for name in ("pdfminer.six", "pdfplumber", "pypdfium2"):
+        assert f"{name}-{version(name)}" in auto
+    assert parser_version("pdfium") != auto
+    assert parser_version("pdfium") != parser_version("pdfminer")
+
+    monkeypatch.setattr(settings, "ENGINE_FAST", "pdfium")
+    assert parser_version() != auto
+    assert parser_version("pdfium").endswith("+pdfium")
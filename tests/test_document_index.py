@@ -0,0 +1,149 @@
+import time
+import uuid
+from io import BytesIO
+
+from fastapi.testclient import TestClient
+
+from app import main, worker
+from app.config import settings
+from app.services.converter import parser_version
+from app.services.document_index import DocumentIndex
+from tests.pdf_samples import make_text_pdf
+
+
+client = TestClient(main.app)
+index = DocumentIndex()
+
+
+def unique_pdf():
+    return make_text_pdf(1) + f"\n% {uuid.uuid4()}".encode()
+
+
+def upload(pdf_bytes, user_id, file_id):
+    files = {"file": ("test.pdf", BytesIO(pdf_bytes), "application/pdf")}
+    response = client.post("/parse", files=files, params={"user_id": user_id, "file_id": file_id})
+    assert response.status_code == 200
+    return response.json()
+
+
+def wait_for(task_id, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        result = client.get(f"/task/{task_id}").json()
+        if result["status"] in ("success", "failed"):
+            return result
+        time.sleep(0.2)
+    raise TimeoutError(task_id)
+
+
+def wait_indexed(user_id, file_id, timeout=10):
+    """The worker indexes right after the result is stored; give it a moment"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        entry = index.get(user_id, file_id)
+        if entry and entry["status"] != "pending":
+            return entry
+        time.sleep(0.1)
+    raise TimeoutError(file_id)
+
+
+def test_parsed_document_is_indexed():
+    """Test that a parse submitted with a file_id is recorded with its stored result"""
+    user_id = f"user-{uuid.uuid4().hex}"
+    pdf_bytes = unique_pdf()
+    task_id = upload(pdf_bytes, user_id, "essay-1")["task_id"]
+
+    pending = index.get(user_id, "essay-1")
+    assert pending["task_id"] == task_id
+    assert pending["parser_version"] == parser_version()
+
+    assert wait_for(task_id)["status"] == "success"
+    entry = wait_indexed(user_id, "essay-1")
+    assert entry["status"] == "success"
+    assert entry["result_key"]
+    assert entry["parsed_at"] >= entry["created_at"]
+
+
+def test_unchanged_resubmission_answered_from_index(monkeypatch):
+    """Test that an unchanged document is answered without parsing, even with the cache off"""
+    monkeypatch.setattr(settings, "CACHE_ENABLED", False)
+    user_id = f"user-{uuid.uuid4().hex}"
+    pdf_bytes = unique_pdf()
+    first = wait_for(upload(pdf_bytes, user_id, "essay-1")["task_id"])
+    wait_indexed(user_id, "essay-1")
+
+    response = upload(pdf_bytes, user_id, "essay-1")
+
+    assert response["status"] == "success"
+    again = client.get(f"/task/{response['task_id']}").json()
+    assert again["content"] == first["content"]
+    assert index.get(user_id, "essay-1")["task_id"] == response["task_id"]
+
+
+def test_changed_content_or_parser_is_parsed_again(monkeypatch):
+    """Test that new content or a new parser version bypasses the stored result"""
+    monkeypatch.setattr(settings, "CACHE_ENABLED", False)
+    user_id = f"user-{uuid.uuid4().hex}"
+    pdf_bytes = unique_pdf()
+    wait_for(upload(pdf_bytes, user_id, "essay-1")["task_id"])
+    wait_indexed(user_id, "essay-1")
+
+    assert upload(unique_pdf(), user_id, "essay-1")["status"] == "pending"
+
+    wait_for(upload(pdf_bytes, user_id, "essay-2")["task_id"])
+    wait_indexed(user_id, "essay-2")
+    monkeypatch.setattr(settings, "PARSER_REVISION", "next")
+    assert upload(pdf_bytes, user_id, "essay-2")["status"] == "pending"
+
+
+def test_new_parser_version_misses_the_result_cache(monkeypatch):
+    """Test that cached markdown of an older parser version is parsed again instead of reused"""
+    monkeypatch.setattr(settings, "CACHE_ENABLED", True)
+    user_id = f"user-{uuid.uuid4().hex}"
+    pdf_bytes = unique_pdf()
+    content_hash = worker.ResultCache.content_hash(pdf_bytes)
+    assert worker.parse_pdf_bytes(pdf_bytes, user_id, "essay-1")["status"] == "success"
+    assert worker.complete_from_cache(content_hash, user_id)
+
+    monkeypatch.setattr(settings, "PARSER_REVISION", "next")
+    conversions = []
+    convert = worker.engines.convert
+    monkeypatch.setattr(worker.engines, "convert", lambda *args: conversions.append(args) or convert(*args))
+
+    assert worker.complete_from_cache(content_hash, user_id, "essay-1") is None
+    assert index.get(user_id, "essay-1") is None
+    assert worker.parse_pdf_bytes(pdf_bytes, user_id, "essay-1")["status"] == "success"
+    assert len(conversions) == 1
+    assert worker.result_cache.contains(worker._cache_key(content_hash))
+
+
+def test_stale_task_result_is_ignored():
+    """Test that a task finishing after its document was resubmitted doesn't overwrite the entry"""
+    user_id = f"user-{uuid.uuid4().hex}"
+    index.record_submission(user_id, "essay-1", "a" * 64, "task-old")
+    index.record_submission(user_id, "essay-1", "b" * 64, "task-new")
+
+    assert not index.record_result("task-old", "success", b"x")
+    assert index.record_result("task-new", "failed", error="boom")
+    entry = index.get(user_id, "essay-1")
+    assert (entry["content_hash"], entry["status"], entry["error"]) == ("b" * 64, "failed", "boom")
+
+
+def test_list_documents():
+    """Test that GET /users/{user_id}/documents pages through the index, newest first"""
+    user_id = f"user-{uuid.uuid4().hex}"
+    for number in range(3):
+        index.record_submission(user_id, f"essay-{number}", "c" * 64, f"task-{number}")
+
+    response = client.get(f"/users/{user_id}/documents", params={"limit": 2})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 3
+    assert [d["file_id"] for d in data["documents"]] == ["essay-2", "essay-1"]
+    assert data["documents"][0]["status"] == "pending"
+    assert not data["documents"][0]["result_stored"]
+
+    rest = client.get(f"/users/{user_id}/documents", params={"offset": 2}).json()
+    assert [d["file_id"] for d in rest["documents"]] == ["essay-0"]
+    assert client.get("/users/nobody-here/documents").json()["total"] == 0
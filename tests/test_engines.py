@@ -0,0 +1,136 @@
+import io
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.config import settings
+from app.services.converter import get_pdf_converter
+from app.services.document_index import DocumentIndex
+from app.services.engines import (
+    ENGINES,
+    ParserEngine,
+    RangeParserEngine,
+    UnknownEngineError,
+    get_engine,
+    sample_pages,
+    select_engine,
+)
+from app.services.pdf_pages import page_offsets
+from app.services.pdf_parser import PDFParserService
+from app.services.result_cache import ResultCache
+from app.worker import _cache_key, parse_pdf_bytes, result_cache
+from tests.pdf_samples import make_pdf, make_text_pdf
+
+
+client = TestClient(main.app)
+
+GRADES_TABLE = [("Student", "Score", "Grade")] + [(f"S{i}", str(60 + i), "B") for i in range(8)]
+
+
+def markitdown(file_data: bytes) -> str:
+    return get_pdf_converter().convert_stream(io.BytesIO(file_data)).text_content
+
+
+def test_pdfminer_engine_matches_markitdown_without_tables():
+    """Test that the fast engine reproduces MarkItDown's markdown for prose documents"""
+    for data in (make_text_pdf(4), make_pdf([[".1"], ["Intro text"], ["Closing page."]])):
+        assert get_engine("pdfminer").convert(data) == markitdown(data)
+
+
+def test_pdfium_engine_extracts_text_layer():
+    """Test that the PDFium engine returns every page's text with page breaks"""
+    content = get_engine("pdfium").convert(make_text_pdf(3))
+
+    for page in (1, 2, 3):
+        assert f"Page {page} line 0: the quick brown fox" in content
+    assert len(page_offsets(content, 3)) == 4
+
+
+def test_engines_must_implement_their_interface():
+    """Test that an engine missing a conversion method can't be created"""
+    class Incomplete(RangeParserEngine):
+        name = "incomplete"
+
+        def convert(self, file_data):
+            return ""
+
+    with pytest.raises(TypeError):
+        ParserEngine()
+    with pytest.raises(TypeError):
+        Incomplete()
+    assert all(engine.supports_ranges == isinstance(engine, RangeParserEngine) for engine in ENGINES.values())
+
+
+def test_select_engine_policy(monkeypatch):
+    """Test that the fast path is opt-in and only takes text-layer documents without sampled tables"""
+    prose = make_text_pdf(3)
+    assert select_engine(prose) == ("markitdown", "default")
+
+    monkeypatch.setattr(settings, "ENGINE_FAST", "pdfminer")
+    tables = make_pdf([["Plain prose page."], ["More prose."], GRADES_TABLE])
+    scanned = make_pdf([[]]).replace(b"/Resources << /Font << /F1 3 0 R >> >> ", b"")
+
+    assert select_engine(prose) == ("pdfminer", "text_layer")
+    assert select_engine(tables) == ("markitdown", "tables")
+    assert select_engine(scanned) == ("markitdown", "no_text_layer")
+    assert select_engine(b"not a pdf") == ("markitdown", "default")
+    assert select_engine(tables, requested="pdfium") == ("pdfium", "requested")
+
+    monkeypatch.setattr(settings, "ENGINE_FAST", "")
+    assert select_engine(prose) == ("markitdown", "default")
+
+    with pytest.raises(UnknownEngineError):
+        select_engine(prose, requested="ocr")
+
+
+def test_sample_pages_spread_over_document():
+    """Test that table sampling covers short documents fully and long ones evenly"""
+    assert sample_pages(3, 5) == [0, 1, 2]
+    assert sample_pages(100, 5) == [0, 20, 40, 60, 80]
+
+
+def test_requested_engine_is_cached_separately():
+    """Test that an explicitly requested engine's output doesn't answer default requests"""
+    data = make_text_pdf(2) + f"\n% {uuid.uuid4()}".encode()
+    content_hash = ResultCache.content_hash(data)
+
+    result = parse_pdf_bytes(data, "engine-user", engine="pdfium")
+
+    assert result["status"] == "success"
+    assert result_cache.contains(_cache_key(content_hash, "pdfium"))
+    assert not result_cache.contains(_cache_key(content_hash))
+
+
+def test_document_index_matches_requested_engine():
+    """Test that stored markdown is only reused for the engine it was requested with"""
+    index = DocumentIndex()
+    user_id = f"engine-{uuid.uuid4()}"
+    index.record_completed(user_id, "essay", "a" * 64, "task-1", "# Essay", engine="pdfium")
+
+    assert index.stored_content(user_id, "essay", "a" * 64, "pdfium") == "# Essay"
+    assert index.stored_content(user_id, "essay", "a" * 64) is None
+    assert index.get(user_id, "essay")["engine"] == "pdfium"
+
+
+def test_parse_rejects_invalid_engine_requests():
+    """Test that unknown engines and engines combined with streaming are rejected with 400"""
+    def post(**params):
+        files = {"file": ("test.pdf", io.BytesIO(make_text_pdf(1)), "application/pdf")}
+        return client.post("/parse", files=files, params=params)
+
+    response = post(engine="ocr")
+    assert response.status_code == 400
+    assert all(name in response.json()["detail"] for name in ENGINES)
+
+    assert post(engine="pdfium", stream="true").status_code == 400
+
+
+def test_parser_service_engine_override():
+    """Test that PDFParserService converts with a requested engine and rejects unknown ones"""
+    data = make_text_pdf(1)
+
+    assert PDFParserService("pdfium").parse_pdf_content(data) == get_engine("pdfium").convert(data)
+    with pytest.raises(UnknownEngineError):
+        PDFParserService("ocr")
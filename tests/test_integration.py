@@ -6,7 +6,8 @@ import time
 import json
 
 from app.main import app
-from app.worker import celery_app, parse_pdf_task
+from app.worker import _cache_key, celery_app, parse_pdf_task, parse_pdf_blob_task, blob_store, result_cache
+from app.services.blob_store import BlobNotFoundError
 from app.config import settings
 
 
@@ -84,7 +85,8 @@ class TestIntegration:
     
     def test_parse_pdf_async_endpoint(self):
         """Test asynchronous PDF parsing endpoint"""
-        pdf_bytes = create_sample_pdf_bytes()
+        # Unique trailing comment so the upload misses the result cache
+        pdf_bytes = create_sample_pdf_bytes() + f"\n% {time.time()}".encode()
         
         files = {"file": ("test.pdf", BytesIO(pdf_bytes), "application/pdf")}
         response = client.post("/parse", files=files)
@@ -113,6 +115,95 @@ class TestIntegration:
         else:
             pytest.fail("Task did not complete within timeout")
     
+    def test_parse_pdf_served_from_cache(self):
+        """Test that a cached PDF completes without a worker round trip"""
+        pdf_bytes = create_sample_pdf_bytes() + f"\n% {time.time()}".encode()
+        result_cache.set(_cache_key(result_cache.content_hash(pdf_bytes)), "# Cached markdown")
+        
+        files = {"file": ("test.pdf", BytesIO(pdf_bytes), "application/pdf")}
+        response = client.post("/parse", files=files, params={"user_id": "cache_user"})
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "success"
+        
+        status_data = client.get(f"/task/{data['task_id']}").json()
+        assert status_data["status"] == "success"
+        assert status_data["content"] == "# Cached markdown"
+        assert status_data["user_id"] == "cache_user"
+    
+    def test_cache_stats_endpoint(self):
+        """Test that the result cache reports its counters and occupancy"""
+        response = client.get("/cache/stats")
+        
+        assert response.status_code == 200
+        assert {"hits", "misses"} <= set(response.json())
+    
+    def test_parse_pdf_batch_endpoint(self):
+        """Test that a batch is dispatched at once and tracked by one batch id"""
+        cached_pdf = create_sample_pdf_bytes() + f"\n% cached {time.time()}".encode()
+        result_cache.set(_cache_key(result_cache.content_hash(cached_pdf)), "# Cached markdown")
+        
+        files = [
+            ("files", ("first.pdf", BytesIO(create_sample_pdf_bytes() + f"\n% {time.time()}".encode()), "application/pdf")),
+            ("files", ("cached.pdf", BytesIO(cached_pdf), "application/pdf")),
+            ("files", ("third.pdf", BytesIO(create_sample_pdf_bytes() + f"\n% third {time.time()}".encode()), "application/pdf")),
+        ]
+        response = client.post("/parse/batch", files=files, params={"user_id": "batch_user"})
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["task_ids"]) == 3
+        
+        batch_id = data["batch_id"]
+        for _ in range(10):
+            batch_data = client.get(f"/batch/{batch_id}").json()
+            assert batch_data["total"] == 3
+            if batch_data["status"] == "success":
+                break
+            time.sleep(1)
+        else:
+            pytest.fail("Batch did not complete within timeout")
+        
+        assert batch_data["succeeded"] == 3
+        assert [r["task_id"] for r in batch_data["results"]] == data["task_ids"]
+        assert [r["file_id"] for r in batch_data["results"]] == ["first.pdf", "cached.pdf", "third.pdf"]
+        assert batch_data["results"][1]["content"] == "# Cached markdown"
+        
+        summary = client.get(f"/batch/{batch_id}", params={"include_content": False}).json()
+        assert all(r["content"] is None for r in summary["results"])
+    
+    def test_parse_pdf_batch_rejects_non_pdf(self):
+        """Test that a batch with a non-PDF file is rejected as a whole"""
+        files = [
+            ("files", ("test.pdf", BytesIO(create_sample_pdf_bytes()), "application/pdf")),
+            ("files", ("test.txt", BytesIO(b"not a pdf"), "text/plain")),
+        ]
+        response = client.post("/parse/batch", files=files)
+        
+        assert response.status_code == 400
+    
+    def test_parse_pdf_batch_rejects_ambiguous_filenames(self):
+        """Test that filenames, used as file_ids, must be present and unique within a batch"""
+        duplicated = [
+            ("files", ("essay.pdf", BytesIO(create_sample_pdf_bytes()), "application/pdf")),
+            ("files", ("essay.pdf", BytesIO(create_sample_pdf_bytes()), "application/pdf")),
+        ]
+        response = client.post("/parse/batch", files=duplicated)
+        
+        assert response.status_code == 400
+        assert "essay.pdf" in response.json()["detail"]
+        
+        unnamed = [("files", ("", BytesIO(create_sample_pdf_bytes()), "application/pdf"))]
+        response = client.post("/parse/batch", files=unnamed)
+        
+        assert response.status_code == 400
+    
+    def test_unknown_batch(self):
+        """Test that unknown batch ids return 404"""
+        response = client.get("/batch/does-not-exist")
+        assert response.status_code == 404
+    
     def test_file_size_limit(self):
         """Test file size validation"""
         # Create a file larger than the limit
@@ -125,6 +216,16 @@ class TestIntegration:
         data = response.json()
         assert "File too large" in data["detail"]
     
+    def test_oversized_request_rejected_before_parsing(self, monkeypatch):
+        """Test that a declared Content-Length over the limit is rejected early"""
+        monkeypatch.setattr(settings, "MAX_FILE_SIZE", 1024)
+        
+        files = {"file": ("large.pdf", BytesIO(b"x" * (200 * 1024)), "application/pdf")}
+        response = client.post("/parse", files=files)
+        
+        assert response.status_code == 413
+        assert "File too large" in response.json()["detail"]
+    
     def test_invalid_file_type(self):
         """Test that non-PDF files are rejected"""
         text_content = b"This is not a PDF file"
@@ -149,6 +250,26 @@ class TestIntegration:
         assert result["error"] is None
         assert isinstance(result["content"], str)
     
+    def test_celery_blob_task_directly(self):
+        """Test that the blob task parses by reference and deletes the blob"""
+        blob_key = blob_store.put(create_sample_pdf_bytes())
+        
+        result = parse_pdf_blob_task(blob_key, "test_user", "test_file")
+        
+        assert result["status"] == "success"
+        assert result["user_id"] == "test_user"
+        assert isinstance(result["content"], str)
+        with pytest.raises(BlobNotFoundError):
+            blob_store.get(blob_key)
+    
+    def test_celery_blob_task_with_missing_blob(self):
+        """Test that an expired blob fails the task instead of raising"""
+        result = parse_pdf_blob_task("0" * 32, "test_user", "test_file")
+        
+        assert result["status"] == "failed"
+        assert result["content"] is None
+        assert "expired" in result["error"]
+    
     def test_celery_task_with_invalid_pdf(self):
         """Test Celery task with invalid PDF"""
         invalid_pdf = b"not a pdf"
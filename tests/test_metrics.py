@@ -0,0 +1,68 @@
+import time
+from io import BytesIO
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.main import app
+from app.services import metrics
+from app.worker import parse_pdf_task, stamp_enqueue_time
+from tests.pdf_samples import make_text_pdf
+
+
+client = TestClient(app)
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_metrics_endpoint():
+    """Test that /metrics exposes upload and enqueue histograms"""
+    before = sample("pdf_upload_bytes_count", outcome="queued")
+    pdf_bytes = make_text_pdf(1) + f"\n% {time.time()}".encode()
+    files = {"file": ("test.pdf", BytesIO(pdf_bytes), "application/pdf")}
+    assert client.post("/parse", files=files).status_code == 200
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "pdf_upload_read_seconds_bucket" in response.text
+    assert 'pdf_enqueue_seconds_count{outcome="success"}' in response.text
+    assert sample("pdf_upload_bytes_count", outcome="queued") == before + 1
+
+
+def test_timed_labels_outcome():
+    """Test that timed() records failures under outcome=error"""
+    before = sample("pdf_convert_seconds_count", mode="test", outcome="error")
+
+    with pytest.raises(ValueError):
+        with metrics.timed(metrics.CONVERT_SECONDS, mode="test"):
+            raise ValueError("boom")
+
+    assert sample("pdf_convert_seconds_count", mode="test", outcome="error") == before + 1
+
+
+def test_task_metrics():
+    """Test that running a task records conversion, result and task metrics"""
+    task_name = parse_pdf_task.name
+    pages_before = sample("pdf_convert_seconds_per_page_count", mode="whole")
+    tasks_before = sample("pdf_task_seconds_count", task=task_name, outcome="success")
+    failures_before = sample("pdf_task_seconds_count", task=task_name, outcome="failed")
+
+    parse_pdf_task.apply(args=(make_text_pdf(2) + f"\n% {time.time()}".encode(), "metrics_user"))
+    parse_pdf_task.apply(args=(f"not a pdf {time.time()}".encode(), "metrics_user"))
+
+    assert sample("pdf_convert_seconds_per_page_count", mode="whole") == pages_before + 1
+    assert sample("pdf_task_seconds_count", task=task_name, outcome="success") == tasks_before + 1
+    assert sample("pdf_task_seconds_count", task=task_name, outcome="failed") == failures_before + 1
+    assert sample("pdf_failures_total", stage="parse", reason="UnsupportedFormatException") >= 1
+
+
+def test_publish_stamps_enqueue_time():
+    """Test that published tasks carry the time they were enqueued"""
+    headers = {}
+    stamp_enqueue_time(headers=headers)
+    assert abs(headers["enqueued_at"] - time.time()) < 5
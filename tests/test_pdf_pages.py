@@ -0,0 +1,132 @@
+import io
+import random
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from celery.exceptions import ChordError
+from markitdown import MarkItDown
+
+from app.services.pdf_pages import (
+    IncrementalMarkdown,
+    convert_by_pages,
+    count_pages,
+    extract_page_range,
+    merge_page_ranges,
+    plan_page_ranges,
+)
+from app import worker
+from app.services.blob_store import BlobNotFoundError
+from app.services.scheduling import acquire_slot, inflight
+from app.services.task_events import register_webhook
+from app.services.task_results import to_parse_result
+from app.worker import (
+    blob_store,
+    celery_app,
+    fail_split_parse_task,
+    merge_pdf_pages_task,
+    parse_pdf_pages_task,
+    split_parse,
+)
+from tests.pdf_samples import make_pdf, make_text_pdf
+
+
+GRADES_TABLE = [("Student", "Score", "Grade")] + [(f"S{i}", str(60 + i), "B") for i in range(8)]
+
+SAMPLE_DOCUMENTS = {
+    "prose": make_text_pdf(7, lines_per_page=3),
+    "mixed": make_pdf([GRADES_TABLE, ["Plain prose page."], [".1", "Intro text"], [], GRADES_TABLE]),
+    "partial_numbering": make_pdf([[".1"], ["Intro text"], ["Closing page."]]),
+}
+
+
+def sequential_markdown(file_data: bytes) -> str:
+    return MarkItDown().convert_stream(io.BytesIO(file_data)).text_content
+
+
+def test_count_pages():
+    """Test that the page count is read from the document catalog"""
+    assert count_pages(make_text_pdf(7)) == 7
+    assert count_pages(make_text_pdf(1)) == 1
+
+
+def test_plan_page_ranges():
+    """Test that ranges cover every page exactly once"""
+    assert plan_page_ranges(7, 3) == [(0, 3), (3, 6), (6, 7)]
+    assert plan_page_ranges(3, 3) == [(0, 3)]
+
+
+@pytest.mark.parametrize("name", sorted(SAMPLE_DOCUMENTS))
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 100])
+def test_page_ranges_match_sequential_output(name, chunk_size):
+    """Test that split/merge produces exactly MarkItDown's sequential markdown"""
+    file_data = SAMPLE_DOCUMENTS[name]
+    assert convert_by_pages(file_data, chunk_size) == sequential_markdown(file_data)
+
+
+def test_merge_orders_ranges_by_page():
+    """Test that ranges finishing out of order are merged in page order"""
+    file_data = SAMPLE_DOCUMENTS["prose"]
+    ranges = [extract_page_range(file_data, start, end) for start, end in plan_page_ranges(7, 2)]
+    random.Random(0).shuffle(ranges)
+    
+    assert merge_page_ranges(ranges) == sequential_markdown(file_data)
+
+
+@pytest.mark.parametrize("name", ["prose", "partial_numbering"])
+def test_incremental_markdown_matches_sequential_output(name):
+    """Test that page-by-page output concatenates to MarkItDown's markdown"""
+    file_data = SAMPLE_DOCUMENTS[name]
+    markdown = IncrementalMarkdown()
+    chunks = [
+        markdown.feed("".join(page["text"] for page in extract_page_range(file_data, start, end)["pages"]))
+        for start, end in plan_page_ranges(count_pages(file_data), 1)
+    ]
+    chunks.append(markdown.finish())
+    
+    assert "".join(chunks) == sequential_markdown(file_data)
+    if name == "prose":
+        assert chunks[0]
+
+
+def test_page_range_tasks_directly():
+    """Test the fan-out tasks end to end without a broker"""
+    file_data = SAMPLE_DOCUMENTS["mixed"]
+    blob_key = blob_store.put(file_data)
+    
+    ranges = [parse_pdf_pages_task(blob_key, start, end) for start, end in plan_page_ranges(5, 2)]
+    result = merge_pdf_pages_task(ranges, blob_key, "0" * 64, "test_user", "test_file")
+    
+    assert result["status"] == "success"
+    assert result["content"] == sequential_markdown(file_data)
+    assert result["user_id"] == "test_user"
+
+
+def test_failed_page_range_fails_document(monkeypatch):
+    """Test that a split parse whose page range fails is failed and cleaned up in place of the merge step"""
+    sent = []
+    monkeypatch.setattr(worker.deliver_webhook_task, "delay", lambda *args: sent.append(args))
+    blob_key = blob_store.put(SAMPLE_DOCUMENTS["mixed"])
+    task_id = str(uuid.uuid4())
+    user_id = f"split-{uuid.uuid4()}"
+
+    split = split_parse(blob_key, "0" * 64, user_id, "essay", plan_page_ranges(5, 2))
+    assert [errback["task"] for errback in split.body.options["link_error"]] == [fail_split_parse_task.name]
+    assert len(split.tasks) == 3
+
+    acquire_slot(task_id, user_id)
+    register_webhook(task_id, "https://93.184.216.34/hook")
+    request = SimpleNamespace(id=task_id)
+
+    fail_split_parse_task(request, ChordError("Dependency raised ParseTimeoutError()"), None, blob_key, user_id, "essay")
+
+    with pytest.raises(BlobNotFoundError):
+        blob_store.get(blob_key)
+    assert inflight(user_id) == 0
+    stored = celery_app.AsyncResult(task_id)
+    result = to_parse_result(task_id, stored.state, stored.result, include_content=False)
+    assert result.status.value == "failed"
+    assert "ParseTimeoutError" in result.error
+    assert sent == [("https://93.184.216.34/hook", {
+        "task_id": task_id, "status": "failed", "error": result.error, "links": {"result": f"/task/{task_id}"}
+    })]
@@ -6,7 +6,7 @@ from app.services.pdf_parser import PDFParserService, PDFParsingError
 def test_pdf_parser_service_initialization():
     """Test that PDFParserService initializes correctly"""
     service = PDFParserService()
-    assert service._markitdown is not None
+    assert service.engine is None
 
 
 def test_pdf_parser_with_empty_bytes():
@@ -0,0 +1,101 @@
+import io
+import uuid
+from io import BytesIO
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.config import settings
+from app.services.preflight import InvalidPDFError, inspect_pdf
+from tests.pdf_samples import make_pdf, make_text_pdf
+
+
+client = TestClient(main.app)
+
+
+def encrypted_pdf():
+    """A PDF whose standard security handler needs a user password"""
+    encrypt = (
+        b"/Encrypt << /Filter /Standard /V 1 /R 2 /O <" + b"ab" * 32 + b"> /U <" + b"cd" * 32
+        + b"> /P -4 >> /ID [<" + b"00" * 16 + b"> <" + b"00" * 16 + b">]"
+    )
+    return make_text_pdf(1).replace(b"/Root 1 0 R >>", b"/Root 1 0 R " + encrypt + b" >>")
+
+
+def test_metadata():
+    """Test that a valid PDF passes with its page count and text layer"""
+    data = make_text_pdf(3) + f"\n% {uuid.uuid4()}".encode()
+    file = io.BytesIO(data)
+
+    metadata = inspect_pdf(file)
+
+    assert metadata.size == len(data)
+    assert metadata.page_count == 3
+    assert metadata.pdf_version == "1.4"
+    assert not metadata.encrypted
+    assert metadata.has_text_layer
+    assert file.tell() == 0
+
+
+def test_no_text_layer():
+    """Test that pages without fonts are reported as having no text layer"""
+    data = make_pdf([[]]).replace(b"/Resources << /Font << /F1 3 0 R >> >> ", b"")
+
+    assert not inspect_pdf(io.BytesIO(data)).has_text_layer
+
+
+@pytest.mark.parametrize("data, message", [
+    (b"not a pdf", "not a PDF"),
+    (make_text_pdf(2)[:-200], "truncated"),
+    (b"%PDF-1.4\n1 0 obj\n<< >>\nendobj\n%%EOF\n", "unreadable"),
+    (encrypted_pdf(), "password protected"),
+    (make_pdf([]), "no pages"),
+])
+def test_rejects(data, message):
+    """Test that broken, encrypted and empty PDFs are rejected"""
+    with pytest.raises(InvalidPDFError, match=message):
+        inspect_pdf(io.BytesIO(data))
+
+
+def test_max_pages(monkeypatch):
+    """Test that PDFs above MAX_PAGES are rejected"""
+    monkeypatch.setattr(settings, "MAX_PAGES", 2)
+
+    assert inspect_pdf(io.BytesIO(make_text_pdf(2))).page_count == 2
+    with pytest.raises(InvalidPDFError, match="Maximum: 2"):
+        inspect_pdf(io.BytesIO(make_text_pdf(3)))
+
+
+def test_parse_rejects_invalid_pdf():
+    """Test that /parse answers 422 for a body that isn't a PDF, without enqueueing"""
+    files = {"file": ("fake.pdf", BytesIO(b"<html>not a pdf</html>"), "application/pdf")}
+
+    response = client.post("/parse", files=files)
+
+    assert response.status_code == 422
+    assert response.json()["detail"] == "File is not a PDF"
+
+
+def test_parse_returns_metadata():
+    """Test that /parse returns the pre-flight metadata of the upload"""
+    data = make_text_pdf(2) + f"\n% {uuid.uuid4()}".encode()
+    files = {"file": ("test.pdf", BytesIO(data), "application/pdf")}
+
+    response = client.post("/parse", files=files)
+
+    assert response.status_code == 200
+    assert response.json()["metadata"]["page_count"] == 2
+
+
+def test_batch_rejects_invalid_pdf():
+    """Test that one invalid file rejects a batch, naming the file"""
+    files = [
+        ("files", ("ok.pdf", BytesIO(make_text_pdf(1) + f"\n% {uuid.uuid4()}".encode()), "application/pdf")),
+        ("files", ("locked.pdf", BytesIO(encrypted_pdf()), "application/pdf")),
+    ]
+
+    response = client.post("/parse/batch", files=files)
+
+    assert response.status_code == 422
+    assert response.json()["detail"] == "locked.pdf: PDF is password protected"
@@ -0,0 +1,199 @@
+import time
+import uuid
+from io import BytesIO
+
+import pytest
+from celery.exceptions import SoftTimeLimitExceeded
+from fastapi.testclient import TestClient
+
+from app import main
+from app.config import settings
+from app.services.blob_store import BlobNotFoundError
+from app.services.quarantine import (
+    ATTEMPT_ALIVE_KEY_PREFIX,
+    ATTEMPTS_KEY_PREFIX,
+    PDFQuarantinedError,
+    ParseTimeoutError,
+    STRIKE_KEY_PREFIX,
+    crash_guard,
+    is_quarantined,
+    quarantine,
+    release,
+)
+from app.services.redis_client import get_redis
+from app.services.result_cache import ResultCache
+from app.worker import blob_store, parse_pdf_blob_task
+from tests.pdf_samples import make_text_pdf
+
+
+client = TestClient(main.app)
+
+
+def unique_pdf():
+    return make_text_pdf(1) + f"\n% {uuid.uuid4()}".encode()
+
+
+def abandon_attempt(content_hash):
+    """Leave an attempt behind as a killed pool process would"""
+    started = time.time() - settings.TASK_TIME_LIMIT - 3600
+    get_redis().hset(f"{ATTEMPTS_KEY_PREFIX}{content_hash}", uuid.uuid4().hex, started)
+
+
+def test_finished_attempts_are_not_strikes():
+    """Test that parses that return or fail normally never quarantine a PDF"""
+    content_hash = uuid.uuid4().hex
+
+    for _ in range(settings.QUARANTINE_AFTER_STRIKES + 1):
+        with crash_guard(content_hash):
+            pass
+    with pytest.raises(ValueError):
+        with crash_guard(content_hash):
+            raise ValueError("bad xref")
+
+    assert not is_quarantined(content_hash)
+    assert not get_redis().exists(f"{ATTEMPTS_KEY_PREFIX}{content_hash}")
+
+
+def test_concurrent_attempts_are_not_strikes():
+    """Test that parses of the same PDF running side by side don't count as crashes"""
+    content_hash = uuid.uuid4().hex
+
+    with crash_guard(content_hash):
+        with crash_guard(content_hash):
+            with crash_guard(content_hash):
+                pass
+
+    assert not is_quarantined(content_hash)
+
+
+def test_abandoned_attempts_quarantine():
+    """Test that attempts killed mid-parse quarantine the PDF on the next attempt"""
+    content_hash = uuid.uuid4().hex
+    for _ in range(settings.QUARANTINE_AFTER_STRIKES):
+        abandon_attempt(content_hash)
+
+    with pytest.raises(PDFQuarantinedError):
+        with crash_guard(content_hash):
+            pass
+
+    assert is_quarantined(content_hash)
+    release(content_hash)
+    assert not is_quarantined(content_hash)
+
+
+def test_soft_timeouts_quarantine():
+    """Test that a soft time limit fails the parse and counts as a strike"""
+    content_hash = uuid.uuid4().hex
+
+    for _ in range(settings.QUARANTINE_AFTER_STRIKES):
+        with pytest.raises(ParseTimeoutError):
+            with crash_guard(content_hash):
+                raise SoftTimeLimitExceeded()
+
+    assert is_quarantined(content_hash)
+    release(content_hash)
+
+
+def test_crashed_attempts_are_found_by_their_heartbeat():
+    """Test that an attempt whose heartbeat stopped is a strike long before the hard time limit"""
+    content_hash = uuid.uuid4().hex
+    client = get_redis()
+    started = time.time() - settings.QUARANTINE_HEARTBEAT_TTL - 1
+    client.hset(f"{ATTEMPTS_KEY_PREFIX}{content_hash}", "running", started)
+    client.set(f"{ATTEMPT_ALIVE_KEY_PREFIX}running", 1)
+    client.hset(f"{ATTEMPTS_KEY_PREFIX}{content_hash}", "crashed", started)
+
+    with crash_guard(content_hash):
+        assert client.exists(f"{ATTEMPT_ALIVE_KEY_PREFIX}running")
+
+    assert int(client.get(f"{STRIKE_KEY_PREFIX}{content_hash}")) == 1
+    assert client.hkeys(f"{ATTEMPTS_KEY_PREFIX}{content_hash}") == [b"running"]
+    client.delete(f"{ATTEMPT_ALIVE_KEY_PREFIX}running")
+    release(content_hash)
+
+
+def test_running_attempt_keeps_its_heartbeat(monkeypatch):
+    """Test that a running attempt's liveness key is refreshed and removed when it finishes"""
+    monkeypatch.setattr(settings, "QUARANTINE_HEARTBEAT_TTL", 3)
+    content_hash = uuid.uuid4().hex
+    client = get_redis()
+
+    with crash_guard(content_hash):
+        (attempt,) = client.hkeys(f"{ATTEMPTS_KEY_PREFIX}{content_hash}")
+        alive_key = f"{ATTEMPT_ALIVE_KEY_PREFIX}{attempt.decode()}"
+        time.sleep(4)
+        assert client.exists(alive_key)
+
+    assert not client.exists(alive_key)
+
+
+def test_soft_timeout_after_checkpoint_progress_is_not_a_strike():
+    """Test that a parse that saved checkpoint ranges before the soft time limit isn't counted against the PDF"""
+    content_hash = uuid.uuid4().hex
+    saved = [0]
+
+    for _ in range(settings.QUARANTINE_AFTER_STRIKES):
+        with pytest.raises(ParseTimeoutError):
+            with crash_guard(content_hash, lambda: saved[0]):
+                saved[0] += 1
+                raise SoftTimeLimitExceeded()
+
+    assert not is_quarantined(content_hash)
+
+    with pytest.raises(ParseTimeoutError):
+        with crash_guard(content_hash, lambda: saved[0]):
+            raise SoftTimeLimitExceeded()
+
+    assert int(get_redis().get(f"{STRIKE_KEY_PREFIX}{content_hash}")) == 1
+    release(content_hash)
+
+
+def test_quarantined_upload_rejected():
+    """Test that /parse refuses a quarantined PDF with 422"""
+    pdf_bytes = unique_pdf()
+    content_hash = ResultCache.content_hash(pdf_bytes)
+    quarantine(content_hash)
+    try:
+        files = {"file": ("poison.pdf", BytesIO(pdf_bytes), "application/pdf")}
+        response = client.post("/parse", files=files)
+
+        assert response.status_code == 422
+        assert "quarantined" in response.json()["detail"]
+        assert client.post("/parse", files={"file": ("ok.pdf", BytesIO(unique_pdf()), "application/pdf")}).status_code == 200
+    finally:
+        release(content_hash)
+
+
+def test_quarantined_batch_rejected():
+    """Test that a batch containing a quarantined PDF is refused with 422"""
+    pdf_bytes = unique_pdf()
+    content_hash = ResultCache.content_hash(pdf_bytes)
+    quarantine(content_hash)
+    try:
+        files = [
+            ("files", ("ok.pdf", BytesIO(unique_pdf()), "application/pdf")),
+            ("files", ("poison.pdf", BytesIO(pdf_bytes), "application/pdf")),
+        ]
+        response = client.post("/parse/batch", files=files)
+
+        assert response.status_code == 422
+        assert response.json()["detail"].startswith("poison.pdf:")
+    finally:
+        release(content_hash)
+
+
+def test_quarantined_task_fails_without_parsing():
+    """Test that a queued quarantined PDF fails fast and its blob is deleted"""
+    pdf_bytes = unique_pdf()
+    content_hash = ResultCache.content_hash(pdf_bytes)
+    blob_key = blob_store.put(pdf_bytes)
+    quarantine(content_hash)
+    try:
+        result = parse_pdf_blob_task.apply(args=(blob_key, "quarantine-test")).get()
+
+        assert result["status"] == "failed"
+        assert "quarantined" in result["error"]
+        with pytest.raises(BlobNotFoundError):
+            blob_store.get(blob_key)
+    finally:
+        release(content_hash)
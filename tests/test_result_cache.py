@@ -0,0 +1,83 @@
+import pytest
+import uuid
+
+from app.services.result_cache import ResultCache
+
+
+@pytest.fixture
+def cache():
+    """Result cache under a throwaway prefix so tests don't touch real entries"""
+    cache = ResultCache(prefix=f"test-pdfcache-{uuid.uuid4().hex}", ttl=60, max_bytes=100)
+    yield cache
+    cache.clear()
+
+
+def test_content_hash_is_sha256():
+    """Test that cache keys are SHA-256 digests of the content"""
+    digest = ResultCache.content_hash(b"%PDF-1.4")
+    assert len(digest) == 64
+    assert digest == ResultCache.content_hash(b"%PDF-1.4")
+    assert digest != ResultCache.content_hash(b"%PDF-1.5")
+
+
+def test_cache_roundtrip_and_counters(cache):
+    """Test that stored markdown is returned and hits/misses are counted"""
+    assert cache.get("abc") is None
+    assert cache.set("abc", "# Hello") is True
+    assert cache.get("abc") == "# Hello"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+    assert stats["bytes"] == len("# Hello")
+
+
+def test_unrecorded_lookups_are_not_counted(cache):
+    """Test that a repeated lookup of the same upload doesn't count again but still refreshes the entry"""
+    assert cache.get("abc", record=False) is None
+    cache.set("abc", "# Hello")
+    cache.client.expire(f"{cache.prefix}:entry:abc", 5)
+    assert cache.get("abc", record=False) == "# Hello"
+
+    stats = cache.stats()
+    assert stats["hits"] == 0
+    assert stats["misses"] == 0
+    assert cache.client.ttl(f"{cache.prefix}:entry:abc") > 5
+
+
+def test_cache_entries_have_ttl(cache):
+    """Test that entries expire on their own"""
+    cache.set("abc", "content")
+    ttl = cache.client.ttl(f"{cache.prefix}:entry:abc")
+    assert 0 < ttl <= 60
+
+
+def test_cache_evicts_least_recently_used(cache):
+    """Test that the byte cap evicts the least recently used entry"""
+    cache.set("first", "a" * 40)
+    cache.set("second", "b" * 40)
+    # Touch the first entry so the second becomes least recently used
+    assert cache.get("first") is not None
+
+    cache.set("third", "c" * 40)
+
+    assert cache.get("second") is None
+    assert cache.get("first") == "a" * 40
+    assert cache.get("third") == "c" * 40
+    assert cache.stats()["bytes"] == 80
+
+
+def test_cache_overwrite_keeps_size_accounting(cache):
+    """Test that re-caching a hash does not double count its size"""
+    cache.set("abc", "x" * 30)
+    cache.set("abc", "y" * 20)
+    assert cache.stats()["bytes"] == 20
+    assert cache.get("abc") == "y" * 20
+
+
+def test_cache_skips_oversized_entries(cache):
+    """Test that entries larger than the cache are not stored"""
+    assert cache.set("big", "x" * 101) is False
+    assert cache.get("big") is None
+    assert cache.stats()["entries"] == 0
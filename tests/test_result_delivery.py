@@ -0,0 +1,119 @@
+import time
+import uuid
+from io import BytesIO
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.services.pdf_pages import page_offsets
+from app.services.result_delivery import (
+    RangeNotSatisfiableError,
+    choose_encoding,
+    etag_matches,
+    page_slice,
+    parse_byte_range,
+    parse_pages,
+)
+from tests.pdf_samples import make_text_pdf
+
+
+client = TestClient(main.app)
+
+
+def parsed_task(page_count, lines_per_page=3):
+    """Upload a unique text PDF and wait for its result"""
+    pdf_bytes = make_text_pdf(page_count, lines_per_page) + f"\n% {uuid.uuid4()}".encode()
+    files = {"file": ("test.pdf", BytesIO(pdf_bytes), "application/pdf")}
+    task_id = client.post("/parse", files=files).json()["task_id"]
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        result = client.get(f"/task/{task_id}").json()
+        if result["status"] in ("success", "failed"):
+            return task_id, result
+        time.sleep(0.2)
+    raise TimeoutError(task_id)
+
+
+def test_page_offsets_follow_form_feeds():
+    """Test that page offsets come from form feeds, padded for stripped trailing pages"""
+    content = "one\n\n\ftwö\n\n\fthree\n"
+
+    assert page_offsets(content) == [0, 6, 13, 19]
+    assert page_offsets(content, 3) == [0, 6, 13, 19]
+    assert page_offsets(content, 4) == [0, 6, 13, 19, 19]
+    assert page_offsets(content, 2) is None
+    assert page_offsets("| a | b |\n", 2) is None
+    assert page_offsets("single page\n", 1) == [0, 12]
+
+
+def test_range_parsing():
+    """Test pages and Range header parsing, including suffix and unsatisfiable ranges"""
+    assert parse_pages("12-14") == (12, 14)
+    assert parse_pages("3") == (3, 3)
+    for spec in ("0", "5-2", "a-b", "1,3"):
+        with pytest.raises(ValueError):
+            parse_pages(spec)
+    assert page_slice([0, 10, 25, 40], 2, 3) == (10, 40)
+    with pytest.raises(RangeNotSatisfiableError):
+        page_slice([0, 10, 25, 40], 3, 4)
+
+    assert parse_byte_range("bytes=0-9", 100) == (0, 10)
+    assert parse_byte_range("bytes=90-", 100) == (90, 100)
+    assert parse_byte_range("bytes=-30", 100) == (70, 100)
+    assert parse_byte_range("bytes=50-500", 100) == (50, 100)
+    assert parse_byte_range("bytes=0-1,5-6", 100) is None
+    assert parse_byte_range("items=0-1", 100) is None
+    with pytest.raises(RangeNotSatisfiableError):
+        parse_byte_range("bytes=100-", 100)
+
+
+def test_content_negotiation():
+    """Test that gzip is chosen when accepted and refused codings are respected"""
+    assert choose_encoding("gzip, deflate") in ("gzip", "br")
+    assert choose_encoding("gzip;q=0, identity") is None
+    assert choose_encoding(None) is None
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert not etag_matches('"abc"', '"def"')
+
+
+def test_task_pages_and_byte_ranges():
+    """Test that ?pages= and Range return slices cut at the recorded page offsets"""
+    task_id, result = parsed_task(4)
+    offsets = result["page_offsets"]
+    data = result["content"].encode("utf-8")
+    assert len(offsets) == 5
+
+    response = client.get(f"/task/{task_id}", params={"pages": "2-3"})
+    assert response.status_code == 200
+    content = response.json()["content"]
+    assert content == data[offsets[1]:offsets[3]].decode("utf-8")
+    assert "Page 2 line 0" in content and "Page 3 line 2" in content
+    assert "Page 1 " not in content and "Page 4 " not in content
+
+    response = client.get(f"/task/{task_id}", params={"pages": "2"}, headers={"Range": "bytes=0-5"})
+    assert response.status_code == 206
+    assert response.content == data[offsets[1]:offsets[1] + 6]
+    assert response.headers["content-range"] == f"bytes 0-5/{offsets[2] - offsets[1]}"
+
+    assert client.get(f"/task/{task_id}", params={"pages": "5-6"}).status_code == 416
+    assert client.get(f"/task/{task_id}", params={"pages": "x"}).status_code == 400
+    assert client.get(f"/task/{task_id}", headers={"Range": f"bytes={len(data)}-"}).status_code == 416
+
+
+def test_task_etag_and_compression():
+    """Test that results carry an ETag honoured by If-None-Match and large ones are gzipped"""
+    task_id, _ = parsed_task(20, lines_per_page=5)
+
+    response = client.get(f"/task/{task_id}", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    tag = response.headers["etag"]
+
+    cached = client.get(f"/task/{task_id}", headers={"Accept-Encoding": "gzip", "If-None-Match": tag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    plain = client.get(f"/task/{task_id}", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["etag"] != tag
+    assert response.json() == plain.json()
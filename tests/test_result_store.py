@@ -0,0 +1,82 @@
+import uuid
+
+import pytest
+from celery import states
+
+from app.config import settings
+from app.models import TaskStatus
+from app.services.blob_store import FilesystemBlobStore, RedisBlobStore
+from app.services.result_store import ResultExpiredError, pack_result, unpack_content, unpack_result
+from app.services.task_results import to_parse_result
+
+
+MARKDOWN = "\n".join(f"Line {i}: the quick brown fox jumps over the lazy dog." for i in range(2000))
+
+
+@pytest.fixture(params=["redis", "filesystem"])
+def store(request, tmp_path):
+    """Each result blob store backend, isolated from real results"""
+    if request.param == "redis":
+        return RedisBlobStore(prefix=f"test-pdfresult-{uuid.uuid4().hex}", ttl=60)
+    return FilesystemBlobStore(root=str(tmp_path), ttl=60, suffix=".md.z")
+
+
+def make_result(content):
+    return {"status": "success", "content": content, "user_id": "u1", "file_id": "f1", "error": None}
+
+
+def test_small_results_are_stored_as_is():
+    """Test that content below the compression threshold is left alone"""
+    result = make_result("# Short")
+    assert pack_result(result) == result
+    assert pack_result(make_result(None)) == make_result(None)
+
+
+def test_results_are_compressed_inline(monkeypatch):
+    """Test that medium content is compressed into the result itself"""
+    monkeypatch.setattr(settings, "RESULT_OFFLOAD_THRESHOLD", 10 * len(MARKDOWN))
+
+    packed = pack_result(make_result(MARKDOWN))
+
+    assert packed["content"] is None
+    assert len(packed["compressed_content"]) < len(MARKDOWN) / 4
+    assert "content_blob" not in packed
+    assert unpack_result(packed) == make_result(MARKDOWN)
+
+
+def test_large_results_are_offloaded(store, monkeypatch):
+    """Test that large content is moved to the result blob store"""
+    monkeypatch.setattr(settings, "RESULT_OFFLOAD_THRESHOLD", 100)
+
+    packed = pack_result(make_result(MARKDOWN), store)
+
+    assert packed["content"] is None
+    assert "compressed_content" not in packed
+    assert unpack_content(packed, store) == MARKDOWN
+
+    store.delete(packed["content_blob"])
+    with pytest.raises(ResultExpiredError):
+        unpack_content(packed, store)
+
+
+def test_to_parse_result_restores_content(monkeypatch):
+    """Test that API results are decompressed transparently"""
+    monkeypatch.setattr(settings, "RESULT_OFFLOAD_THRESHOLD", 100)
+    packed = pack_result(make_result(MARKDOWN))
+
+    result = to_parse_result("t1", states.SUCCESS, packed)
+    assert result.status == TaskStatus.SUCCESS
+    assert result.content == MARKDOWN
+
+    summary = to_parse_result("t1", states.SUCCESS, packed, include_content=False)
+    assert summary.status == TaskStatus.SUCCESS
+    assert summary.content is None
+
+
+def test_to_parse_result_with_expired_content():
+    """Test that a result whose offloaded content expired is reported as failed"""
+    packed = dict(make_result(None), content_blob=uuid.uuid4().hex)
+
+    result = to_parse_result("t1", states.SUCCESS, packed)
+    assert result.status == TaskStatus.FAILED
+    assert result.error == "Parsed content expired"
@@ -0,0 +1,102 @@
+import io
+import time
+import uuid
+
+import pytest
+
+from app.config import settings
+from app.services.backlog import queue_keys
+from app.services.redis_client import get_redis
+from app.services.scheduling import acquire_slot, choose_queue, inflight, measure_job, release_slot
+from app.worker import submit_parse_task
+from tests.pdf_samples import make_text_pdf
+
+
+@pytest.fixture
+def queues(monkeypatch):
+    """Small and large queues no worker consumes, removed afterwards"""
+    names = {"small": f"test-small-{uuid.uuid4().hex}", "large": f"test-large-{uuid.uuid4().hex}"}
+    monkeypatch.setattr(settings, "SMALL_QUEUE", names["small"])
+    monkeypatch.setattr(settings, "LARGE_QUEUE", names["large"])
+    yield names
+    client = get_redis()
+    for name in names.values():
+        client.delete(*queue_keys(name), f"_kombu.binding.{name}")
+
+
+def queued_priorities(queue):
+    """Number of waiting messages per priority step"""
+    client = get_redis()
+    return [client.llen(key) for key in queue_keys(queue)]
+
+
+def test_measure_job():
+    """Test reading size and page count without consuming the stream"""
+    pdf_bytes = make_text_pdf(3)
+    stream = io.BytesIO(pdf_bytes)
+
+    assert measure_job(stream) == (len(pdf_bytes), 3)
+    assert stream.read() == pdf_bytes
+
+    assert measure_job(io.BytesIO(b"not a pdf")) == (9, None)
+
+
+def test_choose_queue(monkeypatch):
+    """Test that either threshold sends a job to the large queue"""
+    monkeypatch.setattr(settings, "LARGE_JOB_BYTES", 1000)
+    monkeypatch.setattr(settings, "LARGE_JOB_PAGES", 10)
+
+    assert choose_queue(999, 9) == settings.SMALL_QUEUE
+    assert choose_queue(999, None) == settings.SMALL_QUEUE
+    assert choose_queue(1000, 1) == settings.LARGE_QUEUE
+    assert choose_queue(10, 10) == settings.LARGE_QUEUE
+
+
+def test_fair_share_priorities():
+    """Test that a user's priority follows their in-flight jobs"""
+    user_id = f"user-{uuid.uuid4().hex}"
+    task_ids = [str(uuid.uuid4()) for _ in range(12)]
+
+    priorities = [acquire_slot(task_id, user_id) for task_id in task_ids]
+    assert priorities == [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 9, 9]
+    assert inflight(user_id) == 12
+
+    for task_id in task_ids:
+        release_slot(task_id)
+        release_slot(task_id)
+    assert inflight(user_id) == 0
+    assert acquire_slot(str(uuid.uuid4()), user_id) == 0
+
+
+def test_submit_routes_by_page_count(queues, monkeypatch):
+    """Test that submissions are routed and prioritized per user"""
+    monkeypatch.setattr(settings, "LARGE_JOB_PAGES", 3)
+    user_id = f"user-{uuid.uuid4().hex}"
+
+    tasks = [
+        submit_parse_task(make_text_pdf(1), user_id),
+        submit_parse_task(make_text_pdf(1), user_id),
+        submit_parse_task(io.BytesIO(make_text_pdf(4)), user_id),
+    ]
+
+    assert queued_priorities(queues["small"])[:3] == [1, 1, 0]
+    assert queued_priorities(queues["large"])[:3] == [0, 0, 1]
+    assert inflight(user_id) == 3
+
+    for task in tasks:
+        release_slot(task.id)
+    assert inflight(user_id) == 0
+
+
+def test_finished_jobs_release_their_slot():
+    """Test that the worker stops counting a job once it finishes"""
+    user_id = f"user-{uuid.uuid4().hex}"
+    task = submit_parse_task(make_text_pdf(1) + f"% {uuid.uuid4()}".encode(), user_id)
+    assert inflight(user_id) == 1
+
+    assert task.get(timeout=30)["status"] == "success"
+
+    deadline = time.time() + 5
+    while inflight(user_id) and time.time() < deadline:
+        time.sleep(0.05)
+    assert inflight(user_id) == 0
@@ -0,0 +1,116 @@
+import sqlite3
+import time
+import uuid
+from io import BytesIO
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main, worker
+from app.config import settings
+from app.services.search_index import InvalidSearchQueryError, SearchIndex, match_expression
+from tests.pdf_samples import make_pdf
+
+
+client = TestClient(main.app)
+
+
+@pytest.fixture
+def index(tmp_path):
+    return SearchIndex(str(tmp_path / "search.db"))
+
+
+def test_match_expression_quotes_terms():
+    """Test that query terms are matched literally and quoted phrases kept together"""
+    assert match_expression('photo synthesis') == '"photo" "synthesis"'
+    assert match_expression('"light reaction" NOT') == '"light reaction" "NOT"'
+    assert match_expression('say "hi') == '"say" """hi"'
+    with pytest.raises(InvalidSearchQueryError):
+        match_expression(' "" ')
+
+
+def test_search_ranks_filters_and_pages(index):
+    """Test BM25 ordering, user_id scoping, pagination and snippets"""
+    index.upsert("alice", "essay-1", "task-1", "Photosynthesis photosynthesis converts light into energy.")
+    index.upsert("alice", "essay-2", "task-2", "The cell wall. Later, photosynthesis is mentioned once among many other words.")
+    index.upsert("bob", "essay-1", "task-3", "Photosynthesis happens in chloroplasts.")
+    index.upsert("bob", "essay-2", "task-4", "Mitochondria produce energy.")
+
+    total, hits = index.search("photosynthesis")
+    assert total == 3
+    assert hits[0]["file_id"] == "essay-1" and hits[0]["user_id"] == "alice"
+    assert hits[0]["score"] >= hits[1]["score"] >= hits[2]["score"]
+    assert "<mark>Photosynthesis</mark>" in hits[0]["snippet"]
+
+    assert index.search("photosynthesis", offset=1, limit=1) == (3, hits[1:2])
+
+    total, scoped = index.search("photosynthesis", user_id="bob")
+    assert total == 1
+    assert [hit["task_id"] for hit in scoped] == ["task-3"]
+
+    assert index.search('"light into energy"')[0] == 1
+    assert index.search("energy cell")[0] == 0
+    assert index.search("photosynthesis", offset=10) == (3, [])
+
+
+def test_reindexing_replaces_document(index):
+    """Test that a re-parse of the same user_id/file_id replaces the indexed markdown"""
+    index.upsert("alice", "essay", "task-1", "First draft about glaciers.")
+    index.upsert("alice", "essay", "task-2", "Final version about volcanoes.")
+
+    assert index.count() == 1
+    assert index.search("glaciers") == (0, [])
+    assert index.search("volcanoes")[1][0]["task_id"] == "task-2"
+
+    assert index.delete("alice", "essay")
+    assert not index.delete("alice", "essay")
+    assert index.search("volcanoes") == (0, [])
+
+
+def test_searches_dont_wait_for_the_writer(monkeypatch, index):
+    """Test that a new reader searches while another connection holds the write lock"""
+    index.upsert("alice", "essay", "task-1", "Notes about glaciers.")
+    monkeypatch.setattr(settings, "SEARCH_INDEX_TIMEOUT", 0.1)
+    writer = sqlite3.connect(index.path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        reader = SearchIndex(index.path)
+        assert reader.search("glaciers")[0] == 1
+        assert reader.count() == 1
+        with pytest.raises(sqlite3.OperationalError):
+            reader._reader().execute("DELETE FROM documents")
+    finally:
+        writer.rollback()
+        writer.close()
+
+
+def test_search_endpoint(monkeypatch, index):
+    """Test that a parsed upload is indexed from its task result and found through /search"""
+    monkeypatch.setattr(worker, "search_index", index)
+    monkeypatch.setattr(main, "search_index", index)
+    user_id = f"search-{uuid.uuid4()}"
+    pdf_bytes = make_pdf([["Essay on photosynthesis in desert plants."], ["Conclusion."]])
+    files = {"file": ("essay.pdf", BytesIO(pdf_bytes + f"\n% {uuid.uuid4()}".encode()), "application/pdf")}
+    task_id = client.post("/parse", files=files, params={"user_id": user_id, "file_id": "essay"}).json()["task_id"]
+    deadline = time.time() + 30
+    while client.get(f"/task/{task_id}").json()["status"] != "success":
+        assert time.time() < deadline
+        time.sleep(0.2)
+
+    assert worker.index_search_document_task(task_id)
+    assert not worker.index_search_document_task(str(uuid.uuid4()))
+
+    monkeypatch.setattr(settings, "SEARCH_INDEX_ENABLED", False)
+    assert client.get("/search", params={"q": "photosynthesis"}).status_code == 404
+
+    monkeypatch.setattr(settings, "SEARCH_INDEX_ENABLED", True)
+    response = client.get("/search", params={"q": "desert photosynthesis", "user_id": user_id})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 1
+    assert body["hits"][0]["file_id"] == "essay"
+    assert body["hits"][0]["task_id"] == task_id
+    assert "<mark>photosynthesis</mark>" in body["hits"][0]["snippet"]
+
+    assert client.get("/search", params={"q": '""'}).status_code == 400
+    assert client.get("/search", params={"q": "x", "limit": 1000}).status_code == 422
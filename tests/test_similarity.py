@@ -0,0 +1,125 @@
+import random
+import time
+import uuid
+from io import BytesIO
+
+from fastapi.testclient import TestClient
+
+from app import main, worker
+from app.config import settings
+from app.services.similarity import SimilarityIndex, estimate_similarity, minhash, shingles
+from tests.pdf_samples import make_pdf
+
+
+client = TestClient(main.app)
+
+_VOCABULARY = [f"word{n}" for n in range(2000)]
+
+
+def essay(seed, words=600):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(_VOCABULARY) for _ in range(words))
+
+
+def edited(text, changes, seed=0):
+    """Replace ``changes`` random words of a text"""
+    words = text.split()
+    rng = random.Random(seed)
+    for i in rng.sample(range(len(words)), changes):
+        words[i] = f"edit{i}"
+    return " ".join(words)
+
+
+def jaccard(first, second):
+    a, b = shingles(first, 5), shingles(second, 5)
+    return len(a & b) / len(a | b)
+
+
+def test_signatures_are_fixed_width_and_estimate_jaccard():
+    """Test that signatures are 128 unsigned 32-bit values whose agreement tracks Jaccard similarity"""
+    index = SimilarityIndex(shingle_size=5, signature_size=128, bands=16)
+    original = essay(1)
+    signature = index.signature_of(original)
+
+    assert signature.typecode == "I" and len(signature.tobytes()) == 128 * 4
+    assert index.signature_of(original) == signature
+    assert index.signature_of("# | --- |") is None
+    assert estimate_similarity(signature, index.signature_of(original.upper())) == 1.0
+
+    for changes in (10, 40, 120):
+        copy = edited(original, changes)
+        assert abs(estimate_similarity(signature, index.signature_of(copy)) - jaccard(original, copy)) < 0.15
+    assert estimate_similarity(signature, index.signature_of(essay(2))) < 0.1
+
+
+def test_minhash_densifies_short_documents():
+    """Test that documents with fewer shingles than bins still fill every position"""
+    signature = minhash(shingles("a short answer of a few words", 5), 128)
+
+    assert len(signature) == 128
+    assert estimate_similarity(signature, minhash(shingles("a short answer of a few words", 5), 128)) == 1.0
+    assert estimate_similarity(signature, minhash(shingles("an unrelated reply entirely", 5), 128)) < 0.1
+
+
+def test_index_finds_near_duplicates_through_buckets():
+    """Test that near copies are returned, unrelated documents aren't and re-indexing moves buckets"""
+    index = SimilarityIndex(shingle_size=5, signature_size=128, bands=16)
+    user_id = f"class-{uuid.uuid4()}"
+    original = essay(1)
+    index.add(user_id, "alice", original)
+    index.add(user_id, "bob", edited(original, 6))
+    index.add(user_id, "carol", essay(3))
+    for n in range(20):
+        index.add(user_id, f"other-{n}", essay(100 + n))
+
+    matches = index.similar(user_id, "alice", threshold=0.8)
+    assert [file_id for file_id, _ in matches] == ["bob"]
+    assert matches[0][1] >= 0.8
+    assert index.similar(user_id, "carol", threshold=0.8) == []
+    assert index.similar(user_id, "missing") is None
+
+    everyone = index.similar_many(user_id, ["alice", "bob", "carol", "missing"], threshold=0.8)
+    assert set(everyone) == {"alice", "bob", "carol"}
+    assert [file_id for file_id, _ in everyone["bob"]] == ["alice"]
+
+    index.add(user_id, "bob", essay(4))
+    assert index.similar(user_id, "alice", threshold=0.8) == []
+    assert index.count(user_id) == 23
+    assert index.remove(user_id, "bob")
+    assert not index.remove(user_id, "bob")
+
+
+def test_batch_similarity_endpoint(monkeypatch):
+    """Test that indexed batch documents report their near-duplicates through the API"""
+    user_id = f"class-{uuid.uuid4()}"
+    original = essay(1, words=300)
+
+    def pdf(text):
+        words = text.split()
+        lines = [" ".join(words[i:i + 10]) for i in range(0, len(words), 10)]
+        return BytesIO(make_pdf([lines]) + f"\n% {uuid.uuid4()}".encode())
+
+    texts = {"alice.pdf": original, "bob.pdf": edited(original, 3), "carol.pdf": essay(2, words=300)}
+    files = [("files", (name, pdf(text), "application/pdf")) for name, text in texts.items()]
+    data = client.post("/parse/batch", files=files, params={"user_id": user_id}).json()
+    deadline = time.time() + 30
+    while client.get(f"/batch/{data['batch_id']}", params={"include_content": False}).json()["status"] != "success":
+        assert time.time() < deadline
+        time.sleep(0.2)
+
+    assert client.get(f"/batch/{data['batch_id']}/similar").status_code == 404
+
+    monkeypatch.setattr(settings, "SIMILARITY_INDEX_ENABLED", True)
+    for task_id in data["task_ids"]:
+        assert worker.index_similarity_task(task_id)
+
+    body = client.get(f"/batch/{data['batch_id']}/similar", params={"threshold": 0.7}).json()
+    assert body["indexed"] == 3
+    assert {(d["file_id"], d["similar"][0]["file_id"]) for d in body["documents"]} == {
+        ("alice.pdf", "bob.pdf"), ("bob.pdf", "alice.pdf")
+    }
+
+    response = client.get(f"/users/{user_id}/documents/carol.pdf/similar", params={"threshold": 0.5})
+    assert response.status_code == 200
+    assert response.json()["similar"] == []
+    assert client.get(f"/users/{user_id}/documents/nobody.pdf/similar").status_code == 404
@@ -0,0 +1,100 @@
+import time
+import uuid
+from io import BytesIO
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.page_stream import stream_key
+from app.services.redis_client import get_redis
+from app.worker import _cache_key, parse_pdf_streaming, result_cache
+from tests.pdf_samples import make_text_pdf
+
+
+client = TestClient(app)
+
+
+def unique_pdf(pages: int) -> bytes:
+    return make_text_pdf(pages) + f"\n% {time.time()}".encode()
+
+
+def read_stream(task_id: str):
+    return get_redis().xrange(stream_key(task_id))
+
+
+def test_parse_pdf_streaming_appends_pages():
+    """Test that the worker appends one chunk per page and a final marker"""
+    pdf_bytes = unique_pdf(3)
+    task_id = str(uuid.uuid4())
+    
+    result = parse_pdf_streaming(task_id, pdf_bytes, result_cache.content_hash(pdf_bytes), "stream_user")
+    
+    entries = [fields for _, fields in read_stream(task_id)]
+    chunks = [fields[b"content"].decode() for fields in entries if b"content" in fields]
+    assert result["status"] == "success"
+    assert len(chunks) >= 3
+    assert "".join(chunks) == result["content"]
+    assert entries[-1][b"done"] == b"1"
+    assert entries[-1][b"status"] == b"success"
+
+
+def test_cached_stream_is_appended_page_by_page():
+    """Test that a cache hit is streamed as one chunk per page, not the whole document"""
+    pdf_bytes = unique_pdf(3)
+    task_id = str(uuid.uuid4())
+    content = "# Page 1\n\fPage 2 ü\n\fPage 3\n"
+    result_cache.set(_cache_key(result_cache.content_hash(pdf_bytes)), content)
+    
+    result = parse_pdf_streaming(task_id, pdf_bytes, result_cache.content_hash(pdf_bytes), "stream_user")
+    
+    chunks = [fields[b"content"].decode() for _, fields in read_stream(task_id) if b"content" in fields]
+    assert result["status"] == "success"
+    assert chunks == ["# Page 1\n\f", "Page 2 ü\n\f", "Page 3\n"]
+
+
+def test_parse_pdf_streaming_failure_closes_stream():
+    """Test that a failed parse still marks the stream done"""
+    task_id = str(uuid.uuid4())
+    invalid_pdf = f"not a pdf {task_id}".encode()
+    
+    result = parse_pdf_streaming(task_id, invalid_pdf, result_cache.content_hash(invalid_pdf), "stream_user")
+    
+    entries = [fields for _, fields in read_stream(task_id)]
+    assert result["status"] == "failed"
+    assert entries[-1][b"status"] == b"failed"
+
+
+def test_stream_endpoint_for_streaming_task():
+    """Test that /task/{task_id}/stream returns the task's markdown in chunks"""
+    files = {"file": ("test.pdf", BytesIO(unique_pdf(4)), "application/pdf")}
+    task_id = client.post("/parse", files=files, params={"stream": True}).json()["task_id"]
+    
+    with client.stream("GET", f"/task/{task_id}/stream") as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/markdown")
+        chunks = list(response.iter_text())
+    
+    content = "".join(chunks)
+    assert "Page 1 line 0" in content
+    assert "Page 4 line 4" in content
+    
+    # The stream closes just before the worker stores the task result
+    for _ in range(10):
+        status_data = client.get(f"/task/{task_id}").json()
+        if status_data["status"] == "success":
+            break
+        time.sleep(0.5)
+    assert content == status_data["content"]
+
+
+def test_stream_endpoint_falls_back_to_result():
+    """Test that tasks without a stream are sent whole once finished"""
+    pdf_bytes = unique_pdf(1)
+    result_cache.set(_cache_key(result_cache.content_hash(pdf_bytes)), "# Cached markdown")
+    files = {"file": ("test.pdf", BytesIO(pdf_bytes), "application/pdf")}
+    task_id = client.post("/parse", files=files).json()["task_id"]
+    
+    response = client.get(f"/task/{task_id}/stream")
+    
+    assert response.status_code == 200
+    assert response.text == "# Cached markdown"
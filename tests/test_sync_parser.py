@@ -0,0 +1,116 @@
+import asyncio
+import hashlib
+import time
+import uuid
+from io import BytesIO
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.config import settings
+from app.services.pdf_parser import PDFParsingError
+from app.services.quarantine import quarantine
+from app.services.sync_parser import (
+    SyncParserBusyError,
+    SyncParserPool,
+    SyncParseTimeoutError,
+)
+from tests.pdf_samples import make_text_pdf
+
+
+client = TestClient(main.app)
+
+
+@pytest.fixture
+def pool():
+    parser_pool = SyncParserPool(workers=1, queue_size=1, timeout=30)
+    yield parser_pool
+    parser_pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_parse_in_pool(pool):
+    """Test that a PDF is parsed in a pool process"""
+    content = await pool.parse(make_text_pdf(2))
+
+    assert "Page 1 line 0" in content
+    assert "Page 2 line 4" in content
+    assert pool.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_parse_error_is_propagated(pool):
+    """Test that parsing errors from the pool process reach the caller"""
+    with pytest.raises(PDFParsingError):
+        await pool.parse(b"")
+
+
+@pytest.mark.asyncio
+async def test_rejects_when_saturated(pool):
+    """Test that requests beyond workers + queue_size are rejected at once"""
+    await pool.parse(make_text_pdf(1))  # start the process
+    running = asyncio.ensure_future(pool._run(time.sleep, 1))
+    queued = asyncio.ensure_future(pool._run(time.sleep, 0))
+    await asyncio.sleep(0)
+
+    with pytest.raises(SyncParserBusyError):
+        await pool.parse(make_text_pdf(1))
+
+    await asyncio.gather(running, queued)
+    assert pool.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_timeout_kills_the_parse(pool):
+    """Test that a timed-out parse is reported, its process killed and the pool replaced"""
+    await pool._run(time.sleep, 0)  # start the process
+    processes = list(pool._executor._processes.values())
+    pool.timeout = 0.5
+
+    with pytest.raises(SyncParseTimeoutError):
+        await pool._run(time.sleep, 30)
+
+    await asyncio.sleep(0.5)
+    assert pool.in_flight == 0
+    assert not any(process.is_alive() for process in processes)
+
+    pool.timeout = 30
+    assert "Page 1 line 0" in await pool.parse(make_text_pdf(1))
+
+
+def test_sync_endpoint(monkeypatch, pool):
+    """Test /parse/sync parses through the pool and rejects when saturated"""
+    monkeypatch.setattr(main, "sync_parser", pool)
+
+    files = {"file": ("test.pdf", BytesIO(make_text_pdf(1)), "application/pdf")}
+    response = client.post("/parse/sync", files=files, params={"user_id": "sync_user"})
+    assert response.status_code == 200
+    assert response.json()["status"] == "success"
+    assert "Page 1 line 0" in response.json()["content"]
+
+    pool.queue_size = 0
+    pool._submit(time.sleep, 1)
+    files = {"file": ("test.pdf", BytesIO(make_text_pdf(1)), "application/pdf")}
+    response = client.post("/parse/sync", files=files, params={"user_id": "sync_user"})
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "1"
+
+
+def test_sync_endpoint_checks_uploads(monkeypatch, pool):
+    """Test that /parse/sync applies admission, quarantine and pre-flight before parsing"""
+    monkeypatch.setattr(main, "sync_parser", pool)
+    pdf_bytes = make_text_pdf(1) + f"\n% {uuid.uuid4()}".encode()
+
+    quarantine(hashlib.sha256(pdf_bytes).hexdigest())
+    files = {"file": ("test.pdf", BytesIO(pdf_bytes), "application/pdf")}
+    assert client.post("/parse/sync", files=files).status_code == 422
+
+    files = {"file": ("test.pdf", BytesIO(b"%PDF-1.4 not really"), "application/pdf")}
+    assert client.post("/parse/sync", files=files).status_code == 422
+
+    monkeypatch.setattr(settings, "BACKPRESSURE_QUEUE_DEPTH", 0)
+    files = {"file": ("test.pdf", BytesIO(make_text_pdf(1)), "application/pdf")}
+    response = client.post("/parse/sync", files=files)
+    assert response.status_code == 429
+    assert pool.in_flight == 0
@@ -0,0 +1,255 @@
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from io import BytesIO
+from typing import Any, Dict, List
+
+import pytest
+from billiard.einfo import ExceptionInfo
+from celery import states
+from celery.exceptions import TimeLimitExceeded
+from celery.worker.request import Request
+from fastapi.testclient import TestClient
+from kombu import Message
+from kombu.utils.json import dumps
+
+from app import worker
+from app.config import settings
+from app.main import app
+from app.models import TaskStatus
+from app.services.redis_client import get_redis
+from app.services.scheduling import acquire_slot, inflight
+from app.services.task_events import (
+    WebhookTargetError,
+    event_channel,
+    pop_webhook,
+    publish_task_event,
+    register_webhook,
+    validate_callback_url,
+    webhook_payload,
+)
+from app.worker import _cache_key, deliver_webhook_task, result_cache
+from tests.pdf_samples import make_text_pdf
+
+
+client = TestClient(app)
+
+
+class WebhookReceiver:
+    """Local HTTP server recording the JSON bodies POSTed to it"""
+
+    def __init__(self):
+        received: List[Dict[str, Any]] = []
+        self.received = received
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                received.append(json.loads(body))
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/hook"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def wait(self, count: int = 1, timeout: float = 15) -> List[Dict[str, Any]]:
+        deadline = time.time() + timeout
+        while len(self.received) < count and time.time() < deadline:
+            time.sleep(0.2)
+        return self.received
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def receiver():
+    server = WebhookReceiver()
+    yield server
+    server.close()
+
+
+def read_events(task_ids: List[str], **params) -> List[Dict[str, Any]]:
+    """Consume /events until the server closes the stream"""
+    events = []
+    with client.stream("GET", "/events", params={"task_ids": task_ids, **params}) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        for line in response.iter_lines():
+            if line.startswith("data: "):
+                events.append(json.loads(line[len("data: "):]))
+    return events
+
+
+def unique_pdf() -> bytes:
+    return make_text_pdf(1) + f"\n% {time.time()}".encode()
+
+
+def test_validate_callback_url(monkeypatch):
+    """Test that only absolute http(s) URLs of public hosts are accepted as webhooks"""
+    assert validate_callback_url("https://93.184.216.34/hook") == "https://93.184.216.34/hook"
+    assert validate_callback_url("http://[2606:4700::1111]:8080/") == "http://[2606:4700::1111]:8080/"
+    for url in ["ftp://example.com/hook", "/relative/hook", "example.com", "https://", "http://host:port/"]:
+        with pytest.raises(ValueError):
+            validate_callback_url(url)
+
+    internal = [
+        "http://127.0.0.1:8080/",
+        "http://localhost/hook",
+        "http://10.1.2.3/",
+        "http://192.168.0.1/",
+        "http://169.254.169.254/latest/meta-data/",
+        "http://100.64.0.1/",
+        "http://0.0.0.0/",
+        "http://[::1]/",
+        "http://[::ffff:127.0.0.1]/",
+        "http://[fd00::1]/",
+        "http://224.0.0.1/",
+    ]
+    for url in internal:
+        with pytest.raises(WebhookTargetError):
+            validate_callback_url(url)
+
+    monkeypatch.setattr(settings, "WEBHOOK_ALLOWED_HOSTS", ["127.0.0.1", ".internal"])
+    assert validate_callback_url("http://127.0.0.1:8080/") == "http://127.0.0.1:8080/"
+    with pytest.raises(WebhookTargetError):
+        validate_callback_url("https://93.184.216.34/hook")
+    with pytest.raises(WebhookTargetError):
+        validate_callback_url("http://hooks.internal/")  # allowed, but doesn't resolve
+
+
+def test_webhook_registration_is_consumed_once():
+    """Test that a registered webhook is handed out exactly once"""
+    register_webhook("webhook-test-task", "https://example.com/hook")
+    assert pop_webhook("webhook-test-task") == "https://example.com/hook"
+    assert pop_webhook("webhook-test-task") is None
+
+
+def test_publish_task_event():
+    """Test that status changes are published on the task's channel"""
+    pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(event_channel("event-test-task"))
+    try:
+        pubsub.get_message(timeout=1)
+        publish_task_event("event-test-task", TaskStatus.PROCESSING)
+        message = pubsub.get_message(timeout=5)
+        assert json.loads(message["data"]) == {"task_id": "event-test-task", "status": "processing"}
+    finally:
+        pubsub.close()
+
+
+def test_deliver_webhook_task(receiver, monkeypatch):
+    """Test that the delivery task POSTs the payload as JSON, only to allowed hosts"""
+    rejected = deliver_webhook_task.apply(args=(receiver.url, {"task_id": "abc", "status": "success"}))
+
+    assert rejected.state == states.FAILURE
+    assert isinstance(rejected.result, WebhookTargetError)
+    assert receiver.received == []
+
+    monkeypatch.setattr(settings, "WEBHOOK_ALLOWED_HOSTS", ["127.0.0.1"])
+    status = deliver_webhook_task.apply(args=(receiver.url, {"task_id": "abc", "status": "success"})).get()
+
+    assert status == 204
+    assert receiver.received == [{"task_id": "abc", "status": "success"}]
+
+
+def test_parse_rejects_invalid_callback_url():
+    """Test that /parse refuses callback URLs it could never deliver to"""
+    files = {"file": ("test.pdf", BytesIO(unique_pdf()), "application/pdf")}
+    response = client.post("/parse", files=files, params={"callback_url": "not-a-url"})
+
+    assert response.status_code == 400
+
+    response = client.post("/parse", files=files, params={"callback_url": "http://169.254.169.254/hook"})
+
+    assert response.status_code == 400
+
+
+def test_events_for_cached_task():
+    """Test that a stream for an already finished task ends after one event"""
+    pdf_bytes = unique_pdf()
+    result_cache.set(_cache_key(result_cache.content_hash(pdf_bytes)), "# Cached markdown")
+    files = {"file": ("test.pdf", BytesIO(pdf_bytes), "application/pdf")}
+    task_id = client.post("/parse", files=files).json()["task_id"]
+
+    events = read_events([task_id], include_content=True)
+
+    assert len(events) == 1
+    assert events[0]["task_id"] == task_id
+    assert events[0]["status"] == "success"
+    assert events[0]["content"] == "# Cached markdown"
+
+
+def test_events_follow_worker_task():
+    """Test that a stream reports a queued task through to its result"""
+    files = {"file": ("test.pdf", BytesIO(unique_pdf()), "application/pdf")}
+    task_id = client.post("/parse", files=files).json()["task_id"]
+
+    events = read_events([task_id])
+
+    assert events[-1]["task_id"] == task_id
+    assert events[-1]["status"] == "success"
+    assert events[-1]["content"] is None
+    statuses = [event["status"] for event in events]
+    assert len(statuses) == len(set(statuses))
+
+
+def test_finished_task_notifies_webhook(receiver, monkeypatch):
+    """Test that the webhook receives the task's outcome and result link, not its markdown"""
+    monkeypatch.setattr(settings, "WEBHOOK_ALLOWED_HOSTS", ["127.0.0.1"])
+    monkeypatch.setattr(
+        worker.deliver_webhook_task, "delay", lambda *args: worker.deliver_webhook_task.apply(args=args)
+    )
+    task_id = str(uuid.uuid4())
+    register_webhook(task_id, receiver.url)
+
+    worker.announce_task_finished(
+        task_id=task_id,
+        task=worker.parse_pdf_task,
+        retval={"status": "success", "content": "# Page 1 line 0", "user_id": "hook_user", "file_id": None},
+        state=states.SUCCESS
+    )
+
+    received = receiver.wait()
+    assert received == [webhook_payload(task_id, TaskStatus.SUCCESS)]
+    assert received[0]["links"] == {"result": f"/task/{task_id}"}
+    assert "content" not in received[0]
+
+
+def test_hard_timeout_releases_slot_and_notifies_webhook(receiver, monkeypatch):
+    """Test that a task killed at the hard time limit frees its user slot and reaches the webhook"""
+    monkeypatch.setattr(settings, "WEBHOOK_ALLOWED_HOSTS", ["127.0.0.1"])
+    monkeypatch.setattr(
+        worker.deliver_webhook_task, "delay", lambda *args: worker.deliver_webhook_task.apply(args=args)
+    )
+    task, task_id, user_id = worker.parse_pdf_blob_task, str(uuid.uuid4()), f"killed-{uuid.uuid4()}"
+    acquire_slot(task_id, user_id)
+    register_webhook(task_id, receiver.url)
+    assert inflight(user_id) == 1
+
+    # What the worker's main process gets from the pool when it kills the task's process
+    headers, properties, body, _ = worker.celery_app.amqp.as_task_v2(task_id, task.name, args=("blob", user_id))
+    message = Message(
+        body=dumps(body), headers=headers, properties=properties,
+        content_type="application/json", content_encoding="utf-8", delivery_info={}
+    )
+    message.ack = lambda *args, **kwargs: None
+    request = Request(message, app=worker.celery_app, task=task)
+    try:
+        raise TimeLimitExceeded(360)
+    except TimeLimitExceeded:
+        request.on_failure(ExceptionInfo())
+    request.on_timeout(soft=False, timeout=360)
+
+    assert worker.celery_app.AsyncResult(task_id).state == states.FAILURE
+    assert inflight(user_id) == 0
+    received = receiver.wait()
+    assert [(payload["task_id"], payload["status"]) for payload in received] == [(task_id, TaskStatus.FAILED)]
@@ -0,0 +1,92 @@
+import asyncio
+import uuid
+
+from celery import states
+from fastapi.testclient import TestClient
+
+from app import main
+from app.config import settings
+from app.services.redis_client import get_async_redis
+from app.services.result_store import pack_result
+from app.services.task_results import fetch_task_states, fetch_task_states_async, read_task_results
+from app.worker import celery_app
+
+
+client = TestClient(main.app)
+
+
+def store_success(content, **overrides):
+    """Store a finished task result as the worker would and return its id"""
+    task_id = str(uuid.uuid4())
+    result = pack_result({"status": "success", "content": content, "user_id": "u1", "file_id": "f1", "error": None})
+    celery_app.backend.store_result(task_id, dict(result, **overrides), states.SUCCESS)
+    return task_id
+
+
+def test_async_states_match_sync():
+    """Test that the asyncio lookup decodes the same states as the blocking one"""
+    task_ids = [store_success("# a"), str(uuid.uuid4()), store_success("# b" * 1000)]
+
+    async def fetch():
+        return await fetch_task_states_async(get_async_redis(), celery_app, task_ids)
+
+    assert asyncio.run(fetch()) == fetch_task_states(celery_app, task_ids)
+
+
+def test_async_client_shared_per_loop():
+    """Test that handlers on one event loop share one pooled client"""
+    async def clients():
+        return get_async_redis(), get_async_redis()
+
+    first, second = asyncio.run(clients())
+
+    assert first is second
+    assert first.connection_pool.max_connections == settings.REDIS_MAX_CONNECTIONS
+
+
+def test_read_offloaded_results(monkeypatch):
+    """Test that content offloaded to the result blob store is restored"""
+    monkeypatch.setattr(settings, "RESULT_OFFLOAD_THRESHOLD", 1)
+    content = "# Offloaded\n" * 500
+    task_id = store_success(content)
+
+    results = asyncio.run(read_task_results(celery_app, [task_id]))
+
+    assert results[0].content == content
+
+
+def test_bulk_task_status():
+    """Test that POST /tasks/status answers every id in order"""
+    done = store_success("# done")
+    unknown = str(uuid.uuid4())
+
+    response = client.post("/tasks/status", json={"task_ids": [unknown, done]})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["task_id"] for r in results] == [unknown, done]
+    assert [r["status"] for r in results] == ["pending", "success"]
+    assert results[1]["content"] is None
+
+    response = client.post("/tasks/status", json={"task_ids": [done], "include_content": True})
+    assert response.json()["results"][0]["content"] == "# done"
+
+
+def test_bulk_task_status_limit(monkeypatch):
+    """Test that POST /tasks/status refuses more ids than a batch may hold"""
+    monkeypatch.setattr(settings, "MAX_BATCH_FILES", 2)
+
+    response = client.post("/tasks/status", json={"task_ids": ["a", "b", "c"]})
+
+    assert response.status_code == 400
+
+
+def test_task_result_endpoint():
+    """Test that GET /task/{task_id} reads through the async pool"""
+    task_id = store_success("# hello")
+
+    data = client.get(f"/task/{task_id}").json()
+
+    assert data["status"] == "success"
+    assert data["content"] == "# hello"
+    assert data["user_id"] == "u1"
@@ -0,0 +1,49 @@
+import hashlib
+from io import BytesIO
+
+import pytest
+from fastapi import UploadFile
+
+from app.services.upload import UploadTooLargeError, spool_upload
+
+
+def make_upload(data: bytes, size=None) -> UploadFile:
+    return UploadFile(file=BytesIO(data), filename="test.pdf", size=size)
+
+
+@pytest.mark.asyncio
+async def test_spool_upload_hashes_incrementally():
+    """Test that size and SHA-256 are computed while reading in chunks"""
+    data = b"%PDF-1.4 " + b"x" * 10_000
+    
+    with await spool_upload(make_upload(data), chunk_size=1024) as upload:
+        assert upload.size == len(data)
+        assert upload.content_hash == hashlib.sha256(data).hexdigest()
+        assert upload.read() == data
+
+
+@pytest.mark.asyncio
+async def test_spool_upload_spills_to_disk_above_threshold():
+    """Test that large uploads are not kept in memory"""
+    with await spool_upload(make_upload(b"x" * 4096), chunk_size=1024, spool_threshold=2048) as upload:
+        assert upload.file._rolled is True
+    
+    with await spool_upload(make_upload(b"x" * 1024), chunk_size=1024, spool_threshold=2048) as upload:
+        assert upload.file._rolled is False
+
+
+@pytest.mark.asyncio
+async def test_spool_upload_enforces_limit_while_reading():
+    """Test that oversized bodies are rejected once the limit is crossed"""
+    with pytest.raises(UploadTooLargeError):
+        await spool_upload(make_upload(b"x" * 4096), max_size=2048, chunk_size=1024)
+
+
+@pytest.mark.asyncio
+async def test_spool_upload_rejects_known_size_without_reading():
+    """Test that a declared part size over the limit fails before copying"""
+    upload = make_upload(b"x" * 10, size=4096)
+    
+    with pytest.raises(UploadTooLargeError):
+        await spool_upload(upload, max_size=2048)
+    assert upload.file.tell() == 0